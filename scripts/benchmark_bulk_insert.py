@@ -0,0 +1,80 @@
+"""
+Compares inserting orders one by one through the session with
+SqlAlchemyRepository.add_many.
+
+Usage:
+    python scripts/benchmark_bulk_insert.py [ROWS] [DATABASE_URI]
+
+The database defaults to an in-memory SQLite one. Point it at Postgres
+(e.g. config.get_postgres_uri()) and set BULK_INSERT_USE_COPY=true to
+measure the COPY path as well.
+"""
+import datetime
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker, clear_mappers
+
+from facturator import config
+from facturator.adapters import orm, repository
+from facturator.adapters.repository_entity_implementation import OrderImplementation
+from facturator.domain import model
+
+
+def build_orders(rows):
+    return [
+        model.InvoiceOrder(
+            id=str(uuid.uuid4()),
+            payer_name=f'PAYER_{number % 500}',
+            date=datetime.date(2024, 2, 1),
+            quantity=50 + number % 7 * 10,
+            number=f'BENCH-{number:06d}'
+        )
+        for number in range(rows)
+    ]
+
+
+def insert_one_by_one(session, orders):
+    order_repo = repository.SqlAlchemyRepository(session, OrderImplementation())
+    for order in orders:
+        order_repo.add(order)
+
+
+def insert_in_bulk(session, orders):
+    order_repo = repository.SqlAlchemyRepository(
+        session, OrderImplementation(), use_copy=config.get_bulk_insert_use_copy()
+    )
+    order_repo.add_many(orders)
+
+
+def measure(session_factory, insert, rows):
+    session = session_factory()
+    session.execute(text('DELETE FROM orders'))
+    session.commit()
+    orders = build_orders(rows)
+    start = time.perf_counter()
+    insert(session, orders)
+    session.commit()
+    elapsed = time.perf_counter() - start
+    session.close()
+    return rows / elapsed
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    uri = sys.argv[2] if len(sys.argv) > 2 else 'sqlite://'
+    engine = create_engine(uri)
+    orm.metadata.create_all(engine)
+    orm.start_mappers()
+    session_factory = sessionmaker(bind=engine)
+    try:
+        for name, insert in [('session.add', insert_one_by_one), ('add_many', insert_in_bulk)]:
+            print(f'{name:>12}: {measure(session_factory, insert, rows):10.0f} rows/s')
+    finally:
+        clear_mappers()
+
+
+if __name__ == '__main__':
+    main()
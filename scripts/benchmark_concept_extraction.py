@@ -0,0 +1,60 @@
+"""
+Compares extracting payer names from movement concepts row by row, as
+the file handlers used to, with the vectorized ConceptPatternRegistry.
+
+Usage:
+    python scripts/benchmark_concept_extraction.py [ROWS] [DISTINCT_CONCEPTS]
+"""
+import re
+import sys
+import time
+
+import pandas as pd
+
+from facturator.service_layer.file_handler import concept_patterns
+
+
+def get_name_from_concept_per_row(concept):
+    patterns = [
+        r'BIZUM DE (.+?) CONCEPTO',
+        r'TRANSFERENCIA DE (.+?), CONCEPTO'
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, concept)
+        if match:
+            return match.group(1)
+    return None
+
+
+def build_concepts(rows, distinct):
+    templates = [
+        'BIZUM DE CLIENT_{} CONCEPTO Sesion some concept',
+        'TRANSFERENCIA DE CLIENT_{}, CONCEPTO Segunda Sesion some concept',
+        'RECIBO LUZ {} SOME BILL',
+    ]
+    return pd.Series([
+        templates[row % 3].format(row % distinct) for row in range(rows)
+    ])
+
+
+def measure(function, concepts):
+    start = time.perf_counter()
+    names = function(concepts)
+    return time.perf_counter() - start, names
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    concepts = build_concepts(rows, distinct)
+    per_row_time, per_row_names = measure(
+        lambda series: series.apply(get_name_from_concept_per_row), concepts
+    )
+    vectorized_time, vectorized_names = measure(concept_patterns.extract, concepts)
+    assert per_row_names.fillna('').equals(vectorized_names.fillna(''))
+    print(f'{"apply":>10}: {per_row_time * 1000:8.1f} ms')
+    print(f'{"extract":>10}: {vectorized_time * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares computing invoice lines one order at a time with
+PriceTierEngine.calculate_lines_batch.
+
+Usage:
+    python scripts/benchmark_line_calculation.py [ORDERS] [PRICES]
+
+PRICES is a comma separated list of tiers and defaults to PRICE_TIERS.
+"""
+import sys
+import time
+
+import numpy as np
+
+from facturator import config
+from facturator.domain.pricing import PriceTierEngine
+
+
+def build_quantities(engine, orders):
+    rng = np.random.default_rng(0)
+    candidates = rng.integers(1, 100, (orders, len(engine.prices)))
+    return [
+        sum(int(units) * price for units, price in zip(row, engine.prices))
+        for row in candidates
+    ]
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    prices = sys.argv[2].split(',') if len(sys.argv) > 2 else config.get_price_tiers()
+    quantities = build_quantities(PriceTierEngine(prices), orders)
+
+    engine = PriceTierEngine(prices, cache_size=None)
+    start = time.perf_counter()
+    for quantity in quantities:
+        engine.calculate_lines(quantity)
+    scalar = time.perf_counter() - start
+
+    engine = PriceTierEngine(prices)
+    start = time.perf_counter()
+    engine.calculate_lines_batch([float(quantity) for quantity in quantities])
+    batch = time.perf_counter() - start
+
+    print(f'{"calculate_lines":>22}: {orders / scalar:12.0f} orders/s')
+    print(f'{"calculate_lines_batch":>22}: {orders / batch:12.0f} orders/s')
+
+
+if __name__ == '__main__':
+    main()
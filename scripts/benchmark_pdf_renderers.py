@@ -0,0 +1,77 @@
+"""
+Compares the per-invoice latency and peak memory of the PDF renderers.
+
+Usage:
+    python scripts/benchmark_pdf_renderers.py [INVOICES] [RENDERER ...]
+
+Renderers default to all of them (see renderers.RENDERERS). Peak memory
+is the Python heap of this process, measured with tracemalloc, plus the
+largest resident set of a child process, which is where wkhtmltopdf
+renders.
+"""
+import datetime
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from facturator.domain import model
+from facturator.service_layer.invoice_generator import invoice, renderers
+
+
+# Sums of the default price tiers of 50 and 60, which the invoices can split
+QUANTITIES = (50, 60, 100, 110, 120, 150, 170)
+
+
+def build_contexts(count):
+    payer = model.Payer(
+        name='BENCH PAYER S.L.', nif='B12345678', address='Calle Mayor 1',
+        zip_code='28001', city='Madrid', province='Madrid'
+    )
+    contexts = []
+    for number in range(count):
+        order = model.InvoiceOrder(
+            payer.name, datetime.date(2024, 3, 31), QUANTITIES[number % len(QUANTITIES)],
+            number=f'BENCH-{number:04d}'
+        )
+        order.allocate_payer(payer)
+        contexts.append(invoice.generate_context(order))
+    return contexts
+
+
+def measure(renderer, contexts):
+    latencies = []
+    tracemalloc.start()
+    for context in contexts:
+        start = time.perf_counter()
+        renderer.render(context)
+        latencies.append(time.perf_counter() - start)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    children_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+    return latencies, heap_peak, children_peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    names = sys.argv[2:] or list(renderers.RENDERERS)
+    contexts = build_contexts(count)
+    print(f'{"renderer":>12} {"median ms":>10} {"p95 ms":>10} {"heap MiB":>9} {"child MiB":>10}')
+    for name in names:
+        renderer = renderers.get_renderer(name)
+        try:
+            renderer.render(contexts[0])
+        except OSError as error:
+            print(f'{name:>12}: skipped, {error}'.splitlines()[0])
+            continue
+        latencies, heap_peak, children_peak = measure(renderer, contexts)
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        print(
+            f'{name:>12} {statistics.median(latencies) * 1000:10.1f} {p95 * 1000:10.1f} '
+            f'{heap_peak / 2 ** 20:9.1f} {children_peak / 2 ** 20:10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
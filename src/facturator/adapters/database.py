@@ -1,14 +1,11 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from facturator import config
-from facturator.adapters import orm
+from facturator.adapters import engines, orm
 
 
 def init_sqlalchemy_db():
     orm.start_mappers()
-    engine = create_engine(config.get_postgres_uri())
+    engine = engines.get_engine()
     orm.metadata.create_all(engine)
-    return sessionmaker(bind=engine)
+    return engines.get_session_factory()
 
 
 get_sqlalchemy_session = init_sqlalchemy_db()
@@ -0,0 +1,80 @@
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from facturator import config
+
+
+_engines = {}
+_session_factories = {}
+_lock = threading.Lock()
+
+
+def pool_options():
+    """Connection pool settings for create_engine, read from the DB_POOL_* settings."""
+    return {
+        'pool_size': config.get_db_pool_size(),
+        'max_overflow': config.get_db_max_overflow(),
+        'pool_timeout': config.get_db_pool_timeout(),
+        'pool_recycle': config.get_db_pool_recycle(),
+        'pool_pre_ping': config.get_db_pool_pre_ping(),
+    }
+
+
+def get_engine(uri=None) -> Engine:
+    """
+    Returns the process-wide engine for `uri`, by default the Postgres
+    database, creating it with the configured pool settings the first
+    time. Creating an engine does not connect to the database.
+
+    SQLite URIs get SQLAlchemy's default pool, whose settings differ.
+    """
+    uri = uri or config.get_postgres_uri()
+    with _lock:
+        if uri not in _engines:
+            options = {} if make_url(uri).get_backend_name() == 'sqlite' else pool_options()
+            _engines[uri] = create_engine(uri, **options)
+        return _engines[uri]
+
+
+def get_session_factory(uri=None) -> sessionmaker:
+    """Returns the sessionmaker bound to get_engine(uri)."""
+    engine = get_engine(uri)
+    with _lock:
+        if engine not in _session_factories:
+            _session_factories[engine] = sessionmaker(bind=engine)
+        return _session_factories[engine]
+
+
+def pool_status():
+    """
+    Returns the state of the connection pool of every engine: its
+    configured size, the connections idle in the pool, the ones in use,
+    and how many of those go beyond the pool size.
+    """
+    with _lock:
+        engines = list(_engines.values())
+    status = []
+    for engine in engines:
+        pool = engine.pool
+        pool_dict = {'url': engine.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            pool_dict.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        status.append(pool_dict)
+    return status
+
+
+def dispose_engines():
+    """Closes the pooled connections of every engine, e.g. after a fork."""
+    with _lock:
+        engines = list(_engines.values())
+    for engine in engines:
+        engine.dispose()
@@ -1,4 +1,7 @@
-from sqlalchemy import Table, MetaData, Column, Integer, String, ForeignKey, Numeric
+from sqlalchemy import (
+    Table, MetaData, Column, Integer, BigInteger, String, DateTime, ForeignKey, Numeric, Index,
+    DDL, event, func
+)
 from sqlalchemy.orm import relationship, registry
 
 from facturator.domain import model
@@ -28,7 +31,8 @@ orders = Table(
     Column('payer_id', String(255), ForeignKey('payers.id')),
     Column('date', String(50)),
     Column('quantity', Numeric(10, 2)),
-    Column('number', String(50))
+    Column('number', String(50)),
+    Column('version', Integer, nullable=False, server_default='1')
 )
 
 payers = Table(
@@ -41,6 +45,55 @@ payers = Table(
     Column('zip_code', String(10)),
     Column('city', String(100)),
     Column('province', String(100)),
+    Column('version', Integer, nullable=False, server_default='1')
+)
+
+changes = Table(
+    'changes',
+    metadata,
+    Column('id', BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True),
+    Column('entity', String(20), nullable=False),
+    Column('entity_id', String(255), nullable=False),
+    Column('transaction_id', BigInteger, nullable=False, server_default='0'),
+    Column('operation', String(10), nullable=False),
+    Column('changed_at', DateTime, nullable=False, server_default=func.now()),
+    Index('ix_changes_transaction_id_id', 'transaction_id', 'id'),
+    Index('ix_changes_entity_transaction_id_id', 'entity', 'transaction_id', 'id')
+)
+
+
+def _not_postgres(ddl, target, bind, dialect, **kw):
+    return dialect.name != 'postgresql'
+
+
+def _add_name_search_indexes(table, column_name):
+    """
+    Indexes a name column for case-insensitive substring searches.
+
+    Postgres gets a trigram GIN index, which serves the ILIKE emitted by
+    SqlAlchemyRepository.search. Other databases get a functional lower()
+    index matching their lower(column) LIKE rendering.
+    """
+    column = table.c[column_name]
+    Index(
+        f'ix_{table.name}_{column_name}_trgm',
+        column,
+        postgresql_using='gin',
+        postgresql_ops={column_name: 'gin_trgm_ops'}
+    ).ddl_if(dialect='postgresql')
+    Index(
+        f'ix_{table.name}_{column_name}_lower',
+        func.lower(column)
+    ).ddl_if(callable_=_not_postgres)
+
+
+_add_name_search_indexes(orders, 'payer_name')
+_add_name_search_indexes(payers, 'name')
+
+event.listen(
+    metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
 )
 
 
@@ -49,10 +102,14 @@ def start_mappers():
 
     mapper_registry.map_imperatively(model.User, users)
 
-    mapper_registry.map_imperatively(model.Payer, payers)
+    mapper_registry.map_imperatively(model.Change, changes)
+
+    mapper_registry.map_imperatively(model.Payer, payers, version_id_col=payers.c.version)
 
     mapper_registry.map_imperatively(
         model.InvoiceOrder, orders, properties={
-            '_payer': relationship(model.Payer)
-        }
+            '_payer': relationship(model.Payer),
+            '_payer_id': orders.c.payer_id
+        },
+        version_id_col=orders.c.version
     )
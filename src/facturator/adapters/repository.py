@@ -1,5 +1,20 @@
+import csv
+import io
 from abc import ABC, abstractmethod
+
+from sqlalchemy import and_, func, inspect, insert, or_, select, text
+from sqlalchemy.orm import joinedload, selectinload, lazyload
+
+from facturator.adapters import orm
 from facturator.adapters.repository_entity_implementation import EntityImplementation
+from facturator.domain import model
+
+
+LOADING_STRATEGIES = {
+    'lazy': lazyload,
+    'selectin': selectinload,
+    'joined': joinedload,
+}
 
 
 class AbstractRepository(ABC):
@@ -10,15 +25,41 @@ class AbstractRepository(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get(self, value: str):
+    def add_many(self, elements: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_rows(self, rows: list):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, value: str, loading: str = None):
         raise NotImplementedError
     
     @abstractmethod
-    def list_all(self):
+    def get_many(self, values: list = None, prefix: str = None, loading: str = 'joined',
+                 field: str = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_all(self, loading: str = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def estimate_count(self) -> int:
         raise NotImplementedError
 
     @abstractmethod
-    def get_by_id(self, element_id: str):
+    def search(self, field: str, term: str, loading: str = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_page(self, limit: int, after: str = None, field: str = None, term: str = None,
+                  loading: str = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_by_id(self, element_id: str, loading: str = None):
         raise NotImplementedError
     
     @abstractmethod
@@ -27,28 +68,181 @@ class AbstractRepository(ABC):
 
 
 class SqlAlchemyRepository(AbstractRepository):
-    def __init__(self, session, entity_implementation: EntityImplementation):
+    def __init__(self, session, entity_implementation: EntityImplementation, use_copy=False):
         self.session = session
         self.entity_implementation = entity_implementation
+        self.use_copy = use_copy
 
     def add(self, element):
         self.session.add(element)
 
-    def get(self, value):
+    def add_many(self, elements):
+        """
+        Inserts the elements in one batch, bypassing the unit of work.
+
+        The rows go through a single executemany INSERT, which SQLAlchemy
+        sends as multi-row VALUES batches. With `use_copy` set and a
+        psycopg2 connection, they are streamed with COPY instead. The
+        elements are not added to the session, so later changes to them
+        are not persisted.
+        """
+        self.add_rows([self._to_row(element) for element in elements])
+
+    def add_rows(self, rows):
+        """
+        Bulk inserts plain dicts keyed by column name, the same way as
+        add_many but without building entities first.
+        """
+        if not rows:
+            return
+        self.session.flush()
+        mapper = inspect(self.entity_implementation.get_entity_class())
+        table = mapper.local_table
+        if mapper.version_id_col is not None:
+            version_key = mapper.version_id_col.key
+            rows = [
+                row if row.get(version_key) is not None else {**row, version_key: 1}
+                for row in rows
+            ]
+        bind = self.session.get_bind()
+        if self.use_copy and bind.dialect.driver == 'psycopg2':
+            self._copy_rows(table, rows)
+        else:
+            self.session.execute(insert(table), rows)
+
+    def _to_row(self, element):
+        mapper = inspect(self.entity_implementation.get_entity_class())
+        row = {
+            prop.columns[0].key: getattr(element, prop.key, None)
+            for prop in mapper.column_attrs
+        }
+        for relationship in mapper.relationships:
+            related = getattr(element, relationship.key, None)
+            if related is None:
+                continue
+            for local, remote in relationship.local_remote_pairs:
+                remote_key = relationship.mapper.get_property_by_column(remote).key
+                row[local.key] = getattr(related, remote_key)
+        return row
+
+    def _copy_rows(self, table, rows):
+        columns = [column.key for column in table.columns]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([
+                '\\N' if row.get(column) is None else row.get(column)
+                for column in columns
+            ])
+        buffer.seek(0)
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def _loader_options(self, loading=None):
+        """
+        Returns the options loading the relationships of the entities with
+        `loading`: 'lazy' (one SELECT per entity on first access),
+        'selectin' (one extra SELECT ... WHERE id IN for the whole result)
+        or 'joined' (a LEFT OUTER JOIN in the same statement). None keeps
+        the mapper default, which is lazy.
+        """
+        if loading is None:
+            return []
+        try:
+            strategy = LOADING_STRATEGIES[loading]
+        except KeyError:
+            raise ValueError(
+                f"Unknown loading strategy {loading}, expected one of {', '.join(LOADING_STRATEGIES)}"
+            ) from None
+        entity_class = self.entity_implementation.get_entity_class()
+        return [
+            strategy(getattr(entity_class, relationship.key))
+            for relationship in inspect(entity_class).relationships
+        ]
+
+    def _query(self, loading=None):
+        entity_class = self.entity_implementation.get_entity_class()
+        return self.session.query(entity_class).options(*self._loader_options(loading))
+
+    def get(self, value, loading=None):
         filter_by = {self.entity_implementation.get_filter_parameter(): value}
-        return self.session.query(
-            self.entity_implementation.get_entity_class()
-        ).filter_by(**filter_by).one()
+        return self._query(loading).filter_by(**filter_by).one_or_none()
+
+    def get_many(self, values=None, prefix=None, loading='joined', field=None):
+        """
+        Lists the entities whose `field` (by default the filter parameter)
+        is one of `values` or starts with `prefix`, ordered by it. By
+        default their related entities are joined in the same query.
+        """
+        entity_class = self.entity_implementation.get_entity_class()
+        column = getattr(entity_class, field or self.entity_implementation.get_filter_parameter())
+        query = self._query(loading)
+        if values is not None:
+            query = query.filter(column.in_(values))
+        if prefix is not None:
+            query = query.filter(column.startswith(prefix, autoescape=True))
+        return query.order_by(column).all()
 
-    def get_by_id(self, element_id: str):
+    def get_by_id(self, element_id: str, loading: str = None):
         return self.session.get(
-            self.entity_implementation.get_entity_class(), element_id
+            self.entity_implementation.get_entity_class(),
+            element_id,
+            options=self._loader_options(loading)
         )
 
-    def list_all(self):
-        return self.session.query(
-            self.entity_implementation.get_entity_class()
-        ).all()
+    def list_all(self, loading: str = None):
+        return self._query(loading).all()
+
+    def estimate_count(self):
+        """
+        Returns the number of rows of the table, as estimated by the
+        Postgres planner statistics when the table was analyzed, or else
+        counted.
+        """
+        table = inspect(self.entity_implementation.get_entity_class()).local_table
+        if self.session.get_bind().dialect.name == 'postgresql':
+            estimate = self.session.execute(
+                text('SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)'),
+                {'name': table.name}
+            ).scalar()
+            if estimate is not None and estimate > 0:
+                return int(estimate)
+        return self.session.execute(select(func.count()).select_from(table)).scalar_one()
+
+    def search(self, field: str, term: str, loading: str = None):
+        """
+        Lists the entities whose `field` contains `term`, ignoring case.
+
+        The match runs in the database (ILIKE on Postgres, lower() LIKE
+        elsewhere) and LIKE wildcards in `term` are matched literally.
+        """
+        return self._query(loading).filter(self._contains(field, term)).all()
+
+    def list_page(self, limit: int, after: str = None, field: str = None, term: str = None,
+                  loading: str = None):
+        """
+        Lists up to `limit` entities ordered by id, starting after the
+        entity with id `after` (keyset pagination). When `field` is given,
+        only entities matching search(field, term) are included.
+        """
+        entity_class = self.entity_implementation.get_entity_class()
+        query = self._query(loading)
+        if field is not None:
+            query = query.filter(self._contains(field, term))
+        if after is not None:
+            query = query.filter(entity_class.id > after)
+        return query.order_by(entity_class.id).limit(limit).all()
+
+    def _contains(self, field: str, term: str):
+        column = getattr(self.entity_implementation.get_entity_class(), field)
+        return column.icontains(term, autoescape=True)
 
     def delete_by_id(self, element_id: str):
         entity_class = self.entity_implementation.get_entity_class()
@@ -57,3 +251,83 @@ class SqlAlchemyRepository(AbstractRepository):
             self.session.delete(entity)
         else:
             raise ValueError(f"Entity with id {element_id} does not exist")
+
+
+class AbstractChangeLog(ABC):
+    @abstractmethod
+    def add(self, entity: str, entity_ids: list, operation: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_after(self, after: tuple, limit: int):
+        raise NotImplementedError
+
+    @abstractmethod
+    def latest(self, entity: str):
+        raise NotImplementedError
+
+
+class SqlAlchemyChangeLog(AbstractChangeLog):
+    """
+    Append-only log of the changes to orders and payers, written in the
+    transaction of the changes themselves.
+
+    Entries are ordered by the id of the transaction that wrote them and
+    then by their own id. On Postgres, ids are handed out before commit,
+    so a transaction can commit after a later one; entries only become
+    visible once every transaction older than theirs has finished, so a
+    reader past an entry never misses one committed later before it.
+    """
+    def __init__(self, session):
+        self.session = session
+
+    def _is_postgres(self):
+        return self.session.get_bind().dialect.name == 'postgresql'
+
+    def add(self, entity, entity_ids, operation):
+        """
+        Appends one entry per id in `entity_ids`, in a single
+        executemany INSERT.
+        """
+        if not entity_ids:
+            return
+        statement = insert(orm.changes)
+        if self._is_postgres():
+            statement = statement.values(transaction_id=func.txid_current())
+        self.session.execute(statement, [
+            {'entity': entity, 'entity_id': entity_id, 'operation': operation}
+            for entity_id in entity_ids
+        ])
+
+    def _finished(self, query):
+        if self._is_postgres():
+            query = query.filter(
+                model.Change.transaction_id
+                < func.txid_snapshot_xmin(func.txid_current_snapshot())
+            )
+        return query
+
+    def list_after(self, after, limit):
+        """
+        Lists up to `limit` finished entries past the `(transaction_id,
+        id)` position `after`, oldest first.
+        """
+        transaction_id, entry_id = after
+        query = self.session.query(model.Change).filter(or_(
+            model.Change.transaction_id > transaction_id,
+            and_(model.Change.transaction_id == transaction_id, model.Change.id > entry_id)
+        ))
+        return (
+            self._finished(query)
+            .order_by(model.Change.transaction_id, model.Change.id)
+            .limit(limit)
+            .all()
+        )
+
+    def latest(self, entity):
+        """Returns the last finished entry of `entity`, or None."""
+        return (
+            self._finished(self.session.query(model.Change).filter_by(entity=entity))
+            .order_by(model.Change.transaction_id.desc(), model.Change.id.desc())
+            .first()
+        )
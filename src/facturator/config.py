@@ -1,4 +1,6 @@
 import os
+import tempfile
+from decimal import Decimal
 
 
 def get_postgres_uri():
@@ -9,6 +11,26 @@ def get_postgres_uri():
     return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
 
 
+def get_db_pool_size():
+    return int(os.environ.get("DB_POOL_SIZE", 5))
+
+
+def get_db_max_overflow():
+    return int(os.environ.get("DB_MAX_OVERFLOW", 10))
+
+
+def get_db_pool_timeout():
+    return int(os.environ.get("DB_POOL_TIMEOUT", 30))
+
+
+def get_db_pool_recycle():
+    return int(os.environ.get("DB_POOL_RECYCLE", 1800))
+
+
+def get_db_pool_pre_ping():
+    return os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
 def get_api_url():
     host = os.environ.get("API_HOST", "localhost")
     port = 5005 if host == "localhost" else 80
@@ -17,3 +39,117 @@ def get_api_url():
 
 def get_app_secret_key():
     return 'd9874b1c9d7d19b255c72a8096ecbd331f6885e9'
+
+
+def get_default_page_size():
+    return int(os.environ.get("DEFAULT_PAGE_SIZE", 100))
+
+
+def get_max_page_size():
+    return int(os.environ.get("MAX_PAGE_SIZE", 1000))
+
+
+def get_bulk_insert_use_copy():
+    return os.environ.get("BULK_INSERT_USE_COPY", "false").lower() == "true"
+
+
+def get_pdf_workers():
+    return int(os.environ.get("PDF_WORKERS", 2))
+
+
+def get_pdf_max_pending_jobs():
+    return int(os.environ.get("PDF_MAX_PENDING_JOBS", 50))
+
+
+def get_pdf_finished_jobs_kept():
+    return int(os.environ.get("PDF_FINISHED_JOBS_KEPT", 200))
+
+
+def get_pdf_jobs_dir():
+    return os.environ.get(
+        "PDF_JOBS_DIR", os.path.join(tempfile.gettempdir(), "facturator_pdf_jobs")
+    )
+
+
+def get_pdf_render_timeout():
+    return float(os.environ.get("PDF_RENDER_TIMEOUT", 30))
+
+
+def get_pdf_cache_dir():
+    return os.environ.get(
+        "PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "facturator_pdf_cache")
+    )
+
+
+def get_pdf_cache_max_bytes():
+    return int(os.environ.get("PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def get_pdf_renderer():
+    return os.environ.get("PDF_RENDERER", "wkhtmltopdf")
+
+
+def get_price_tiers():
+    return tuple(
+        Decimal(price) for price in os.environ.get("PRICE_TIERS", "50,60").split(",")
+    )
+
+
+def get_price_max_quantity():
+    return Decimal(os.environ.get("PRICE_MAX_QUANTITY", "1000000"))
+
+
+def get_graphql_threads():
+    return int(os.environ.get("GRAPHQL_THREADS", 8))
+
+
+def get_graphql_max_cost():
+    return int(os.environ.get("GRAPHQL_MAX_COST", 5000))
+
+
+def get_graphql_max_depth():
+    return int(os.environ.get("GRAPHQL_MAX_DEPTH", 10))
+
+
+def get_graphql_table_sizes_ttl():
+    return int(os.environ.get("GRAPHQL_TABLE_SIZES_TTL", 60))
+
+
+def get_graphql_document_cache_size():
+    return int(os.environ.get("GRAPHQL_DOCUMENT_CACHE_SIZE", 500))
+
+
+def get_auth_token_cache_size():
+    return int(os.environ.get("AUTH_TOKEN_CACHE_SIZE", 10000))
+
+
+def get_auth_token_cache_ttl():
+    return int(os.environ.get("AUTH_TOKEN_CACHE_TTL", 300))
+
+
+def get_auth_user_cache_size():
+    return int(os.environ.get("AUTH_USER_CACHE_SIZE", 1000))
+
+
+def get_auth_user_cache_ttl():
+    return int(os.environ.get("AUTH_USER_CACHE_TTL", 60))
+
+
+def get_password_hash_method():
+    return os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+
+
+def get_password_hash_workers():
+    return int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+
+
+def get_password_hash_max_pending():
+    return int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
+
+
+def get_response_cache_max_bytes():
+    return int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def get_response_cache_ttl():
+    return int(os.environ.get("RESPONSE_CACHE_TTL", 60))
@@ -25,6 +25,7 @@ class UpdatePayer(Command):
     zip_code: str = None
     city: str = None
     province: str = None   
+    expected_version: int = None
 
 @dataclass
 class DeletePayer(Command):
@@ -45,6 +46,7 @@ class UpdateOrder(Command):
     date: str = None
     quantity: float = None
     number: str = None  
+    expected_version: int = None
 
 @dataclass
 class DeleteOrder(Command):
@@ -1,3 +1,37 @@
+from facturator.domain import pricing
+
+
+class VersionConflict(Exception):
+    """Raised when an update is based on an outdated version of an item."""
+
+
+def check_version(entity, expected_version):
+    """
+    Raises VersionConflict unless `expected_version` is None or the
+    current version of `entity`.
+    """
+    if expected_version is not None and getattr(entity, 'version', None) != expected_version:
+        raise VersionConflict(
+            f'{type(entity).__name__} {entity.id} is at version '
+            f'{getattr(entity, "version", None)}, not {expected_version}'
+        )
+
+
+class Change:
+    """
+    Entry of the change log: the `operation` ('insert', 'update' or
+    'delete') applied to the `entity` ('order' or 'payer') with id
+    `entity_id`. The id of the transaction that wrote it, then its own
+    id, order the log.
+    """
+    def __init__(self, entity, entity_id, operation, id=None, changed_at=None, transaction_id=0):
+        self.id = id
+        self.transaction_id = transaction_id
+        self.entity = entity
+        self.entity_id = entity_id
+        self.operation = operation
+        self.changed_at = changed_at
+
 
 class User:
     def __init__(
@@ -41,7 +75,8 @@ class Payer:
             'address': self.address,
             'zip_code': self.zip_code,
             'city': self.city,
-            'province': self.province
+            'province': self.province,
+            'version': getattr(self, 'version', None)
         }
 
 
@@ -77,7 +112,8 @@ class InvoiceOrder:
           'date': str(self.date),
           'quantity': str(self.quantity),
           'number': self.number, 
-          'payer_id': self._payer.id if self._payer else None
+          'payer_id': self.payer_id,
+          'version': getattr(self, 'version', None)
       }
     
     def to_dict_recursive(self):
@@ -87,34 +123,17 @@ class InvoiceOrder:
           'date': str(self.date),
           'quantity': str(self.quantity),
           'number': self.number, 
-          'payer': self._payer.to_dict() if self._payer else None
+          'payer': self._payer.to_dict() if self._payer else None,
+          'version': getattr(self, 'version', None)
       }
 
     @staticmethod
     def calculate_lines(qty):
-        lines = []
-        type_1_price = 50
-        type_2_price = 60
-        price_diff = type_2_price - type_1_price
-
-        if type_1_price >= type_2_price:
-            raise ValueError("type_1_price must be lower than type_2_price")
-        if qty < type_1_price:
-            raise ValueError("quantity must be greater than type_1_price")
-
-        type_2_no = (qty % type_1_price) / price_diff
-        type_2_qty = type_2_no * type_2_price
-
-        type_1_qty = qty - type_2_qty
-        type_1_no = type_1_qty / type_1_price
+        return pricing.get_engine().calculate_lines(qty)
 
-        dict_keys = ['units', 'price', 'subtotal']
-        if type_1_no:
-            lines.append(dict(zip(dict_keys, (type_1_no, type_1_price, type_1_qty))))
-        if type_2_no:
-            lines.append(dict(zip(dict_keys, (type_2_no, type_2_price, type_2_qty))))
-
-        return lines
+    @staticmethod
+    def calculate_lines_batch(quantities):
+        return pricing.get_engine().calculate_lines_batch(quantities)
 
     def allocate_payer(self, payer: Payer):
         self._payer = payer
@@ -123,6 +142,16 @@ class InvoiceOrder:
     def payer(self):
         return self._payer
 
+    @property
+    def payer_id(self):
+        """
+        Id of the allocated payer. When the payer itself has not been
+        loaded, the mapped foreign key is used so no query is issued.
+        """
+        if '_payer' in self.__dict__:
+            return self._payer.id if self._payer else None
+        return getattr(self, '_payer_id', None)
+
     @property
     def lines(self):
         return self.calculate_lines(self.quantity)
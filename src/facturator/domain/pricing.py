@@ -0,0 +1,227 @@
+import math
+import threading
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+
+import numpy as np
+
+from facturator import config
+
+
+LineBatch = namedtuple('LineBatch', ['prices', 'units', 'subtotals'])
+
+
+class LineCalculationError(ValueError):
+    """
+    Raised by calculate_lines_batch when some quantities cannot be split.
+    `errors` maps the position of each of those quantities to the message
+    calculate_lines would have raised for it.
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        shown = '; '.join(f'row {row}: {message}' for row, message in list(errors.items())[:5])
+        more = f' (and {len(errors) - 5} more)' if len(errors) > 5 else ''
+        super().__init__(f'{len(errors)} quantities cannot be split: {shown}{more}')
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _to_quantity(value):
+    quantity = _to_decimal(value)
+    if not quantity.is_finite():
+        raise ValueError(f"quantity {quantity} is not a finite number")
+    return quantity
+
+
+class PriceTierEngine:
+    """
+    Splits an invoiced quantity into whole units of a set of price tiers.
+
+    Among all the exact splits, it picks the one with the fewest units of
+    the most expensive tier, then of the next most expensive one, and so
+    on, which for the usual 50/60 tiers means as many 50 units as
+    possible. Prices and quantities are Decimals, so the subtotals add up
+    to the quantity exactly.
+
+    With two tiers the split is solved in closed form. With more, the
+    amounts reachable with each prefix of the cheapest tiers are kept as
+    integer bitsets, in units of the smallest decimal step of the
+    prices, and grown on demand, so a breakdown costs a handful of bit
+    tests. As those bitsets grow with the quantity, quantities above
+    `max_quantity` are rejected on that path. Breakdowns are also cached
+    per quantity.
+
+    Example:
+        >>> PriceTierEngine([50, 60]).breakdown(330)
+        ((3, Decimal('50'), Decimal('150')), (3, Decimal('60'), Decimal('180')))
+    """
+    def __init__(self, prices, cache_size=4096, max_quantity=1_000_000):
+        self.max_quantity = _to_decimal(max_quantity)
+        self.prices = tuple(sorted(_to_decimal(price) for price in prices))
+        if not self.prices or self.prices[0] <= 0:
+            raise ValueError("prices must be positive")
+        if len(set(self.prices)) != len(self.prices):
+            raise ValueError("prices must be different")
+        self._scale = 10 ** max(-price.as_tuple().exponent for price in self.prices + (Decimal(0),))
+        self._steps = [int(price * self._scale) for price in self.prices]
+        self._reachable = []
+        self._limit = -1
+        self._lock = threading.Lock()
+        self.breakdown = lru_cache(maxsize=cache_size)(self._breakdown)
+
+    def _grow(self, amount):
+        limit = max(amount, 2 * self._limit, 1024)
+        mask = (1 << (limit + 1)) - 1
+        reachable, tables = 1, []
+        for step in self._steps:
+            shift = step
+            while shift <= limit:
+                reachable = (reachable | (reachable << shift)) & mask
+                shift *= 2
+            tables.append(reachable)
+        self._reachable, self._limit = tables, limit
+
+    def _breakdown(self, quantity):
+        quantity = _to_quantity(quantity)
+        if quantity < self.prices[0]:
+            raise ValueError("quantity must be at least the lowest price")
+        scaled = quantity * self._scale
+        if scaled != scaled.to_integral_value():
+            raise ValueError(f"quantity {quantity} cannot be split into units of {self._describe()}")
+        remainder = int(scaled)
+        if len(self._steps) == 2:
+            units = self._two_tier_split(remainder)
+            if units is None:
+                raise ValueError(f"quantity {quantity} cannot be split into units of {self._describe()}")
+            return self._lines(units)
+        if quantity > self.max_quantity:
+            raise ValueError(
+                f"quantity {quantity} is above the maximum of {self.max_quantity} "
+                f"for {len(self.prices)} price tiers"
+            )
+        with self._lock:
+            if remainder > self._limit:
+                self._grow(remainder)
+            reachable = self._reachable
+        if not reachable[-1] >> remainder & 1:
+            raise ValueError(f"quantity {quantity} cannot be split into units of {self._describe()}")
+
+        units = [0] * len(self._steps)
+        for tier in range(len(self._steps) - 1, 0, -1):
+            step = self._steps[tier]
+            while not reachable[tier - 1] >> (remainder - units[tier] * step) & 1:
+                units[tier] += 1
+            remainder -= units[tier] * step
+        units[0] = remainder // self._steps[0]
+        return self._lines(units)
+
+    def _lines(self, units):
+        return tuple(
+            (count, price, count * price)
+            for count, price in zip(units, self.prices) if count
+        )
+
+    def _two_tier_split(self, amount):
+        cheap, expensive = self._steps
+        divisor = math.gcd(cheap, expensive)
+        if amount % divisor:
+            return None
+        modulus = cheap // divisor
+        inverse = pow(expensive // divisor, -1, modulus) if modulus > 1 else 0
+        expensive_units = (amount // divisor % modulus) * inverse % modulus
+        cheap_units = (amount - expensive_units * expensive) // cheap
+        if cheap_units < 0:
+            return None
+        return [cheap_units, expensive_units]
+
+    def _describe(self):
+        return ', '.join(str(price) for price in self.prices)
+
+    def calculate_lines(self, quantity):
+        """
+        Returns the breakdown of `quantity` as a list of
+        {'units', 'price', 'subtotal'} dicts, cheapest tier first.
+        """
+        return [
+            {'units': units, 'price': price, 'subtotal': subtotal}
+            for units, price, subtotal in self.breakdown(_to_quantity(quantity))
+        ]
+
+    def calculate_lines_batch(self, quantities):
+        """
+        Splits every quantity in `quantities` at once.
+
+        Returns a LineBatch whose `units` and `subtotals` arrays have one
+        row per quantity and one column per tier in `prices` order.
+        Subtotals are int64 when all prices are whole, float64 otherwise.
+        With two tiers the split is solved in closed form for the whole
+        array; with more, each distinct quantity goes through breakdown.
+
+        Raises:
+            LineCalculationError: If any quantity cannot be split, listing
+                every offending row.
+        """
+        quantities = np.asarray(quantities, dtype=np.float64).reshape(-1)
+        scaled = np.rint(quantities * self._scale)
+        errors = {}
+        whole = np.abs(scaled - quantities * self._scale) < 1e-6
+        too_small = quantities < float(self.prices[0])
+        for row in np.flatnonzero(too_small):
+            errors[int(row)] = "quantity must be at least the lowest price"
+        scaled = np.where(whole & ~too_small, scaled, 0).astype(np.int64)
+
+        if len(self._steps) == 2:
+            units = self._two_tier_units(scaled)
+        else:
+            values, inverse = np.unique(scaled, return_inverse=True)
+            table = np.zeros((len(values), len(self._steps)), dtype=np.int64)
+            for position, value in enumerate(values):
+                try:
+                    table[position] = self._tier_units(self.breakdown(Decimal(int(value)) / self._scale))
+                except ValueError:
+                    continue
+            units = table[inverse.reshape(-1)]
+        splittable = whole & ((units * np.asarray(self._steps, dtype=np.int64)).sum(axis=1) == scaled)
+        for row in np.flatnonzero(~splittable & ~too_small):
+            errors[int(row)] = (
+                f"quantity {quantities[row]:g} cannot be split into units of {self._describe()}"
+            )
+        if errors:
+            raise LineCalculationError(dict(sorted(errors.items())))
+
+        whole_prices = self._scale == 1
+        prices = np.asarray(
+            [int(price) if whole_prices else float(price) for price in self.prices],
+            dtype=np.int64 if whole_prices else np.float64
+        )
+        return LineBatch(prices, units, units * prices)
+
+    def _tier_units(self, breakdown):
+        counts = dict((price, units) for units, price, _ in breakdown)
+        return [counts.get(price, 0) for price in self.prices]
+
+    def _two_tier_units(self, scaled):
+        cheap, expensive = self._steps
+        divisor = math.gcd(cheap, expensive)
+        modulus = cheap // divisor
+        inverse = pow(expensive // divisor, -1, modulus) if modulus > 1 else 0
+        expensive_units = (scaled // divisor % modulus) * inverse % modulus
+        cheap_units = (scaled - expensive_units * expensive) // cheap
+        valid = (scaled % divisor == 0) & (cheap_units >= 0)
+        return np.where(
+            valid[:, None], np.stack([cheap_units, expensive_units], axis=1), 0
+        ).astype(np.int64)
+
+
+@lru_cache(maxsize=None)
+def get_engine(prices=None) -> PriceTierEngine:
+    """
+    Returns the shared engine for `prices`, by default the tiers set in
+    the PRICE_TIERS setting.
+    """
+    return PriceTierEngine(
+        prices or config.get_price_tiers(), max_quantity=config.get_price_max_quantity()
+    )
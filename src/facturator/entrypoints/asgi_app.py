@@ -0,0 +1,6 @@
+from facturator.adapters.database import get_sqlalchemy_session
+from facturator.service_layer.unit_of_work import SqlAlchemyUnitOfWork
+from facturator.entrypoints.resources.graphql.asgi_api import create_gql_asgi_app
+
+# Served by uvicorn: `uvicorn facturator.entrypoints.asgi_app:app`
+app = create_gql_asgi_app(uow_factory=lambda: SqlAlchemyUnitOfWork(get_sqlalchemy_session))
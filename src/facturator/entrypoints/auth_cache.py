@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from facturator import config
+from facturator.domain.model import User
+
+
+class LRUCache:
+    """Thread-safe mapping keeping the `max_size` most recently used keys."""
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class ExpiringCache(LRUCache):
+    """
+    LRUCache whose entries are dropped `ttl` seconds after being put, or
+    at the `expires_at` timestamp given to put if that comes first.
+    """
+    def __init__(self, max_size, ttl):
+        super().__init__(max_size)
+        self.ttl = ttl
+
+    def get(self, key):
+        entry = super().get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() >= expires_at:
+            self.invalidate(key)
+            return None
+        return value
+
+    def put(self, key, value, expires_at=None):
+        ttl_expiry = time.time() + self.ttl
+        expires_at = ttl_expiry if expires_at is None else min(ttl_expiry, expires_at)
+        super().put(key, (value, expires_at))
+
+
+class TokenCache(ExpiringCache):
+    """
+    Payloads of JWTs whose signature has been verified, so that a token
+    is only decoded again after `ttl` seconds. An entry never outlives
+    the `exp` claim of its token.
+    """
+    def put(self, token, payload, expires_at=None):
+        if 'exp' in payload:
+            expires_at = payload['exp'] if expires_at is None else min(expires_at, payload['exp'])
+        super().put(token, payload, expires_at)
+
+
+def snapshot(user: User) -> User:
+    """Detached copy of `user`, without the password hash, safe to share."""
+    return User(
+        username=user.username,
+        public_id=user.public_id,
+        nif=user.nif,
+        address=user.address,
+        zip_code=user.zip_code,
+        city=user.city,
+        province=user.province,
+        email=user.email,
+        password=None
+    )
+
+
+token_cache = TokenCache(config.get_auth_token_cache_size(), config.get_auth_token_cache_ttl())
+# Commits in other processes and bulk query updates do not reach the
+# listeners below, the TTL bounds how long such changes go unnoticed
+user_cache = ExpiringCache(config.get_auth_user_cache_size(), config.get_auth_user_cache_ttl())
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, _flush_context):
+    changed = session.info.setdefault('changed_user_ids', set())
+    for instance in chain(session.new, session.dirty, session.deleted):
+        if isinstance(instance, User):
+            changed.add(instance.public_id)
+            changed.update(inspect(instance).attrs.public_id.history.deleted or ())
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for public_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(public_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,36 @@
+import click
+
+from facturator.service_layer import handlers
+from facturator.service_layer.invoice_generator import pdf_batch
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue
+from facturator.service_layer.unit_of_work import AbstractUnitOfWork
+
+
+def create_render_invoices_command(uow: AbstractUnitOfWork, pdf_queue: PdfJobQueue = None):
+    @click.command('render-invoices')
+    @click.argument('numbers', nargs=-1)
+    @click.option('--prefix', help='Render every invoice whose number starts with this prefix.')
+    @click.option('--merge', is_flag=True, help='Write a single merged PDF instead of a ZIP.')
+    @click.option('-o', '--output', required=True, type=click.Path(dir_okay=False, writable=True))
+    def render_invoices(numbers, prefix, merge, output):
+        """Renders the invoices NUMBERS, or those matching --prefix, into OUTPUT."""
+        if bool(numbers) == bool(prefix):
+            raise click.UsageError('Give either invoice numbers or --prefix')
+        contexts, errors = handlers.get_orders_contexts(
+            uow=uow, order_numbers=list(numbers) or None, prefix=prefix
+        )
+        for number, error in errors.items():
+            click.echo(f'Skipping invoice {number}: {error}', err=True)
+        if not contexts:
+            raise click.ClickException('No orders found for the given numbers')
+
+        queue = pdf_queue or PdfJobQueue()
+        with open(output, 'wb') as output_file:
+            if merge:
+                output_file.write(queue.render_merged_pdf(contexts))
+            else:
+                for chunk in pdf_batch.stream_zip(queue.render_many(contexts), errors=errors):
+                    output_file.write(chunk)
+        click.echo(f'Rendered {len(contexts)} invoices into {output}')
+
+    return render_invoices
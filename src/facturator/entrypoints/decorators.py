@@ -1,35 +1,104 @@
 from functools import wraps
-from flask import request, make_response, jsonify
+from flask import request, make_response, jsonify, Response
 import jwt
-from datetime import datetime
 
 from facturator import config
-from facturator.domain.model import User
+from facturator.domain.model import User, VersionConflict
+from facturator.entrypoints.auth_cache import snapshot, token_cache, user_cache
 
 
-def token_required(session):
+def token_required(session_factory):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             token = request.cookies.get('token')
             if not token:
                 return make_response(jsonify({"message": "A valid token is missing!"}), 401)
-            try:
-                data = jwt.decode(token, config.get_app_secret_key(), algorithms=['HS256'])
-                current_user = session.query(User).filter_by(public_id=data['public_id']).first()
-                if not current_user:
+            data = token_cache.get(token)
+            if data is None:
+                try:
+                    data = jwt.decode(token, config.get_app_secret_key(), algorithms=['HS256'])
+                except jwt.ExpiredSignatureError:
+                    return make_response(jsonify({"message": "Token has expired!"}), 401)
+                except jwt.InvalidTokenError:
                     return make_response(jsonify({"message": "Invalid token!"}), 401)
-                
-                if 'exp' in data:
-                      current_time = datetime.utcnow()
-                      if current_time > datetime.fromtimestamp(data['exp']):
-                          return make_response(jsonify({"message": "Token has expired!"}), 401)
-                      
-            except jwt.ExpiredSignatureError:
-                return make_response(jsonify({"message": "Token has expired!"}), 401)          
-            except jwt.InvalidTokenError:
-                return make_response(jsonify({"message": "Invalid token!"}), 401)
+                token_cache.put(token, data)
+
+            current_user = user_cache.get(data.get('public_id'))
+            if current_user is None:
+                with session_factory() as session:
+                    user = session.query(User).filter_by(public_id=data.get('public_id')).first()
+                    if not user:
+                        return make_response(jsonify({"message": "Invalid token!"}), 401)
+                    current_user = snapshot(user)
+                user_cache.put(current_user.public_id, current_user)
 
             return f(current_user, *args, **kwargs)
         return wrapper
     return decorator
+
+
+def cached_response(*tables):
+    """
+    Caches the successful responses of a read-only resource method in the
+    ResponseCache, keyed by path and query string and tagged with the
+    `tables` it reads, and answers conditional GETs with 304 when the
+    client's If-None-Match holds the ETag of the current response.
+
+    The ETag is the one set by the method, such as an item version, or
+    else a hash of the body. The cache is the one of the resource's
+    unit of work, which the command handlers invalidate.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(resource, *args, **kwargs):
+            cache = resource.uow.response_cache
+            key = request.full_path
+            cached = cache.get(key)
+            if cached is None:
+                generation = cache.generation(tables)
+                result = f(resource, *args, **kwargs)
+                if not isinstance(result, Response) or result.status_code != 200:
+                    return result
+                cached = cache.put(
+                    key, result.get_data(), result.mimetype, tables, generation,
+                    etag=result.get_etag()[0]
+                )
+
+            response = Response(cached.body, mimetype=cached.mimetype)
+            response.set_etag(cached.etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def if_match_version(f):
+    """
+    Passes the item version held by the If-Match header of the request,
+    if any, to the resource method as `expected_version`, and turns a
+    VersionConflict into 412 Precondition Failed, or into 409 Conflict
+    when the request had no If-Match.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        expected_version = None
+        if request.if_match and not request.if_match.star_tag:
+            etags = request.if_match.as_set()
+            if len(etags) != 1 or not next(iter(etags)).isdigit():
+                return make_response(jsonify({"message": "If-Match must hold one item version"}), 412)
+            expected_version = int(next(iter(etags)))
+        try:
+            return f(*args, expected_version=expected_version, **kwargs)
+        except VersionConflict as e:
+            status = 412 if request.if_match else 409
+            return make_response(jsonify({"message": str(e)}), status)
+    return wrapper
+
+
+def item_response(response_data, status=200):
+    """JSON response for a versioned item, with its version as ETag."""
+    response = make_response(jsonify(response_data.model_dump()), status)
+    if getattr(response_data, 'version', None) is not None:
+        response.set_etag(str(response_data.version))
+    return response
@@ -4,6 +4,7 @@ from flask_cors import CORS
 from facturator.adapters.database import get_sqlalchemy_session
 from facturator.service_layer.unit_of_work import SqlAlchemyUnitOfWork
 from facturator.entrypoints.resources.rest_api.api import create_api_blueprint
+from facturator.entrypoints.cli import create_render_invoices_command
 from facturator.entrypoints.resources.auth.auth_routes import auth_bp
 from facturator.entrypoints.resources.rest_api.swagger import create_swagger_blueprint
 from facturator.entrypoints.resources.graphql.graphql_api import create_gql_api_blueprint
@@ -24,5 +25,7 @@ app.register_blueprint(swagger_bp)
 graphql_api_bp = create_gql_api_blueprint(uow=uow)
 app.register_blueprint(graphql_api_bp)
 
+app.cli.add_command(create_render_invoices_command(uow=uow))
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=8080, debug=True)
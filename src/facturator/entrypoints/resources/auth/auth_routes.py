@@ -3,7 +3,6 @@ import uuid
 from datetime import datetime, timedelta
 
 from flask import Blueprint, request, jsonify, make_response
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 from pydantic import ValidationError
 
@@ -11,21 +10,36 @@ from facturator import config
 from facturator.adapters.database import get_sqlalchemy_session
 from facturator.domain import model
 from facturator.entrypoints import schemas, decorators
+from facturator.service_layer.passwords import HashingBusyError, get_password_hasher
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def too_many_logins():
+    return make_response(
+        jsonify({'message': 'Too many sign ups or logins in progress, retry later'}),
+        429,
+        {'Retry-After': '1'}
+    )
+
+
 @auth_bp.route('/signup', methods=['POST'])
 def signup_user():
     try:
         signup_data = schemas.SignUp(**request.json)
     except ValidationError:
         return {'error': 'Invalid Signup data'}, 400
-    session = get_sqlalchemy_session()
-    hashed_password = generate_password_hash(signup_data.password, method='pbkdf2:sha256')
+    with get_sqlalchemy_session() as session:
+        user = session.query(model.User).filter_by(username=signup_data.username).first()
+    if user:
+        return jsonify({"message": "User already exists!"}), 409
 
-    user = session.query(model.User).filter_by(username=signup_data.username).first()
-    if not user:
+    try:
+        hashed_password = get_password_hasher().hash(signup_data.password)
+    except HashingBusyError:
+        return too_many_logins()
+
+    with get_sqlalchemy_session() as session:
         new_user = model.User(
             public_id=str(uuid.uuid4()),
             username=signup_data.username,
@@ -40,9 +54,7 @@ def signup_user():
         session.add(new_user)
         session.commit()
 
-        return jsonify({'message': 'registered successfully'}), 201
-
-    return jsonify({"message": "User already exists!"}), 409
+    return jsonify({'message': 'registered successfully'}), 201
 
 
 @auth_bp.route('/login', methods=['POST'])
@@ -52,23 +64,48 @@ def login():
     except ValidationError:
         return {'error': 'Invalid LogIn data'}, 400
 
-    session = get_sqlalchemy_session()
-    user = session.query(model.User).filter_by(username=login_data.username).first()
+    with get_sqlalchemy_session() as session:
+        user = session.query(model.User).filter_by(username=login_data.username).first()
     if not user:
         return make_response('Could not verify user!', 401, {'WWW-Authenticate': 'Basic realm="No user found!"'})
 
-    if check_password_hash(user.password, login_data.password):
-        token = jwt.encode(
-            {
-                'public_id': user.public_id,
-                'exp': datetime.utcnow() + timedelta(minutes=30)
-            },
-            config.get_app_secret_key(),
-            'HS256'
-        )
-        response = make_response(jsonify({'message': 'Login successful'}), 201)
-        response.set_cookie('token', token, httponly=True, secure=True, samesite='Strict')
-        return response
+    password_hasher = get_password_hasher()
+    try:
+        if not password_hasher.verify(user.password, login_data.password):
+            return make_response('Could not verify user!', 401, {'WWW-Authenticate': 'Basic realm="Wrong password!"'})
+    except HashingBusyError:
+        return too_many_logins()
+
+    if password_hasher.needs_rehash(user.password):
+        rehash_password(user.id, login_data.password)
+
+    token = jwt.encode(
+        {
+            'public_id': user.public_id,
+            'exp': datetime.utcnow() + timedelta(minutes=30)
+        },
+        config.get_app_secret_key(),
+        'HS256'
+    )
+    response = make_response(jsonify({'message': 'Login successful'}), 201)
+    response.set_cookie('token', token, httponly=True, secure=True, samesite='Strict')
+    return response
+
+
+def rehash_password(user_id, password):
+    """
+    Stores the password again with the current hashing method. Skipped
+    when the hasher is busy: it is retried on the next login.
+    """
+    try:
+        password_hash = get_password_hasher().hash(password)
+    except HashingBusyError:
+        return
+    with get_sqlalchemy_session() as session:
+        user = session.get(model.User, user_id)
+        if user:
+            user.password = password_hash
+            session.commit()
 
 
 @auth_bp.route('/logout', methods=['POST'])
@@ -79,6 +116,6 @@ def logout():
 
 
 @auth_bp.route('/protected', methods=['GET'])
-@decorators.token_required(session=get_sqlalchemy_session())
+@decorators.token_required(session_factory=get_sqlalchemy_session)
 def protected_resource(current_user):
     return make_response(f'Hello {current_user.username}', 200)
@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from ariadne import make_executable_schema
+from ariadne.asgi import GraphQL
+from ariadne.asgi.handlers import GraphQLHTTPHandler
+from ariadne.exceptions import HttpBadRequestError
+from graphql import GraphQLError
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+from facturator import config
+from facturator.service_layer import handlers
+from .dataloaders import AsyncDataLoader
+from .persisted_queries import PersistedQueryCache, PersistedQueryNotFound, data_from_query_params
+from .query_cost import QueryCostExtension, TableSizes, query_cost_validation_rules
+from .resolvers import invoice_order_type, mutation, query, type_defs
+
+
+def run_in_executor(resolver, uow_factory, executor):
+    """
+    Wraps a blocking root field resolver into a coroutine that runs it in
+    `executor`. Sibling root fields run at the same time, and a unit of
+    work holds a single session, so each call gets a unit of work of its
+    own from `uow_factory`.
+    """
+    async def resolve(root, info, **kwargs):
+        info = info._replace(context={**info.context, "uow": uow_factory()})
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(resolver, root, info, **kwargs)
+        )
+    return resolve
+
+
+def make_async_schema(uow_factory, executor):
+    """
+    Builds the GraphQL schema with every Query and Mutation field resolved
+    in `executor`, so that ariadne's async `graphql` resolves independent
+    root fields of a query concurrently. Mutation fields still run one
+    after the other, as the spec requires.
+    """
+    schema = make_executable_schema(type_defs, query, mutation, invoice_order_type)
+    for root_type in (schema.query_type, schema.mutation_type):
+        for field in root_type.fields.values():
+            if field.resolve is not None:
+                field.resolve = run_in_executor(field.resolve, uow_factory, executor)
+    return schema
+
+
+class PersistedQueryHTTPHandler(GraphQLHTTPHandler):
+    """
+    GraphQLHTTPHandler resolving queries through a PersistedQueryCache,
+    and executing GET requests that carry a query or a persisted query
+    hash instead of rendering the explorer.
+    """
+    def __init__(self, persisted_queries, **kwargs):
+        super().__init__(**kwargs)
+        self.persisted_queries = persisted_queries
+
+    async def handle_request(self, request):
+        if request.method == "GET" and (
+            "query" in request.query_params or "extensions" in request.query_params
+        ):
+            return await self.graphql_http_server(request)
+        return await super().handle_request(request)
+
+    async def extract_data_from_request(self, request):
+        if request.method == "GET":
+            try:
+                return data_from_query_params(request.query_params)
+            except GraphQLError as error:
+                raise HttpBadRequestError(error.message) from error
+        return await super().extract_data_from_request(request)
+
+    async def execute_graphql_query(self, request, data, *, context_value=None, query_document=None):
+        try:
+            data, query_document = self.persisted_queries.resolve(data)
+        except GraphQLError as error:
+            return isinstance(error, PersistedQueryNotFound), {"errors": [error.formatted]}
+        return await super().execute_graphql_query(
+            request, data, context_value=context_value, query_document=query_document
+        )
+
+
+def create_gql_asgi_app(uow_factory, executor=None):
+    """
+    Starlette app serving the GraphQL API on /graphql.
+
+    Args:
+        uow_factory: Callable returning a new unit of work.
+        executor: Executor for the blocking resolvers. Defaults to a
+            thread pool of GRAPHQL_THREADS threads.
+    """
+    executor = executor or ThreadPoolExecutor(
+        max_workers=config.get_graphql_threads(), thread_name_prefix="graphql"
+    )
+
+    table_sizes = TableSizes(lambda: handlers.get_table_sizes(uow_factory()))
+
+    async def get_context_value(request, _data):
+        return {
+            "request": request,
+            "table_sizes": await asyncio.get_running_loop().run_in_executor(
+                executor, table_sizes.get
+            ),
+            "payer_loader": AsyncDataLoader(
+                lambda payer_ids: handlers.get_payers_by_ids(uow_factory(), payer_ids), executor
+            ),
+        }
+
+    schema = make_async_schema(uow_factory, executor)
+    persisted_queries = PersistedQueryCache(schema)
+    graphql_app = GraphQL(
+        schema,
+        context_value=get_context_value,
+        query_validator=persisted_queries.validate,
+        validation_rules=query_cost_validation_rules,
+        http_handler=PersistedQueryHTTPHandler(persisted_queries, extensions=[QueryCostExtension]),
+        debug=True
+    )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        yield
+        executor.shutdown(wait=False)
+
+    return Starlette(
+        routes=[Route("/graphql", graphql_app, methods=["GET", "POST"])],
+        lifespan=lifespan
+    )
@@ -0,0 +1,90 @@
+import asyncio
+
+
+class DataLoader:
+    """
+    Per-request cache that batches lookups by key.
+
+    graphql_sync resolves fields one after the other, so loads cannot be
+    gathered while they are awaited. Instead, resolvers that return a
+    list of objects `enqueue` the keys their children may ask for, and
+    the first `load` fetches every queued key with a single call to
+    `batch_load`. Nothing is fetched if no child field asks for a key.
+
+    Args:
+        batch_load: Function taking a list of keys and returning the
+            values for them in the same order.
+    """
+    def __init__(self, batch_load):
+        self.batch_load = batch_load
+        self._cache = {}
+        self._queue = []
+
+    def enqueue(self, keys):
+        self._queue.extend(
+            key for key in keys if key is not None and key not in self._cache
+        )
+
+    def load(self, key):
+        if key not in self._cache:
+            keys = [
+                queued for queued in dict.fromkeys(self._queue + [key])
+                if queued not in self._cache
+            ]
+            self._queue = []
+            self._cache.update(zip(keys, self.batch_load(keys)))
+        return self._cache[key]
+
+
+class AsyncDataLoader:
+    """
+    Per-request cache that batches lookups by key, for the async
+    executor.
+
+    `load` returns a future. Every key loaded while the event loop runs
+    the current round of resolvers is fetched with a single call to
+    `batch_load` in `executor`, so the event loop never blocks on the
+    database. Since loads are gathered as they come, `enqueue` has
+    nothing to do; it is kept so resolvers work with both loaders.
+
+    Args:
+        batch_load: Function taking a list of keys and returning the
+            values for them in the same order.
+        executor: Executor to run `batch_load` in.
+    """
+    def __init__(self, batch_load, executor):
+        self.batch_load = batch_load
+        self.executor = executor
+        self._cache = {}
+        self._batch = None
+        self._dispatches = set()
+
+    def enqueue(self, keys):
+        pass
+
+    def load(self, key):
+        if key not in self._cache:
+            loop = asyncio.get_running_loop()
+            if self._batch is None:
+                self._batch = {}
+                loop.call_soon(self._start_dispatch)
+            self._cache[key] = self._batch[key] = loop.create_future()
+        return self._cache[key]
+
+    def _start_dispatch(self):
+        task = asyncio.get_running_loop().create_task(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self):
+        batch, self._batch = self._batch, None
+        try:
+            values = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.batch_load, list(batch)
+            )
+        except Exception as error:
+            for future in batch.values():
+                future.set_exception(error)
+            return
+        for future, value in zip(batch.values(), values):
+            future.set_result(value)
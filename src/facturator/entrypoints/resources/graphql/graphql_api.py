@@ -1,29 +1,63 @@
 from flask import Blueprint, jsonify, request
 from ariadne import graphql_sync
+from graphql import GraphQLError
+from facturator.service_layer import handlers
 from facturator.service_layer.unit_of_work import AbstractUnitOfWork
+from .dataloaders import DataLoader
+from .persisted_queries import PersistedQueryCache, PersistedQueryNotFound, data_from_query_params
+from .query_cost import QueryCostExtension, TableSizes, query_cost_validation_rules
 from .resolvers import explorer_html, schema
 
 def create_gql_api_blueprint(uow: AbstractUnitOfWork):
     graphql_bp = Blueprint('graphql_bp', __name__)
+    persisted_queries = PersistedQueryCache(schema)
+    table_sizes = TableSizes(lambda: handlers.get_table_sizes(uow))
 
 
-    @graphql_bp.route("/graphql", methods=["GET"])
-    def graphql_explorer():
-        return explorer_html, 200
-
-
-    @graphql_bp.route("/graphql", methods=["POST"])
-    def graphql_server():
-        data = request.get_json()
+    def execute(data, require_query=False):
+        try:
+            data, document = persisted_queries.resolve(data)
+        except PersistedQueryNotFound as error:
+            return jsonify({"errors": [error.formatted]}), 200
+        except GraphQLError as error:
+            return jsonify({"errors": [error.formatted]}), 400
 
         success, result = graphql_sync(
             schema,
             data,
-            context_value={"request": request, "uow": uow},
+            context_value={
+                "request": request,
+                "uow": uow,
+                "table_sizes": table_sizes.get(),
+                "payer_loader": DataLoader(
+                    lambda payer_ids: handlers.get_payers_by_ids(uow, payer_ids)
+                ),
+            },
+            query_document=document,
+            query_validator=persisted_queries.validate,
+            validation_rules=query_cost_validation_rules,
+            extensions=[QueryCostExtension],
+            require_query=require_query,
             debug=True
         )
 
         status_code = 200 if success else 400
         return jsonify(result), status_code
+
+
+    @graphql_bp.route("/graphql", methods=["GET"])
+    def graphql_explorer():
+        if "query" not in request.args and "extensions" not in request.args:
+            return explorer_html, 200
+        try:
+            data = data_from_query_params(request.args)
+        except GraphQLError as error:
+            return jsonify({"errors": [error.formatted]}), 400
+        return execute(data, require_query=True)
+
+
+    @graphql_bp.route("/graphql", methods=["POST"])
+    def graphql_server():
+        return execute(request.get_json())
     
     return graphql_bp
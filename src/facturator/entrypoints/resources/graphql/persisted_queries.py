@@ -0,0 +1,136 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from graphql import GraphQLError, parse, specified_rules, validate
+
+from facturator import config
+
+
+CachedDocument = namedtuple('CachedDocument', ['query', 'document'])
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+class PersistedQueryNotFound(GraphQLError):
+    def __init__(self):
+        super().__init__('PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+
+
+def data_from_query_params(params):
+    """
+    Builds the GraphQL request data of a GET request from its query
+    string arguments, where `variables` and `extensions` are JSON.
+    """
+    data = {'query': params.get('query'), 'operationName': params.get('operationName') or None}
+    for name in ('variables', 'extensions'):
+        value = params.get(name)
+        try:
+            data[name] = json.loads(value) if value else None
+        except ValueError:
+            raise GraphQLError(f'The {name} argument is not valid JSON') from None
+    return data
+
+
+class PersistedQueryCache:
+    """
+    LRU cache of parsed GraphQL documents that passed the spec validation
+    rules against `schema`, keyed by the SHA-256 hash of the query text.
+
+    It implements Automatic Persisted Queries: a client may send only
+    `extensions.persistedQuery.sha256Hash` and, if the hash is unknown,
+    gets a PersistedQueryNotFound error and retries with the full query,
+    which is then cached under that hash. Plain queries are cached by
+    their hash as well.
+
+    Pass `resolve` the request data before executing it, and `validate`
+    as ariadne's `query_validator`: for cached documents it only runs the
+    custom rules, such as the query cost, which depend on the variables.
+
+    Args:
+        schema: GraphQLSchema the documents are validated against.
+        max_size: Number of documents kept. Defaults to the
+            GRAPHQL_DOCUMENT_CACHE_SIZE setting.
+    """
+    def __init__(self, schema, max_size=None):
+        self.schema = schema
+        self.max_size = max_size or config.get_graphql_document_cache_size()
+        self._documents = OrderedDict()
+        self._validated = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def _get(self, key):
+        with self._lock:
+            cached = self._documents.get(key)
+            if cached is not None:
+                self._documents.move_to_end(key)
+            return cached
+
+    def _put(self, key, query, document):
+        cached = CachedDocument(query, document)
+        with self._lock:
+            if key in self._documents:
+                return self._documents[key]
+            self._documents[key] = cached
+            self._validated[id(document)] = document
+            while len(self._documents) > self.max_size:
+                _, evicted = self._documents.popitem(last=False)
+                del self._validated[id(evicted.document)]
+        return cached
+
+    def resolve(self, data):
+        """
+        Returns `(data, document)` for the request `data`: the data with
+        the query text filled in from the cache, and the parsed document,
+        or None when the query has to be parsed and reported by ariadne.
+
+        Raises:
+            PersistedQueryNotFound: If only an unknown hash was sent.
+            GraphQLError: If the persisted query extension is malformed
+                or the hash does not match the query.
+        """
+        if not isinstance(data, dict):
+            return data, None
+        query = data.get('query')
+        persisted = (data.get('extensions') or {}).get('persistedQuery')
+        if persisted is not None:
+            if not isinstance(persisted, dict) or persisted.get('version') != 1:
+                raise GraphQLError('Unsupported persisted query version')
+            key = persisted.get('sha256Hash')
+            if not isinstance(key, str):
+                raise GraphQLError('persistedQuery.sha256Hash must be a string')
+            if query is None:
+                cached = self._get(key)
+                if cached is None:
+                    raise PersistedQueryNotFound()
+                return {**data, 'query': cached.query}, cached.document
+            if isinstance(query, str) and query_hash(query) != key:
+                raise GraphQLError('provided sha does not match query')
+        if not query or not isinstance(query, str):
+            return data, None
+
+        key = query_hash(query)
+        cached = self._get(key)
+        if cached is None:
+            try:
+                document = parse(query)
+            except GraphQLError:
+                return data, None
+            if validate(self.schema, document):
+                return data, document
+            cached = self._put(key, query, document)
+        return data, cached.document
+
+    def validate(self, schema, document, rules=None, max_errors=None, type_info=None):
+        """graphql.validate skipping the spec rules for cached documents."""
+        if self._validated.get(id(document)) is document and schema is self.schema:
+            rules = [rule for rule in rules or () if rule not in specified_rules]
+            if not rules:
+                return []
+        return validate(schema, document, rules, max_errors=max_errors, type_info=type_info)
@@ -0,0 +1,183 @@
+import threading
+import time
+
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+    value_from_ast,
+)
+from graphql.validation import ValidationRule
+from ariadne.types import Extension
+
+from facturator import config
+
+TYPE_TABLES = {'Order': 'orders', 'Payer': 'payers'}
+
+
+class TableSizes:
+    """
+    Row count estimates of the tables, as returned by `count_rows`,
+    fetched again once they are `ttl` seconds old.
+    """
+    def __init__(self, count_rows, ttl=None):
+        self.count_rows = count_rows
+        self.ttl = ttl if ttl is not None else config.get_graphql_table_sizes_ttl()
+        self._sizes = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._sizes is not None and time.monotonic() < self._expires_at:
+                return self._sizes
+        sizes = self.count_rows()
+        with self._lock:
+            self._sizes, self._expires_at = sizes, time.monotonic() + self.ttl
+        return sizes
+
+
+class QueryCostEstimator:
+    """
+    Estimates how many objects an operation may return before running it.
+
+    Every selected object field costs one per object it resolves for.
+    A list field multiplies the count of everything below it by its
+    estimated length: the `first` argument of the paginated field
+    enclosing it (DEFAULT_PAGE_SIZE when omitted). Lists that are not
+    paginated, such as getOrders, may return the whole table, so they
+    count the estimated rows of the table of their items, from
+    `table_sizes`, or MAX_PAGE_SIZE when it is unknown. Scalar fields
+    and introspection fields are free.
+
+    Example:
+        `{ getOrdersPage(first: 10) { edges { node { payer { name } } } } }`
+        costs 1 + 10 + 10 + 10 = 31 and has a depth of 5.
+    """
+    def __init__(self, validation_context, variables=None, table_sizes=None):
+        self.context = validation_context
+        self.variables = variables or {}
+        self.table_sizes = table_sizes or {}
+        self.default_page_size = config.get_default_page_size()
+        self.max_page_size = config.get_max_page_size()
+
+    def estimate(self, operation):
+        """Returns the `(cost, depth)` of an OperationDefinitionNode."""
+        root_type = self.context.schema.get_root_type(operation.operation)
+        if root_type is None:
+            return 0, 0
+        return self._selection_set_cost(root_type, operation.selection_set, 1, 0, None, set())
+
+    def _page_size(self, node, field):
+        argument = next((arg for arg in node.arguments if arg.name.value == 'first'), None)
+        size = None
+        if argument is not None:
+            size = value_from_ast(argument.value, field.args['first'].type, self.variables)
+        if not isinstance(size, int) or size < 1:
+            return self.default_page_size
+        return min(size, self.max_page_size)
+
+    def _list_length(self, field):
+        table = TYPE_TABLES.get(get_named_type(field.type).name)
+        size = self.table_sizes.get(table)
+        if size is None:
+            return self.max_page_size
+        return max(size, 1)
+
+    def _selection_set_cost(self, parent_type, selection_set, count, depth, page_size, fragments):
+        cost, max_depth = 0, depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                selection_cost, selection_depth = self._field_cost(
+                    parent_type, selection, count, depth, page_size, fragments
+                )
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.context.get_fragment(name)
+                    if fragment is None or name in fragments:
+                        continue
+                    spread_fragments = fragments | {name}
+                else:
+                    fragment, spread_fragments = selection, fragments
+                fragment_type = parent_type
+                if fragment.type_condition is not None:
+                    fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+                if fragment_type is None:
+                    continue
+                selection_cost, selection_depth = self._selection_set_cost(
+                    fragment_type, fragment.selection_set, count, depth, page_size, spread_fragments
+                )
+            cost += selection_cost
+            max_depth = max(max_depth, selection_depth)
+        return cost, max_depth
+
+    def _field_cost(self, parent_type, node, count, depth, page_size, fragments):
+        name = node.name.value
+        field = getattr(parent_type, 'fields', {}).get(name)
+        if name.startswith('__') or field is None:
+            return 0, depth
+        if 'first' in field.args:
+            page_size = self._page_size(node, field)
+        if is_list_type(get_nullable_type(field.type)):
+            count *= page_size if page_size is not None else self._list_length(field)
+            page_size = None
+        if node.selection_set is None:
+            return 0, depth + 1
+        children_cost, children_depth = self._selection_set_cost(
+            get_named_type(field.type), node.selection_set, count, depth + 1, page_size, fragments
+        )
+        return count + children_cost, children_depth
+
+
+def query_cost_rule(context_value, variables, max_cost, max_depth, table_sizes=None):
+    """
+    Returns a validation rule rejecting operations whose estimated cost
+    is above `max_cost` or whose depth is above `max_depth`. The cost of
+    the most expensive operation is stored in `context_value['query_cost']`.
+    """
+    class QueryCostRule(ValidationRule):
+        def enter_operation_definition(self, node, *_args):
+            cost, depth = QueryCostEstimator(self.context, variables, table_sizes).estimate(node)
+            context_value['query_cost'] = max(cost, context_value.get('query_cost', 0))
+            if cost > max_cost:
+                self.report_error(GraphQLError(
+                    f"The query cost is {cost}, above the maximum of {max_cost}. "
+                    "Request fewer items per page or fewer nested lists.",
+                    node
+                ))
+            if depth > max_depth:
+                self.report_error(GraphQLError(
+                    f"The query depth is {depth}, above the maximum of {max_depth}.", node
+                ))
+
+    return QueryCostRule
+
+
+def query_cost_validation_rules(context_value, _document, data):
+    """
+    `validation_rules` callable for ariadne, using the configured limits
+    and the table sizes in `context_value['table_sizes']`, if any.
+    """
+    return [query_cost_rule(
+        context_value,
+        data.get('variables'),
+        config.get_graphql_max_cost(),
+        config.get_graphql_max_depth(),
+        context_value.get('table_sizes')
+    )]
+
+
+class QueryCostExtension(Extension):
+    """Reports the estimated cost of the query in the response `extensions`."""
+    def format(self, context):
+        if 'query_cost' not in context:
+            return {}
+        return {'cost': {
+            'requested': context['query_cost'],
+            'maximum': config.get_graphql_max_cost(),
+        }}
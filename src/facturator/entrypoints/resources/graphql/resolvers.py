@@ -3,7 +3,7 @@ from pathlib import Path
 
 from ariadne import QueryType, MutationType, make_executable_schema, ObjectType
 from ariadne.explorer import ExplorerGraphiQL
-from facturator.service_layer import handlers
+from facturator.service_layer import handlers, pagination
 from facturator.entrypoints.resources.graphql.exceptions import ItemNotFoundError
 from facturator.domain import commands
 from facturator.service_layer import messagebus
@@ -13,7 +13,25 @@ query = QueryType()
 mutation = MutationType()
 
 payer_type = ObjectType("Payer")
-invoice_order_type = ObjectType("InvoiceOrder")
+invoice_order_type = ObjectType("Order")
+
+
+def enqueue_payers(info, orders):
+    info.context["payer_loader"].enqueue(order.get("payer_id") for order in orders)
+    return orders
+
+
+def to_connection(items, page_info):
+    return {
+        "edges": [
+            {"cursor": pagination.encode_cursor(item["id"]), "node": item}
+            for item in items
+        ],
+        "pageInfo": {
+            "endCursor": page_info["end_cursor"],
+            "hasNextPage": page_info["has_next_page"]
+        }
+    }
 
 
 @query.field("getPayer")
@@ -30,6 +48,14 @@ def resolve_get_payers(_, info, name=None):
     return payers
 
 
+@query.field("getPayersPage")
+def resolve_get_payers_page(_, info, name=None, first=None, after=None):
+    page = handlers.get_payers_page(
+        uow=info.context["uow"], name=name, limit=first, after=after
+    )
+    return to_connection(page['payers'], page['page_info'])
+
+
 @mutation.field("createPayer")
 def resolve_create_payer(_, info, input):
     payer_id = str(uuid.uuid4())
@@ -54,7 +80,7 @@ def resolve_update_payer(_, info, item_id, input):
             id=item_id,
             **payer_data
         )
-        payer_dict = handlers.update_payer(uow=info.context["uow"], cmd=cmd)
+        payer_dict = messagebus.handle(message=cmd, uow=info.context["uow"])[0]
 
         if payer_dict:
             return payer_dict
@@ -69,7 +95,7 @@ def resolve_update_payer(_, info, item_id, input):
 def resolve_delete_payer(_, info, item_id):
     try:
         cmd = commands.DeletePayer(id=item_id)
-        result = handlers.delete_payer(uow=info.context["uow"], cmd=cmd)
+        result = messagebus.handle(message=cmd, uow=info.context["uow"])[0]
         if result:
             return f"Payer with ID {item_id} deleted successfully"
         
@@ -79,9 +105,16 @@ def resolve_delete_payer(_, info, item_id):
         return f"Error deleting payer: {str(e)}"
 
 
+@invoice_order_type.field("payer")
+def resolve_order_payer(order, info):
+    if not order.get("payer_id"):
+        return None
+    return info.context["payer_loader"].load(order["payer_id"])
+
+
 @query.field("getOrder")
 def resolve_get_order(_, info, item_id):
-    order = handlers.get_order(uow=info.context["uow"], item_id=item_id, recursive=True)
+    order = handlers.get_order(uow=info.context["uow"], item_id=item_id)
     if order:
         return order
     return None
@@ -89,8 +122,19 @@ def resolve_get_order(_, info, item_id):
 
 @query.field("getOrders")
 def resolve_get_orders(_, info, payer_name=None):
-    orders = handlers.get_orders(uow=info.context["uow"], payer_name=payer_name, recursive=True)
-    return orders
+    orders = handlers.get_orders(uow=info.context["uow"], payer_name=payer_name)
+    return enqueue_payers(info, orders)
+
+
+@query.field("getOrdersPage")
+def resolve_get_orders_page(_, info, payer_name=None, first=None, after=None):
+    page = handlers.get_orders_page(
+        uow=info.context["uow"],
+        payer_name=payer_name,
+        limit=first,
+        after=after
+    )
+    return to_connection(enqueue_payers(info, page['orders']), page['page_info'])
 
 
 @mutation.field("createOrder")
@@ -103,7 +147,7 @@ def resolve_create_order(_, info, input):
         quantity=input.get('quantity'),
         number=input.get('number')
     )
-    order = handlers.add_order(cmd=cmd, uow=info.context["uow"], recursive=True)
+    order = messagebus.handle(message=cmd, uow=info.context["uow"])[0]
     return order
 
 
@@ -115,9 +159,7 @@ def resolve_update_order(_, info, item_id, input):
             id=item_id,
             **order_data
         )
-        order_dict = handlers.update_order(
-            uow=info.context["uow"], cmd=cmd, recursive=True
-        )
+        order_dict = messagebus.handle(message=cmd, uow=info.context["uow"])[0]
 
         if order_dict:
             return order_dict
@@ -132,7 +174,7 @@ def resolve_update_order(_, info, item_id, input):
 def resolve_delete_order(_, info, item_id):
     try:
         cmd = commands.DeleteOrder(id=item_id)
-        result = handlers.delete_order(uow=info.context["uow"], cmd=cmd)
+        result = messagebus.handle(message=cmd, uow=info.context["uow"])[0]
         if result:
             return f"Order with ID {item_id} deleted successfully"
         
@@ -142,9 +184,30 @@ def resolve_delete_order(_, info, item_id):
         return f"Error deleting order: {str(e)}"
 
 
+@query.field("getChanges")
+def resolve_get_changes(_, info, first=None, after=None):
+    page = handlers.get_changes(uow=info.context["uow"], since=after, limit=first)
+    changes = [
+        {
+            **change,
+            "order": change["data"] if change["entity"] == "order" else None,
+            "payer": change["data"] if change["entity"] == "payer" else None
+        }
+        for change in page["changes"]
+    ]
+    enqueue_payers(info, [change["order"] for change in changes if change["order"]])
+    return {
+        "changes": changes,
+        "pageInfo": {
+            "endCursor": page["page_info"]["end_cursor"],
+            "hasNextPage": page["page_info"]["has_next_page"]
+        }
+    }
+
+
 schema_path = Path(__file__).parent / "schema.graphql"
 type_defs = schema_path.read_text(encoding='utf-8')
 
-schema = make_executable_schema(type_defs, query, mutation)
+schema = make_executable_schema(type_defs, query, mutation, invoice_order_type)
 
 explorer_html = ExplorerGraphiQL().html(None)
@@ -1,12 +1,19 @@
 from flask import Blueprint
 from flask_restful import Api
+
+from facturator import config
 from facturator.entrypoints.resources.rest_api.payer_routes import Payer, Payers
 from facturator.entrypoints.resources.rest_api.order_routes import Order, Orders, OrdersFile
-from facturator.entrypoints.resources.rest_api.invoices_routes import Invoices, Pdf
+from facturator.entrypoints.resources.rest_api.invoices_routes import Invoices, Pdf, PdfJobs, PdfJob, PdfJobFile, PdfBatch
+from facturator.entrypoints.resources.rest_api.metrics_routes import DbPool
+from facturator.entrypoints.resources.rest_api.versions_routes import DataVersions
+from facturator.entrypoints.resources.rest_api.changes_routes import Changes
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue
 from facturator.service_layer.unit_of_work import AbstractUnitOfWork
 
 
-def create_api_blueprint(uow: AbstractUnitOfWork):
+def create_api_blueprint(uow: AbstractUnitOfWork, pdf_queue: PdfJobQueue = None):
+    pdf_queue = pdf_queue or PdfJobQueue(cache=uow.pdf_cache, jobs_dir=config.get_pdf_jobs_dir())
     api_bp = Blueprint('rest_api', __name__)
     api = Api(api_bp)
 
@@ -16,6 +23,13 @@ def create_api_blueprint(uow: AbstractUnitOfWork):
     api.add_resource(Orders, '/orders', resource_class_kwargs={'uow': uow})
     api.add_resource(OrdersFile, '/orders/file', resource_class_kwargs={'uow': uow})
     api.add_resource(Invoices, '/invoices', resource_class_kwargs={'uow': uow})
-    api.add_resource(Pdf, '/pdfs', resource_class_kwargs={'uow': uow})
+    api.add_resource(Pdf, '/pdfs', resource_class_kwargs={'uow': uow, 'pdf_queue': pdf_queue})
+    api.add_resource(PdfBatch, '/pdfs/batch', resource_class_kwargs={'uow': uow, 'pdf_queue': pdf_queue})
+    api.add_resource(PdfJobs, '/pdfs/jobs', resource_class_kwargs={'uow': uow, 'pdf_queue': pdf_queue})
+    api.add_resource(PdfJob, '/pdfs/jobs/<job_id>', resource_class_kwargs={'pdf_queue': pdf_queue})
+    api.add_resource(PdfJobFile, '/pdfs/jobs/<job_id>/file', resource_class_kwargs={'pdf_queue': pdf_queue})
+    api.add_resource(DataVersions, '/versions', resource_class_kwargs={'uow': uow})
+    api.add_resource(Changes, '/changes', resource_class_kwargs={'uow': uow})
+    api.add_resource(DbPool, '/metrics/db-pool')
 
     return api_bp
@@ -0,0 +1,24 @@
+from flask import request, jsonify, make_response
+from flask_restful import Resource
+from pydantic import ValidationError
+
+from facturator.entrypoints import schemas
+from facturator.service_layer import handlers
+from facturator.service_layer.unit_of_work import AbstractUnitOfWork
+
+
+class Changes(Resource):
+    def __init__(self, uow: AbstractUnitOfWork):
+        self.uow = uow
+
+    def get(self):
+        try:
+            change_query = schemas.ChangeQuery(**request.args.to_dict())
+            page = handlers.get_changes(
+                uow=self.uow, since=change_query.since, limit=change_query.limit
+            )
+        except (ValidationError, ValueError) as e:
+            return {'error': str(e)}, 400
+
+        response_data = schemas.ChangeListResponse(**page)
+        return make_response(jsonify(response_data.model_dump(mode='json')), 200)
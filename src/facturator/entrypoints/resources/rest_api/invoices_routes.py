@@ -1,11 +1,16 @@
-import os
-from pathlib import Path
+import concurrent.futures
+import io
 
-from flask import request, jsonify, after_this_request, send_file
+from flask import request, jsonify, make_response, abort, send_file, url_for, Response
 from flask_restful import Resource
+from pydantic import ValidationError
 
+from facturator import config
+from facturator.entrypoints import schemas
+from facturator.entrypoints.decorators import cached_response
 from facturator.service_layer import handlers
-from facturator.service_layer.invoice_generator import invoice
+from facturator.service_layer.invoice_generator import pdf_batch
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue, QueueFullError
 from facturator.service_layer.unit_of_work import AbstractUnitOfWork
 
 
@@ -13,31 +18,156 @@ class Invoices(Resource):
     def __init__(self, uow: AbstractUnitOfWork):
         self.uow = uow
 
+    @cached_response('orders', 'payers')
     def get(self):
         number = request.args.get('number')
-        context = handlers.get_order_context(uow=self.uow, order_number=number)
+        try:
+            context = handlers.get_order_context(uow=self.uow, order_number=number)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if context is None:
+            abort(404, description=f"Order with number {number} not found")
         return jsonify(context)
 
 
 class Pdf(Resource):
-    def __init__(self, uow: AbstractUnitOfWork):
+    def __init__(self, uow: AbstractUnitOfWork, pdf_queue: PdfJobQueue):
         self.uow = uow
+        self.pdf_queue = pdf_queue
 
     def get(self):
         number = request.args.get('number')
-        context = handlers.get_order_context(uow=self.uow, order_number=number)
-
-        pdf_dir = Path(__file__).resolve().parent.parent.parent.parent / 'service_layer' / 'invoice_generator'
-        pdf_filename = f'{context["client_name"]}_{context["invoice_date"]}.pdf'
-        pdf_path = os.path.join(pdf_dir, pdf_filename)
-
-        @after_this_request
-        def remove_file(response):
-             try:
-                os.remove(pdf_path)
-             except Exception as error:
-                 pass
-             return response
-
-        invoice.create_pdf(context)
-        return send_file(pdf_path, as_attachment=True, download_name=pdf_filename, mimetype='application/pdf')
\ No newline at end of file
+        try:
+            context = handlers.get_order_context(uow=self.uow, order_number=number)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if context is None:
+            abort(404, description=f"Order with number {number} not found")
+        try:
+            job = self.pdf_queue.submit(context)
+        except QueueFullError as e:
+            return {'error': str(e)}, 503
+
+        try:
+            pdf = job.result(timeout=config.get_pdf_render_timeout())
+        except concurrent.futures.TimeoutError:
+            return job_accepted(job)
+
+        return send_file(
+            io.BytesIO(pdf),
+            as_attachment=True,
+            download_name=job.filename,
+            mimetype='application/pdf'
+        )
+
+
+def job_accepted(job):
+    """202 response pointing at the job, for renders still running."""
+    response = make_response(jsonify(job.to_dict()), 202)
+    response.headers['Location'] = url_for('rest_api.pdfjob', job_id=job.id)
+    return response
+
+
+class PdfJobs(Resource):
+    def __init__(self, uow: AbstractUnitOfWork, pdf_queue: PdfJobQueue):
+        self.uow = uow
+        self.pdf_queue = pdf_queue
+
+    def post(self):
+        body = request.get_json(silent=True) or {}
+        number = body.get('number') or request.args.get('number')
+        if not number:
+            return {'error': 'An order number is required'}, 400
+        try:
+            context = handlers.get_order_context(uow=self.uow, order_number=number)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if context is None:
+            abort(404, description=f"Order with number {number} not found")
+        try:
+            job = self.pdf_queue.submit(context)
+        except QueueFullError as e:
+            return {'error': str(e)}, 503
+
+        return job_accepted(job)
+
+
+class PdfJob(Resource):
+    def __init__(self, pdf_queue: PdfJobQueue):
+        self.pdf_queue = pdf_queue
+
+    def get(self, job_id):
+        job = self.pdf_queue.get(job_id)
+        if not job:
+            abort(404, description=f"PDF job {job_id} not found")
+        return make_response(jsonify(job.to_dict()), 200)
+
+
+class PdfJobFile(Resource):
+    def __init__(self, pdf_queue: PdfJobQueue):
+        self.pdf_queue = pdf_queue
+
+    def get(self, job_id):
+        job = self.pdf_queue.get(job_id)
+        if not job:
+            abort(404, description=f"PDF job {job_id} not found")
+        if job.status == 'failed':
+            return make_response(jsonify(job.to_dict()), 500)
+        if job.status != 'done':
+            return make_response(jsonify(job.to_dict()), 409)
+
+        try:
+            pdf = job.result(timeout=config.get_pdf_render_timeout())
+        except concurrent.futures.TimeoutError:
+            return {'error': f'The PDF of job {job_id} could not be read in time'}, 504
+
+        return send_file(
+            io.BytesIO(pdf),
+            as_attachment=True,
+            download_name=job.filename,
+            mimetype='application/pdf'
+        )
+
+
+class PdfBatch(Resource):
+    def __init__(self, uow: AbstractUnitOfWork, pdf_queue: PdfJobQueue):
+        self.uow = uow
+        self.pdf_queue = pdf_queue
+
+    def post(self):
+        try:
+            batch = schemas.PdfBatch(**(request.get_json(silent=True) or {}))
+        except ValidationError as e:
+            return {'error': str(e)}, 400
+
+        contexts, errors = handlers.get_orders_contexts(
+            uow=self.uow, order_numbers=batch.numbers, prefix=batch.prefix
+        )
+        if not contexts and errors:
+            return {'error': 'None of the invoices can be rendered', 'errors': errors}, 400
+        if not contexts:
+            abort(404, description="No orders found for the given numbers")
+
+        if batch.format == 'pdf':
+            try:
+                pdf = self.pdf_queue.render_merged_pdf(
+                    contexts, timeout=config.get_pdf_render_timeout()
+                )
+            except concurrent.futures.TimeoutError:
+                return {'error': 'The invoices took too long to render'}, 504
+            response = send_file(
+                io.BytesIO(pdf),
+                as_attachment=True,
+                download_name='invoices.pdf',
+                mimetype='application/pdf'
+            )
+            if errors:
+                response.headers['X-Invoice-Errors'] = '; '.join(
+                    f'{number}: {error}' for number, error in errors.items()
+                )
+            return response
+        return Response(
+            pdf_batch.stream_zip(self.pdf_queue.render_many(contexts), errors=errors),
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename=invoices.zip'}
+        )
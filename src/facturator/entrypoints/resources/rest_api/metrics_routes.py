@@ -0,0 +1,10 @@
+from flask import jsonify, make_response
+from flask_restful import Resource
+
+from facturator.adapters import engines
+
+
+class DbPool(Resource):
+
+    def get(self):
+        return make_response(jsonify(engines.pool_status()), 200)
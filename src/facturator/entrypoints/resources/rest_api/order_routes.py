@@ -10,6 +10,7 @@ from facturator.service_layer import messagebus
 
 from facturator.domain import commands
 from facturator.entrypoints import schemas
+from facturator.entrypoints.decorators import cached_response, if_match_version, item_response
 from facturator.service_layer.unit_of_work import AbstractUnitOfWork
 
 
@@ -17,14 +18,16 @@ class Order(Resource):
     def __init__(self, uow: AbstractUnitOfWork):
         self.uow = uow
 
+    @cached_response('orders', 'payers')
     def get(self, item_id):
         order = handlers.get_order(uow=self.uow, item_id=item_id)
         if order:
             response_data = schemas.OrderItemResponse(**order)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
         abort(404, description=f"Order with ID {item_id} not found")
 
-    def patch(self, item_id):
+    @if_match_version
+    def patch(self, item_id, expected_version=None):
         try:
             order_data = schemas.PatchOrder(**request.json)
         except ValidationError as e:
@@ -32,16 +35,18 @@ class Order(Resource):
 
         cmd = commands.UpdateOrder(
             id=item_id,
+            expected_version=expected_version,
             **order_data.model_dump()
         )
-        order_dict = handlers.update_order(uow=self.uow, cmd=cmd)
+        order_dict = messagebus.handle(message=cmd, uow=self.uow)[0]
         if order_dict:
             response_data = schemas.OrderItemResponse(**order_dict)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
 
         abort(404, description=f"Payer with ID {item_id} not found")
 
-    def put(self, item_id):
+    @if_match_version
+    def put(self, item_id, expected_version=None):
         try:
             order_data = schemas.PostOrder(**request.json)
         except ValidationError as e:
@@ -49,20 +54,21 @@ class Order(Resource):
 
         cmd = commands.UpdateOrder(
             id=item_id,
+            expected_version=expected_version,
             **order_data.model_dump()
         )
-        order_dict = handlers.update_order(uow=self.uow, cmd=cmd)
+        order_dict = messagebus.handle(message=cmd, uow=self.uow)[0]
 
         if order_dict:
             response_data = schemas.OrderItemResponse(**order_dict)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
 
         abort(404, description=f"Payer with ID {item_id} not found")
 
     def delete(self, item_id):
         cmd = commands.DeleteOrder(id=item_id)
         try:
-            result = handlers.delete_order(uow=self.uow, cmd=cmd)
+            result = messagebus.handle(message=cmd, uow=self.uow)[0]
         except Exception:
             return 406, "Integrity violation"
 
@@ -76,11 +82,24 @@ class Orders(Resource):
     def __init__(self, uow: AbstractUnitOfWork):
         self.uow = uow
 
+    @cached_response('orders', 'payers')
     def get(self):
         payer_name = request.args.get('payer_name')
-        orders = handlers.get_orders(uow=self.uow, payer_name=payer_name)
+        try:
+            page_query = schemas.PageQuery(**request.args.to_dict())
+            page = handlers.get_orders_page(
+                uow=self.uow,
+                payer_name=payer_name,
+                limit=page_query.limit,
+                after=page_query.after
+            )
+        except (ValidationError, ValueError) as e:
+            return {'error': str(e)}, 400
 
-        response_data = schemas.OrderListResponse(orders=[schemas.OrderItemResponse(**order) for order in orders])
+        response_data = schemas.OrderListResponse(
+            orders=[schemas.OrderItemResponse(**order) for order in page['orders']],
+            page_info=page['page_info']
+        )
 
         return make_response(jsonify(response_data.model_dump(mode='json')), 200)
 
@@ -113,7 +132,10 @@ class OrdersFile(Resource):
         cmd = commands.UploadOrders(
             file=file, code_fixed_part='TEST', code_starting_number=0
         )
-        orders = messagebus.handle(message=cmd, uow=self.uow)[0]
+        try:
+            orders = messagebus.handle(message=cmd, uow=self.uow)[0]
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
         response_data = schemas.OrderListResponse(orders=[schemas.OrderItemResponse(**order) for order in orders])
 
@@ -8,6 +8,7 @@ from facturator.service_layer import handlers
 from facturator.service_layer import messagebus
 from facturator.domain import commands
 from facturator.entrypoints import schemas
+from facturator.entrypoints.decorators import cached_response, if_match_version, item_response
 from facturator.service_layer.unit_of_work import AbstractUnitOfWork
 
 
@@ -16,31 +17,35 @@ class Payer(Resource):
     def __init__(self, uow: AbstractUnitOfWork):
         self.uow = uow
 
+    @cached_response('payers')
     def get(self, item_id):
         payer = handlers.get_payer(uow=self.uow, item_id=item_id)
         if payer:
             response_data = schemas.PayerItemResponse(**payer)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
         abort(404, description=f"Payer with ID {item_id} not found")
 
-    def patch(self, item_id):
+    @if_match_version
+    def patch(self, item_id, expected_version=None):
         try:
             payer_data = schemas.PatchPayer(**request.json)
         except ValidationError as e:
             return {'error': str(e)}, 400
         cmd = commands.UpdatePayer(
             id=item_id,
+            expected_version=expected_version,
             **payer_data.model_dump()
         )
-        payer_dict = handlers.update_payer(self.uow, cmd)
+        payer_dict = messagebus.handle(message=cmd, uow=self.uow)[0]
 
         if payer_dict:
             response_data = schemas.PayerItemResponse(**payer_dict)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
 
         abort(404, description=f"Payer with ID {item_id} not found")
 
-    def put(self, item_id):
+    @if_match_version
+    def put(self, item_id, expected_version=None):
         try:
             payer_data = schemas.PostPayer(**request.json)
         except ValidationError as e:
@@ -48,20 +53,21 @@ class Payer(Resource):
 
         cmd = commands.UpdatePayer(
             id=item_id,
+            expected_version=expected_version,
             **payer_data.model_dump()
         )
-        payer_dict = handlers.update_payer(self.uow, cmd)
+        payer_dict = messagebus.handle(message=cmd, uow=self.uow)[0]
 
         if payer_dict:
             response_data = schemas.PayerItemResponse(**payer_dict)
-            return make_response(jsonify(response_data.model_dump()), 200)
+            return item_response(response_data)
 
         abort(404, description=f"Payer with ID {item_id} not found")
 
     def delete(self, item_id):
         cmd = commands.DeletePayer(id=item_id)
         try:
-            result = handlers.delete_payer(uow=self.uow, cmd=cmd)
+            result = messagebus.handle(message=cmd, uow=self.uow)[0]
         except Exception as e:
             return f"Integrity violation {e}", 406
 
@@ -76,11 +82,21 @@ class Payers(Resource):
     def __init__(self, uow: AbstractUnitOfWork):
         self.uow = uow
 
+    @cached_response('payers')
     def get(self):
         name = request.args.get('name')
-        payers = handlers.get_payers(self.uow, name)
+        try:
+            page_query = schemas.PageQuery(**request.args.to_dict())
+            page = handlers.get_payers_page(
+                self.uow, name, limit=page_query.limit, after=page_query.after
+            )
+        except (ValidationError, ValueError) as e:
+            return {'error': str(e)}, 400
 
-        response_data = schemas.PayerListResponse(payers=[schemas.PayerItemResponse(**payer) for payer in payers])
+        response_data = schemas.PayerListResponse(
+            payers=[schemas.PayerItemResponse(**payer) for payer in page['payers']],
+            page_info=page['page_info']
+        )
 
         return make_response(jsonify(response_data.model_dump(mode='json')), 200)
 
@@ -0,0 +1,17 @@
+from flask import request, jsonify, make_response
+from flask_restful import Resource
+
+from facturator.service_layer import handlers
+from facturator.service_layer.unit_of_work import AbstractUnitOfWork
+
+
+class DataVersions(Resource):
+    def __init__(self, uow: AbstractUnitOfWork):
+        self.uow = uow
+
+    def get(self):
+        versions = handlers.get_data_versions(uow=self.uow)
+        response = make_response(jsonify(versions), 200)
+        response.set_etag('-'.join(f'{name}.{version or 0}' for name, version in sorted(versions.items())))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel, ConfigDict, UUID4
+from typing import Optional, List, Literal
+from pydantic import BaseModel, ConfigDict, UUID4, model_validator
 
 
 class SignUp(BaseModel):
@@ -18,6 +18,29 @@ class LogIn(BaseModel):
     password: str
 
 
+class PageQuery(BaseModel):
+    limit: Optional[int] = None
+    after: Optional[str] = None
+
+
+class PageInfo(BaseModel):
+    end_cursor: Optional[str] = None
+    has_next_page: bool = False
+
+
+class PdfBatch(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+    numbers: Optional[List[str]] = None
+    prefix: Optional[str] = None
+    format: Literal['zip', 'pdf'] = 'zip'
+
+    @model_validator(mode='after')
+    def check_numbers_or_prefix(self):
+        if (self.numbers is None) == (self.prefix is None):
+            raise ValueError('Either numbers or prefix must be given')
+        return self
+
+
 class PostPayer(BaseModel):
     model_config = ConfigDict(extra='forbid')
     name: str
@@ -30,10 +53,12 @@ class PostPayer(BaseModel):
 
 class PayerItemResponse(PostPayer):
     id: UUID4
+    version: Optional[int] = None
 
 
 class PayerListResponse(BaseModel):
-    payers: List[PayerItemResponse] = []    
+    payers: List[PayerItemResponse] = []
+    page_info: Optional[PageInfo] = None
 
 
 class PatchPayer(BaseModel):
@@ -57,10 +82,12 @@ class PostOrder(BaseModel):
 class OrderItemResponse(PostOrder):
     id: UUID4
     payer_id: Optional[UUID4]
+    version: Optional[int] = None
 
 
 class OrderListResponse(BaseModel):
     orders: List[OrderItemResponse] = []
+    page_info: Optional[PageInfo] = None
 
 
 class PatchOrder(BaseModel):
@@ -70,3 +97,22 @@ class PatchOrder(BaseModel):
     date: Optional[str] = None
     quantity: Optional[float] = None
 
+
+
+class ChangeQuery(BaseModel):
+    since: Optional[str] = None
+    limit: Optional[int] = None
+
+
+class ChangeItemResponse(BaseModel):
+    cursor: str
+    entity: Literal['order', 'payer']
+    id: str
+    operation: Literal['insert', 'update', 'delete']
+    changed_at: str
+    data: Optional[dict] = None
+
+
+class ChangeListResponse(BaseModel):
+    changes: List[ChangeItemResponse] = []
+    page_info: PageInfo
@@ -1,20 +1,99 @@
+import os
 import re
-import uuid
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
+from lxml import etree
 
 from facturator.domain.model import InvoiceOrder
 
 
+def uuid4_batch(count):
+    """
+    Generates `count` random (version 4) UUID strings from a single
+    os.urandom call, setting the version and variant bits on all of them
+    at once.
+    """
+    random_bytes = np.frombuffer(os.urandom(16 * count), dtype=np.uint8).reshape(count, 16).copy()
+    random_bytes[:, 6] = (random_bytes[:, 6] & 0x0F) | 0x40
+    random_bytes[:, 8] = (random_bytes[:, 8] & 0x3F) | 0x80
+    hex_ids = random_bytes.tobytes().hex()
+    return [
+        f'{hex_ids[start:start + 8]}-{hex_ids[start + 8:start + 12]}-'
+        f'{hex_ids[start + 12:start + 16]}-{hex_ids[start + 16:start + 20]}-'
+        f'{hex_ids[start + 20:start + 32]}'
+        for start in range(0, 32 * count, 32)
+    ]
+
+
+class ConceptPatternRegistry:
+    """
+    Set of regular expressions that extract the payer name from the concept
+    of a bank movement, one per kind of movement or bank.
+
+    The patterns are compiled once into a single alternation. When a
+    concept matches several patterns, the leftmost match wins.
+
+    Args:
+        patterns (list): Regular expressions with exactly one capturing
+            group, which captures the name.
+    """
+    def __init__(self, patterns=()):
+        self._patterns = []
+        self.regex = None
+        for pattern in patterns:
+            self.register(pattern)
+
+    def register(self, pattern):
+        if re.compile(pattern).groups != 1:
+            raise ValueError(f"Pattern {pattern!r} must have exactly one capturing group")
+        self._patterns.append(pattern)
+        self.regex = re.compile('|'.join(f'(?:{p})' for p in self._patterns))
+
+    def search(self, concept):
+        match = self.regex.search(concept)
+        if match:
+            return match.group(match.lastindex)
+        return None
+
+    def extract(self, concepts):
+        """
+        Extracts the names of a whole Series of concepts.
+
+        Statements repeat the same concepts many times, so the Series is
+        factorized first and the regex only runs once per distinct
+        concept. Rows without a match get None.
+        """
+        codes, unique_concepts = pd.factorize(concepts)
+        # The trailing None is picked by the -1 code of missing concepts
+        names = np.array(
+            [
+                self.search(concept) if isinstance(concept, str) else None
+                for concept in unique_concepts
+            ] + [None],
+            dtype=object
+        )
+        return pd.Series(names.take(codes), index=concepts.index)
+
+
+concept_patterns = ConceptPatternRegistry([
+    r'BIZUM DE (.+?) CONCEPTO',
+    r'TRANSFERENCIA DE (.+?), CONCEPTO'
+])
+
+
 class AbstractFileHandler(ABC):
-    @staticmethod
-    def get_name_from_concept(concept):
+    concept_patterns = concept_patterns
+
+    @classmethod
+    def get_name_from_concept(cls, concept):
         """
         Extracts a name from a given concept string using predefined patterns.
 
-        This function searches for specific patterns in the concept string to extract
-        the name. It currently supports two patterns: 'BIZUM DE' and 'TRANSFERENCIA DE',
-        followed by a name and the word 'CONCEPTO'.
+        This function searches the concept string with the patterns of the
+        handler's concept_patterns registry. By default it supports two
+        patterns: 'BIZUM DE' and 'TRANSFERENCIA DE', followed by a name and
+        the word 'CONCEPTO'.
 
         Args:
             concept (str): The concept string from which to extract the name.
@@ -30,22 +109,55 @@ class AbstractFileHandler(ABC):
             >>> get_name_from_concept("Payment via credit card")
             None
         """
-        patterns = [
-            r'BIZUM DE (.+?) CONCEPTO',
-            r'TRANSFERENCIA DE (.+?), CONCEPTO'
-        ]
+        return cls.concept_patterns.search(concept)
 
-        for pattern in patterns:
-            match = re.search(pattern, concept)
-            if match:
-                return match.group(1)
+    @staticmethod
+    def convert_to_float(value):
+        """Parses an amount written as '1.234,56' into a float."""
+        value = value.replace('.', '')
+        value = value.replace(',', '.')
+        return float(value)
 
-        return None
+    def _group_by_payer(self, data):
+        data['Name'] = self.concept_patterns.extract(data['Concepto'])
+        grouped_df = data.groupby('Name').agg({
+            'Fecha Operaci?n': 'max', 'Importe': 'sum'
+        })
+        grouped_df.rename(columns={
+            'Fecha Operaci?n': 'Latest Date', 'Importe': 'Total Amount'
+        }, inplace=True)
+        return grouped_df
+
+    @staticmethod
+    def _build_order_rows(grouped_df):
+        """
+        Turns the per-payer aggregate into order rows, reading it column by
+        column. The rows can be passed to the repositories' add_rows without
+        building InvoiceOrder objects. Dates are formatted as the strings
+        stored in the orders table.
+        """
+        return [
+            {'id': order_id, 'payer_name': payer_name, 'date': date, 'quantity': quantity}
+            for order_id, payer_name, date, quantity in zip(
+                uuid4_batch(len(grouped_df)),
+                grouped_df.index.tolist(),
+                grouped_df['Latest Date'].dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
+                grouped_df['Total Amount'].tolist()
+            )
+        ]
+
+    @classmethod
+    def _build_orders(cls, grouped_df):
+        return [InvoiceOrder(**row) for row in cls._build_order_rows(grouped_df)]
 
     @abstractmethod
     def get_orders_from_file(self):
         pass
 
+    @abstractmethod
+    def get_order_rows_from_file(self):
+        pass
+
 
 class ExcelFileHandler(AbstractFileHandler):
     def __init__(self, file_path):
@@ -65,17 +177,11 @@ class ExcelFileHandler(AbstractFileHandler):
         data.dropna(axis=0, how='all', inplace=True)
         return data
 
-    @staticmethod
-    def convert_to_float(value):
-        value = value.replace('.', '')
-        value = value.replace(',', '.')
-        return float(value)
-
     @staticmethod
     def _process_dates_and_numbers(data):
         data['Fecha Operaci?n'] = pd.to_datetime(data['Fecha Operaci?n'], dayfirst=True)
         data['Fecha Valor'] = pd.to_datetime(data['Fecha Valor'], dayfirst=True)
-        data['Importe'] = data['Importe'].apply(ExcelFileHandler.convert_to_float) / 100
+        data['Importe'] = data['Importe'].apply(AbstractFileHandler.convert_to_float) / 100
         return data
 
     def _get_df_from_excel(self):
@@ -86,28 +192,120 @@ class ExcelFileHandler(AbstractFileHandler):
         return data
 
     def _get_orders_from_df(self, data):
-        data['Name'] = data['Concepto'].apply(self.get_name_from_concept)
-        grouped_df = data.groupby('Name').agg({
-            'Fecha Operaci?n': 'max', 'Importe': 'sum'
-        })
-        grouped_df.rename(columns={
-            'Fecha Operaci?n': 'Latest Date', 'Importe': 'Total Amount'
-        }, inplace=True)
-
-        invoice_orders = []
-        for index, row in grouped_df.iterrows():
-            # Create an InvoiceOrder object for each row
-            invoice_order = InvoiceOrder(
-                id=str(uuid.uuid4()),
-                payer_name=index,
-                date=row['Latest Date'],
-                quantity=row['Total Amount'],
-            )
-            invoice_orders.append(invoice_order)
-        return invoice_orders
+        return self._build_orders(self._group_by_payer(data))
 
     def get_orders_from_file(self):
         df = self._get_df_from_excel()
         invoice_orders = self._get_orders_from_df(df)
         return invoice_orders
 
+    def get_order_rows_from_file(self):
+        df = self._get_df_from_excel()
+        return self._build_order_rows(self._group_by_payer(df))
+
+
+class HtmlStatementFileHandler(AbstractFileHandler):
+    """
+    Streaming reader for bank statements exported as an HTML table, the
+    format of the .xls files downloaded from the bank.
+
+    The table is parsed row by row and aggregated per payer every
+    `chunksize` movements, so memory stays bounded by the chunk size and
+    the number of payers rather than by the size of the statement.
+
+    Args:
+        source: A path or a binary file-like object with the statement.
+        chunksize (int): The number of movements aggregated at a time.
+    """
+    date_header_prefix = 'Fecha Operaci'
+    concept_header = 'Concepto'
+    amount_header = 'Importe'
+
+    def __init__(self, source, chunksize=10000):
+        self.source = source
+        self.chunksize = chunksize
+
+    @staticmethod
+    def _row_cells(row):
+        # Collapse whitespace the same way pandas.read_html does
+        return [
+            re.sub(r'[\r\n]+|\s{2,}', ' ', ''.join(cell.itertext())).strip()
+            for cell in row.iterchildren('td')
+        ]
+
+    def _find_columns(self, cells):
+        if self.concept_header not in cells or self.amount_header not in cells:
+            return None
+        date_column = next(
+            (position for position, cell in enumerate(cells)
+             if cell.startswith(self.date_header_prefix)),
+            None
+        )
+        if date_column is None:
+            return None
+        return (
+            date_column,
+            cells.index(self.concept_header),
+            cells.index(self.amount_header)
+        )
+
+    def _iter_movements(self):
+        columns = None
+        rows = etree.iterparse(self.source, events=('end',), tag='tr', html=True)
+        try:
+            for _, row in rows:
+                cells = self._row_cells(row)
+                # Free the parsed rows, the tree would otherwise hold the whole table
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+
+                if columns is None:
+                    columns = self._find_columns(cells)
+                    continue
+                if not any(cells):
+                    continue
+                yield tuple(cells[column] for column in columns)
+        except etree.XMLSyntaxError as error:
+            raise ValueError(f"The statement cannot be read as HTML: {error}") from error
+        if columns is None:
+            raise ValueError(
+                f"No header row with the operation date, {self.concept_header} and "
+                f"{self.amount_header} columns found in the statement"
+            )
+
+    def _aggregate_chunk(self, movements):
+        data = pd.DataFrame(
+            movements, columns=['Fecha Operaci?n', 'Concepto', 'Importe']
+        )
+        data['Fecha Operaci?n'] = pd.to_datetime(
+            data['Fecha Operaci?n'], format='%d/%m/%Y'
+        )
+        data['Importe'] = data['Importe'].apply(self.convert_to_float)
+        return self._group_by_payer(data)
+
+    @staticmethod
+    def _merge_aggregates(aggregate, chunk_aggregate):
+        if aggregate is None:
+            return chunk_aggregate
+        return pd.concat([aggregate, chunk_aggregate]).groupby(level=0).agg({
+            'Latest Date': 'max', 'Total Amount': 'sum'
+        })
+
+    def get_aggregate_from_file(self):
+        aggregate = None
+        chunk = []
+        for movement in self._iter_movements():
+            chunk.append(movement)
+            if len(chunk) >= self.chunksize:
+                aggregate = self._merge_aggregates(aggregate, self._aggregate_chunk(chunk))
+                chunk = []
+        if chunk or aggregate is None:
+            aggregate = self._merge_aggregates(aggregate, self._aggregate_chunk(chunk))
+        return aggregate
+
+    def get_orders_from_file(self):
+        return self._build_orders(self.get_aggregate_from_file())
+
+    def get_order_rows_from_file(self):
+        return self._build_order_rows(self.get_aggregate_from_file())
@@ -1,5 +1,6 @@
 from facturator.domain import model, commands
-from facturator.service_layer import file_handler
+from facturator.service_layer import file_handler, pagination
+from facturator.service_layer.payer_matcher import PayerMatcher
 from facturator.service_layer.invoice_generator import invoice
 
 
@@ -12,7 +13,9 @@ def add_order(
 
         if not all([cmd.payer_name, cmd.date, cmd.quantity]):
             raise ValueError("All attributes must be provided")
-        payer = get_payer_from_name(cmd.payer_name, uow.payers.list_all())
+        payer = get_payer_from_name(
+            cmd.payer_name, uow.payers.search('name', cmd.payer_name)
+        )
 
         order = model.InvoiceOrder(
             id=cmd.id,
@@ -23,7 +26,9 @@ def add_order(
         )
         order.allocate_payer(payer)
         uow.orders.add(order)
+        uow.changes.add('order', [cmd.id], 'insert')
         uow.commit()
+        uow.response_cache.invalidate('orders')
         return (
             order.to_dict_recursive() if recursive else order.to_dict()
         )
@@ -31,30 +36,43 @@ def add_order(
 
 def get_orders(uow, payer_name, recursive=False):
     with uow:
+        loading = 'selectin' if recursive else None
         if payer_name:
-            all_orders = uow.orders.list_all()
-            filtered_orders = [
-                order for order in all_orders 
-                if payer_name.upper() in order.payer_name.upper()
-            ]
-            orders = [
-                (
-                    order.to_dict_recursive() if recursive else order.to_dict()
-                ) for order in filtered_orders
-            ]
-        else:    
-            orders = [
-                (
-                    order.to_dict_recursive() if recursive else order.to_dict()
-                ) for order in uow.orders.list_all()
-            ]
-
-        return orders
+            found_orders = uow.orders.search('payer_name', payer_name, loading=loading)
+        else:
+            found_orders = uow.orders.list_all(loading=loading)
+
+        return [
+            (
+                order.to_dict_recursive() if recursive else order.to_dict()
+            ) for order in found_orders
+        ]
+
+
+def get_orders_page(uow, payer_name, limit=None, after=None, recursive=False):
+    limit = pagination.resolve_limit(limit)
+    after_id = pagination.decode_cursor(after) if after else None
+    with uow:
+        found_orders = uow.orders.list_page(
+            limit + 1,
+            after=after_id,
+            field='payer_name' if payer_name else None,
+            term=payer_name,
+            loading='selectin' if recursive else None
+        )
+        orders, page_info = pagination.build_page(
+            found_orders,
+            limit,
+            lambda order: (
+                order.to_dict_recursive() if recursive else order.to_dict()
+            )
+        )
+        return {'orders': orders, 'page_info': page_info}
 
 
 def get_order(uow, item_id, recursive=False):
     with uow:
-        order = uow.orders.get_by_id(item_id)
+        order = uow.orders.get_by_id(item_id, loading='joined' if recursive else None)
         if order:
             return (
                 order.to_dict_recursive() if recursive
@@ -68,14 +86,21 @@ def update_order(uow, cmd, recursive=False):
         order = uow.orders.get_by_id(cmd.id)
         if not order:
             return {}
+        model.check_version(order, cmd.expected_version)
+        previous_number = order.number
         if cmd.payer_name:
             order.payer_name = cmd.payer_name.upper() 
-            payer = get_payer_from_name(cmd.payer_name, uow.payers.list_all())
+            payer = get_payer_from_name(
+                cmd.payer_name, uow.payers.search('name', cmd.payer_name)
+            )
             order.allocate_payer(payer)
         order.date = cmd.date if cmd.date else order.date
         order.quantity = cmd.quantity if cmd.quantity else order.quantity
         order.number = cmd.number if cmd.number else order.number
+        uow.changes.add('order', [cmd.id], 'update')
         uow.commit()
+        uow.pdf_cache.invalidate_order(previous_number)
+        uow.response_cache.invalidate('orders')
 
         return (
                 order.to_dict_recursive() if recursive
@@ -88,8 +113,12 @@ def delete_order(uow, cmd):
         order = uow.orders.get_by_id(cmd.id)
         if not order:
             return None
+        number = order.number
         uow.orders.delete_by_id(element_id=cmd.id)
+        uow.changes.add('order', [cmd.id], 'delete')
         uow.commit()
+        uow.pdf_cache.invalidate_order(number)
+        uow.response_cache.invalidate('orders')
         return 'Order deleted succesfully'
 
 
@@ -108,7 +137,9 @@ def add_payer(
             province=cmd.province
         )
         uow.payers.add(payer)
+        uow.changes.add('payer', [cmd.id], 'insert')
         uow.commit()
+        uow.response_cache.invalidate('payers')
         return payer.to_dict()
 
 
@@ -117,13 +148,18 @@ def update_payer(uow, cmd):
         payer = uow.payers.get_by_id(cmd.id)
         if not payer:
             return{}
+        model.check_version(payer, cmd.expected_version)
+        previous_name = payer.name
         payer.name = cmd.name.upper() if cmd.name else payer.name  
         payer.nif = cmd.nif if cmd.nif else payer.nif
         payer.address = cmd.address if cmd.address else payer.address
         payer.zip_code = cmd.zip_code if cmd.zip_code else payer.zip_code
         payer.city = cmd.city if cmd.city else payer.city
         payer.province = cmd.province if cmd.province else payer.province
+        uow.changes.add('payer', [cmd.id], 'update')
         uow.commit()
+        uow.pdf_cache.invalidate_payer(previous_name)
+        uow.response_cache.invalidate('payers')
         return payer.to_dict()
 
 
@@ -132,8 +168,12 @@ def delete_payer(uow, cmd):
         payer = uow.payers.get_by_id(cmd.id)
         if not payer:
             return None
+        name = payer.name
         uow.payers.delete_by_id(element_id=cmd.id)
+        uow.changes.add('payer', [cmd.id], 'delete')
         uow.commit()
+        uow.pdf_cache.invalidate_payer(name)
+        uow.response_cache.invalidate('payers')
         return 'Payer deleted succesfully'
 
 
@@ -148,17 +188,117 @@ def get_payer(uow, item_id):
 def get_payers(uow, name):
     with uow:
         if name:
-            all_payers = uow.payers.list_all()
-            filtered_payers = [
-                payer for payer in all_payers 
-                if name.upper() in payer.name.upper()
-            ]
-            payers = [payer.to_dict() for payer in filtered_payers]
+            found_payers = uow.payers.search('name', name)
         else:
-            payers = [payer.to_dict() for payer in uow.payers.list_all()]
+            found_payers = uow.payers.list_all()
+
+        return [payer.to_dict() for payer in found_payers]
+
+
+def get_payers_page(uow, name, limit=None, after=None):
+    limit = pagination.resolve_limit(limit)
+    after_id = pagination.decode_cursor(after) if after else None
+    with uow:
+        found_payers = uow.payers.list_page(
+            limit + 1,
+            after=after_id,
+            field='name' if name else None,
+            term=name
+        )
+        payers, page_info = pagination.build_page(
+            found_payers, limit, lambda payer: payer.to_dict()
+        )
+        return {'payers': payers, 'page_info': page_info}
+
+
+def get_payers_by_ids(uow, payer_ids):
+    """
+    Returns the payers with the given ids as dicts, in the same order,
+    with None for unknown ids, fetching them all in one query.
+    """
+    with uow:
+        payers = uow.payers.get_many(values=list(set(payer_ids)), field='id', loading=None)
+        payers_by_id = {payer.id: payer.to_dict() for payer in payers}
+        return [payers_by_id.get(payer_id) for payer_id in payer_ids]
+
+
+def get_table_sizes(uow):
+    """Returns the estimated number of orders and of payers."""
+    with uow:
+        return {'orders': uow.orders.estimate_count(), 'payers': uow.payers.estimate_count()}
+
+
+def change_cursor(entry):
+    return pagination.encode_cursor(f'{entry.transaction_id}:{entry.id}')
+
+
+def get_data_versions(uow):
+    """
+    Returns the version of the orders and of the payers: the change feed
+    cursor of their last change, or None before any. A version differs
+    from the previous one whenever the table changed, and can be passed
+    as `since` to get_changes to fetch what did.
+    """
+    with uow:
+        versions = {}
+        for table, entity in (('orders', 'order'), ('payers', 'payer')):
+            entry = uow.changes.latest(entity)
+            versions[table] = change_cursor(entry) if entry else None
+        return versions
+
+
+def get_changes(uow, since=None, limit=None):
+    """
+    Returns the page of the change log following the cursor `since`, or
+    its first page, oldest change first.
+
+    Each change holds the current state of its item as `data`, or None
+    for deletions and items deleted since, so a client mirroring orders
+    and payers only fetches what changed after its last sync. The end
+    cursor of the page is `since` when nothing changed, to be sent back
+    on the next poll.
+
+    Raises:
+        ValueError: If `since` or `limit` are not valid.
+    """
+    limit = pagination.resolve_limit(limit)
+    after = (0, 0)
+    if since:
+        position = pagination.decode_cursor(since).split(':')
+        if len(position) != 2 or not all(part.isdigit() for part in position):
+            raise ValueError(f"Invalid cursor {since!r}")
+        after = tuple(int(part) for part in position)
+    with uow:
+        entries = uow.changes.list_after(after, limit + 1)
+        has_next_page = len(entries) > limit
+        entries = entries[:limit]
+        current = {}
+        for entity, repository in (('order', uow.orders), ('payer', uow.payers)):
+            ids = {
+                entry.entity_id for entry in entries
+                if entry.entity == entity and entry.operation != 'delete'
+            }
+            items = repository.get_many(values=list(ids), field='id', loading=None) if ids else []
+            current[entity] = {item.id: item.to_dict() for item in items}
+        changes = [
+            {
+                'cursor': change_cursor(entry),
+                'entity': entry.entity,
+                'id': entry.entity_id,
+                'operation': entry.operation,
+                'changed_at': str(entry.changed_at),
+                'data': current[entry.entity].get(entry.entity_id),
+            }
+            for entry in entries
+        ]
+        return {
+            'changes': changes,
+            'page_info': {
+                'end_cursor': changes[-1]['cursor'] if changes else since,
+                'has_next_page': has_next_page
+            }
+        }
 
-        return payers
-  
 
 def get_payer_from_name(name, payers):
     """
@@ -205,23 +345,54 @@ def associate_number_to_invoice(order, number_generator):
 
 
 def upload_payment_orders_from_file(cmd, uow):
-    file_contents = cmd.file.read()
-
     with uow:
         inv_code_generator = get_invoice_code_generator(cmd.code_fixed_part, cmd.code_starting_number)
-        xml_handler = file_handler.ExcelFileHandler(file_contents)
-        order_list = xml_handler.get_orders_from_file()
-        for order in order_list:
-            associate_payer_to_order(order, uow.payers.list_all())
-            associate_number_to_invoice(order, inv_code_generator)
-            uow.orders.add(order)
+        statement_handler = file_handler.HtmlStatementFileHandler(cmd.file.stream)
+        order_rows = statement_handler.get_order_rows_from_file()
+        payer_matcher = PayerMatcher(uow.payers.list_all())
+        for row in order_rows:
+            payer = payer_matcher.match(row['payer_name'])
+            row['payer_id'] = payer.id if payer else None
+            row['number'] = next(inv_code_generator)
+        uow.orders.add_rows(order_rows)
+        uow.changes.add('order', [row['id'] for row in order_rows], 'insert')
         uow.commit()
-        return [order.to_dict() for order in order_list]
+        uow.response_cache.invalidate('orders')
+        return [
+            {**row, 'date': str(row['date']), 'quantity': str(row['quantity'])}
+            for row in order_rows
+        ]
 
 
 def get_order_context(uow, order_number):
     with uow:
-        order = uow.orders.get(order_number)
+        order = uow.orders.get(order_number, loading='joined')
+        if not order:
+            return None
         order_context = invoice.generate_context(order)
         return order_context
 
+
+def get_orders_contexts(uow, order_numbers=None, prefix=None):
+    """
+    Returns the invoice contexts of the orders whose number is in
+    `order_numbers` or starts with `prefix`, loading the orders and their
+    payers in one query.
+
+    Returns:
+        tuple: The contexts, and a dict mapping the number of each order
+        whose context could not be built, because it has no payer or its
+        quantity has no exact split into the price tiers, to the reason.
+    """
+    with uow:
+        orders = uow.orders.get_many(values=order_numbers, prefix=prefix)
+        contexts, errors = [], {}
+        for order in orders:
+            if not order.payer:
+                errors[order.number] = f"order has no payer matching {order.payer_name!r}"
+                continue
+            try:
+                contexts.append(invoice.generate_context(order))
+            except ValueError as e:
+                errors[order.number] = str(e)
+        return contexts, errors
@@ -1,4 +1,9 @@
+import base64
+import hashlib
+import io
 import os
+from functools import lru_cache
+
 import jinja2
 import pdfkit
 
@@ -40,25 +45,77 @@ def generate_context(order: model.InvoiceOrder, logo_path=logo_path):
 
 
 template_loader = jinja2.FileSystemLoader(base_dir)
-template_env = jinja2.Environment(loader=template_loader)
+template_env = jinja2.Environment(loader=template_loader, auto_reload=False)
 
 html_template = 'invoice.html'
+page_template = 'invoice_page.html'
 template = template_env.get_template(html_template)
+invoice_page = template_env.get_template(page_template)
 
-output_pdf = os.path.join(base_dir, 'invoice.pdf')
+with open(css_path, encoding='utf-8') as css_file:
+    stylesheet = css_file.read()
 
 
-def create_pdf(context, css_path=css_path):
-    pdf_path = os.path.join(base_dir, f'{context["client_name"]}_{context["invoice_date"]}.pdf')
-    config = pdfkit.configuration(wkhtmltopdf='/usr/bin/wkhtmltopdf')
-    options = {
-        'enable-local-file-access': '',
-    }
-    pdfkit.from_string(
-        template.render(context),
-        pdf_path,
-        configuration=config,
-        options=options,
-        css=css_path
+@lru_cache(maxsize=8)
+def logo_data_uri(path):
+    """
+    Returns the image at `path` as a data URI, so wkhtmltopdf gets it
+    inline instead of reading the file for every invoice.
+    """
+    if not path:
+        return ''
+    with open(path, 'rb') as logo_file:
+        return f'data:image/png;base64,{base64.b64encode(logo_file.read()).decode()}'
+
+
+def template_version():
+    """
+    Returns a hash of the HTML templates, the stylesheet and the logo,
+    which changes whenever the invoice layout does.
+    """
+    version = hashlib.sha256()
+    for path in (template.filename, invoice_page.filename, css_path, logo_path):
+        with open(path, 'rb') as layout_file:
+            version.update(layout_file.read())
+    return version.hexdigest()
+
+
+def render_html(contexts):
+    """
+    Renders the invoices described by `contexts` into one HTML document,
+    a page each, with the stylesheet and the logo inlined.
+    """
+    pages = [
+        invoice_page.render(context, logo_src=logo_data_uri(context['logo_path']))
+        for context in contexts
+    ]
+    return template.render(pages=pages, stylesheet=stylesheet)
+
+
+def _to_pdf(html):
+    return pdfkit.from_string(
+        html,
+        False,
+        configuration=pdfkit.configuration(wkhtmltopdf='/usr/bin/wkhtmltopdf')
     )
 
+
+def render_pdf(context):
+    """
+    Renders the invoice described by `context` and returns the PDF bytes,
+    without writing them to disk.
+    """
+    return _to_pdf(render_html([context]))
+
+
+def create_pdf(context):
+    """Renders the invoice described by `context` into an in-memory stream."""
+    return io.BytesIO(render_pdf(context))
+
+
+def render_merged_pdf(contexts):
+    """
+    Renders the invoices described by `contexts` into a single PDF, one
+    page after the other, with a single wkhtmltopdf run.
+    """
+    return _to_pdf(render_html(contexts))
@@ -0,0 +1,48 @@
+import zipfile
+
+
+class _ChunkBuffer:
+    """
+    Write-only file object collecting what ZipFile writes, so the archive
+    can be handed out in chunks while it is being built.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def batch_filename(context):
+    return f'{context["invoice_number"]}_{context["client_name"]}.pdf'
+
+
+def stream_zip(rendered, errors=None):
+    """
+    Yields a ZIP archive chunk by chunk while it is built from `rendered`,
+    an iterable of `(context, pdf_bytes, error)` tuples as returned by
+    PdfJobQueue.render_many. Failed renders, and the invoices in `errors`
+    (a dict mapping invoice numbers to why they were not rendered), are
+    listed in an `errors.txt` entry at the end of the archive.
+    """
+    buffer = _ChunkBuffer()
+    errors = [f'{number}: {error}' for number, error in (errors or {}).items()]
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for context, pdf, error in rendered:
+            if error is not None:
+                errors.append(f'{context["invoice_number"]}: {error}')
+                continue
+            archive.writestr(batch_filename(context), pdf)
+            yield buffer.drain()
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield buffer.drain()
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from facturator import config
+from facturator.service_layer.invoice_generator import renderers
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """
+    Disk cache of rendered invoice PDFs, evicting the least recently used
+    files once they take more than `max_bytes`.
+
+    A PDF is stored under a key hashing its invoice context together with
+    the renderer version (for wkhtmltopdf, a hash of the template and
+    stylesheet), so any change to the data or the layout gets a new key
+    and a stale PDF is never served. The files are grouped by client and
+    invoice number:
+
+        <cache_dir>/<client digest>/<number digest>/<content key>.pdf
+
+    so that the PDFs of an order or a payer can be dropped when they are
+    updated instead of waiting for eviction.
+    """
+    def __init__(self, cache_dir, max_bytes, template_version=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.template_version = template_version or renderers.get_renderer().version()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._load_entries()
+
+    def _load_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        files = []
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                if file_name.endswith('.pdf'):
+                    stat = os.stat(os.path.join(dir_path, file_name))
+                    files.append((stat.st_mtime, os.path.join(dir_path, file_name), stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._size += size
+
+    def key(self, context):
+        serialized = json.dumps(context, sort_keys=True, default=str)
+        return _digest(self.template_version + serialized)
+
+    def _order_dir(self, client_name, invoice_number):
+        return os.path.join(
+            self.cache_dir, _digest(str(client_name))[:32], _digest(str(invoice_number))[:32]
+        )
+
+    def _path(self, context):
+        order_dir = self._order_dir(context['client_name'], context['invoice_number'])
+        return os.path.join(order_dir, f'{self.key(context)}.pdf')
+
+    def get(self, context):
+        """Returns the cached PDF bytes for `context`, or None."""
+        path = self._path(context)
+        try:
+            with open(path, 'rb') as pdf_file:
+                pdf = pdf_file.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(path)
+            return None
+        with self._lock:
+            if path not in self._entries:
+                self._size += len(pdf)
+            self._entries[path] = len(pdf)
+            self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return pdf
+
+    def put(self, context, pdf):
+        """Stores the PDF bytes rendered for `context`."""
+        path = self._path(context)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as tmp_file:
+            tmp_file.write(pdf)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget(path)
+            self._entries[path] = len(pdf)
+            self._size += len(pdf)
+            self._evict()
+
+    def _forget(self, path):
+        self._size -= self._entries.pop(path, 0)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            path, size = self._entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _remove_tree(self, path):
+        with self._lock:
+            for cached_path in [p for p in self._entries if p.startswith(path + os.sep)]:
+                self._forget(cached_path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def invalidate_order(self, invoice_number):
+        """Drops the cached PDFs of the order with number `invoice_number`."""
+        number_dir_name = _digest(str(invoice_number))[:32]
+        if not os.path.isdir(self.cache_dir):
+            return
+        for client_dir_name in os.listdir(self.cache_dir):
+            number_dir = os.path.join(self.cache_dir, client_dir_name, number_dir_name)
+            if os.path.isdir(number_dir):
+                self._remove_tree(number_dir)
+
+    def invalidate_payer(self, payer_name):
+        """Drops the cached PDFs of every order of the payer `payer_name`."""
+        self._remove_tree(os.path.join(self.cache_dir, _digest(str(payer_name))[:32]))
+
+
+_pdf_cache = None
+
+
+def get_pdf_cache():
+    global _pdf_cache
+    if _pdf_cache is None:
+        _pdf_cache = PdfCache(config.get_pdf_cache_dir(), config.get_pdf_cache_max_bytes())
+    return _pdf_cache
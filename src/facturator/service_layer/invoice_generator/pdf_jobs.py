@@ -0,0 +1,279 @@
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+
+from facturator import config
+from facturator.service_layer.invoice_generator import renderers
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class PdfJob:
+    def __init__(self, job_id, filename, future):
+        self.id = job_id
+        self.filename = filename
+        self.future = future
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return 'running' if self.future.running() else 'pending'
+        if self.future.cancelled() or self.future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+    @property
+    def error(self):
+        if self.status != 'failed':
+            return None
+        if self.future.cancelled():
+            return 'cancelled'
+        return str(self.future.exception())
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+    def to_dict(self):
+        job_dict = {'id': self.id, 'status': self.status, 'filename': self.filename}
+        if self.error:
+            job_dict['error'] = self.error
+        return job_dict
+
+
+class PdfJobError(Exception):
+    pass
+
+
+class StoredPdfJob(PdfJob):
+    """
+    PdfJob accepted by another process, read back from the jobs
+    directory it shares with this one.
+    """
+    poll_interval = 0.1
+
+    def __init__(self, jobs_dir, state):
+        super().__init__(state['id'], state['filename'], future=None)
+        self.jobs_dir = jobs_dir
+        self._state = state
+
+    @property
+    def status(self):
+        return self._state['status']
+
+    @property
+    def error(self):
+        return self._state.get('error')
+
+    def result(self, timeout=None):
+        """
+        Returns the PDF bytes once the job is done, polling its state
+        for at most `timeout` seconds.
+
+        Raises:
+            concurrent.futures.TimeoutError: If the job is still unfinished after `timeout`.
+            PdfJobError: If the render failed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.status not in ('done', 'failed'):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise FutureTimeoutError(f'PDF job {self.id} is still {self.status}')
+            time.sleep(self.poll_interval)
+            self._state = _read_state(self.jobs_dir, self.id) or self._state
+        if self.status == 'failed':
+            raise PdfJobError(self.error)
+        with open(os.path.join(self.jobs_dir, f'{self.id}.pdf'), 'rb') as pdf_file:
+            return pdf_file.read()
+
+
+def _write_atomically(path, data):
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(file_descriptor, 'wb') as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_state(jobs_dir, job_id):
+    try:
+        with open(os.path.join(jobs_dir, f'{job_id}.json'), 'rb') as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return None
+
+
+JOB_ID = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+
+
+class PdfJobQueue:
+    """
+    Renders invoice PDFs in a bounded pool of worker processes.
+
+    At most `max_workers` wkhtmltopdf renders run at the same time, and at
+    most `max_pending` jobs may be waiting or running; submitting beyond
+    that raises QueueFullError. Finished jobs are kept, oldest first, until
+    there are more than `finished_jobs_kept` of them.
+
+    Jobs only run in the process that accepted them. With `jobs_dir`
+    set, their state and their PDF are also written there, so every web
+    worker sharing that directory can answer for any job; without it,
+    jobs are only known to the accepting process.
+
+    Args:
+        max_workers: Number of worker processes.
+        max_pending: Number of unfinished jobs accepted.
+        finished_jobs_kept: Number of finished jobs kept for polling.
+        render: Picklable function taking an invoice context and
+            returning the PDF bytes. Defaults to the renderer selected
+            by PDF_RENDERER.
+        render_merged: Picklable function taking a list of invoice
+            contexts and returning a single PDF with all of them.
+        executor: Executor to run the renders in. Defaults to a process
+            pool started with the 'spawn' method.
+        cache: Optional PdfCache. Renders found in it complete at once
+            without reaching the pool, and new renders are stored in it.
+        jobs_dir: Optional directory shared by the web workers where the
+            jobs' state and PDFs are kept.
+    """
+    def __init__(self, max_workers=None, max_pending=None, finished_jobs_kept=None,
+                 render=renderers.render_pdf, render_merged=renderers.render_merged_pdf,
+                 executor=None, cache=None, jobs_dir=None):
+        self.max_workers = max_workers or config.get_pdf_workers()
+        self.max_pending = max_pending or config.get_pdf_max_pending_jobs()
+        self.finished_jobs_kept = finished_jobs_kept or config.get_pdf_finished_jobs_kept()
+        self.render = render
+        self.render_merged = render_merged
+        self._executor = executor
+        self.cache = cache
+        self.jobs_dir = jobs_dir
+        if jobs_dir:
+            os.makedirs(jobs_dir, exist_ok=True)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _render(self, context):
+        pdf = self.cache.get(context) if self.cache else None
+        if pdf is not None:
+            future = Future()
+            future.set_result(pdf)
+            return future
+        future = self.executor.submit(self.render, context)
+        if self.cache:
+            future.add_done_callback(lambda done: self._store(context, done))
+        return future
+
+    def _store(self, context, future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(context, future.result())
+
+    def _pending_count(self):
+        return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def _discard_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(len(finished) - self.finished_jobs_kept, 0)]:
+            del self._jobs[job_id]
+            if self.jobs_dir:
+                for extension in ('json', 'pdf'):
+                    try:
+                        os.remove(os.path.join(self.jobs_dir, f'{job_id}.{extension}'))
+                    except FileNotFoundError:
+                        pass
+
+    def _save(self, job):
+        with self._lock:
+            if job.id not in self._jobs:
+                return
+        if job.status == 'done':
+            _write_atomically(os.path.join(self.jobs_dir, f'{job.id}.pdf'), job.result())
+        state = {'id': job.id, 'status': job.status, 'filename': job.filename, 'error': job.error}
+        _write_atomically(
+            os.path.join(self.jobs_dir, f'{job.id}.json'), json.dumps(state).encode()
+        )
+
+    def submit(self, context):
+        """
+        Queues the render of the invoice described by `context` and
+        returns its PdfJob.
+        """
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise QueueFullError(
+                    f'There are already {self.max_pending} PDF jobs pending'
+                )
+            self._discard_finished_jobs()
+            filename = f'{context["client_name"]}_{context["invoice_date"]}.pdf'
+            job = PdfJob(str(uuid.uuid4()), filename, self._render(context))
+            self._jobs[job.id] = job
+        if self.jobs_dir:
+            self._save(job)
+            job.future.add_done_callback(lambda _: self._save(job))
+        return job
+
+    def render_many(self, contexts):
+        """
+        Renders the invoices described by `contexts` in the pool, keeping
+        at most two renders per worker in flight, and yields
+        `(context, pdf_bytes, error)` tuples as they finish, in completion
+        order. `error` is None unless that render failed.
+
+        These renders are not registered as jobs and do not count towards
+        `max_pending`.
+        """
+        contexts = iter(contexts)
+        in_flight = {}
+        while True:
+            for context in contexts:
+                in_flight[self._render(context)] = context
+                if len(in_flight) >= 2 * self.max_workers:
+                    break
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                context = in_flight.pop(future)
+                if future.exception() is not None:
+                    yield context, None, future.exception()
+                else:
+                    yield context, future.result(), None
+
+    def render_merged_pdf(self, contexts, timeout=None):
+        """
+        Renders all the invoices described by `contexts` into one PDF in a
+        pool worker and returns its bytes, waiting at most `timeout`
+        seconds for it.
+        """
+        return self.executor.submit(self.render_merged, list(contexts)).result(timeout=timeout)
+
+    def get(self, job_id):
+        """
+        Returns the job `job_id`, looking in the jobs directory for the
+        jobs accepted by other processes, or None.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.jobs_dir and JOB_ID.fullmatch(job_id):
+            state = _read_state(self.jobs_dir, job_id)
+            if state is not None:
+                job = StoredPdfJob(self.jobs_dir, state)
+        return job
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
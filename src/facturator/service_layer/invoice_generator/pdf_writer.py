@@ -0,0 +1,240 @@
+import struct
+import zlib
+
+import numpy as np
+
+
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+A4 = (595.28, 841.89)
+
+
+def text_width(text, size, bold=False):
+    """
+    Returns the width in points of `text` set in Helvetica (or
+    Helvetica-Bold) at `size`. Characters outside ASCII count as a digit.
+    """
+    widths = HELVETICA_BOLD_WIDTHS if bold else HELVETICA_WIDTHS
+    return sum(
+        widths[ord(char) - 32] if 32 <= ord(char) <= 126 else 556
+        for char in text
+    ) * size / 1000
+
+
+def _pdf_string(text):
+    encoded = text.encode('cp1252', errors='replace')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _color(rgb):
+    return ' '.join(f'{channel / 255:.3f}' for channel in rgb)
+
+
+def _unfilter_png(raw, width, height, bytes_per_pixel):
+    stride = width * bytes_per_pixel
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(height, stride + 1)
+    pixels = np.zeros((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.int32)
+    for row_number in range(height):
+        filter_type = rows[row_number, 0]
+        line = rows[row_number, 1:].astype(np.int32)
+        if filter_type == 0:
+            current = line
+        elif filter_type == 1:
+            current = np.cumsum(line.reshape(-1, bytes_per_pixel), axis=0).reshape(-1) % 256
+        elif filter_type == 2:
+            current = (line + previous) % 256
+        else:
+            current = _unfilter_sequential(
+                filter_type, line.tolist(), previous.tolist(), bytes_per_pixel
+            )
+        pixels[row_number] = current
+        previous = np.asarray(current, dtype=np.int32)
+    return pixels
+
+
+def _unfilter_sequential(filter_type, line, previous, bytes_per_pixel):
+    current = [0] * len(line)
+    for position, value in enumerate(line):
+        left = current[position - bytes_per_pixel] if position >= bytes_per_pixel else 0
+        up = previous[position]
+        if filter_type == 3:
+            current[position] = (value + (left + up) // 2) % 256
+            continue
+        upper_left = previous[position - bytes_per_pixel] if position >= bytes_per_pixel else 0
+        estimate = left + up - upper_left
+        distances = abs(estimate - left), abs(estimate - up), abs(estimate - upper_left)
+        if distances[0] <= distances[1] and distances[0] <= distances[2]:
+            predictor = left
+        elif distances[1] <= distances[2]:
+            predictor = up
+        else:
+            predictor = upper_left
+        current[position] = (value + predictor) % 256
+    return current
+
+
+class PngImage:
+    """
+    8-bit, non-interlaced RGB or RGBA PNG decoded into the compressed
+    colour and alpha streams of a PDF image XObject.
+    """
+    def __init__(self, data):
+        if data[:8] != b'\x89PNG\r\n\x1a\n':
+            raise ValueError('Not a PNG image')
+        position, idat = 8, []
+        while position < len(data):
+            length, = struct.unpack('>I', data[position:position + 4])
+            chunk_type = data[position + 4:position + 8]
+            chunk = data[position + 8:position + 8 + length]
+            if chunk_type == b'IHDR':
+                self.width, self.height, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', chunk)
+            elif chunk_type == b'IDAT':
+                idat.append(chunk)
+            position += length + 12
+        if bit_depth != 8 or color_type not in (2, 6) or interlace:
+            raise ValueError('Only 8-bit non-interlaced RGB and RGBA PNG images are supported')
+
+        channels = 4 if color_type == 6 else 3
+        pixels = _unfilter_png(
+            zlib.decompress(b''.join(idat)), self.width, self.height, channels
+        ).reshape(self.height, self.width, channels)
+        self.rgb = zlib.compress(pixels[:, :, :3].tobytes())
+        self.alpha = zlib.compress(pixels[:, :, 3].tobytes()) if channels == 4 else None
+
+
+class Page:
+    """
+    Drawing surface of one page. Coordinates are in points from the top
+    left corner of the page.
+    """
+    def __init__(self, document, size):
+        self.document = document
+        self.width, self.height = size
+        self._operations = []
+
+    def text(self, x, y, text, size=10, bold=False, color=(0, 0, 0), align='left'):
+        if align == 'right':
+            x -= text_width(text, size, bold)
+        elif align == 'center':
+            x -= text_width(text, size, bold) / 2
+        font = '/F2' if bold else '/F1'
+        self._operations.append(
+            f'BT {_color(color)} rg {font} {size} Tf {x:.2f} {self.height - y:.2f} Td '.encode()
+            + _pdf_string(text) + b' Tj ET'
+        )
+
+    def rect(self, x, y, width, height, fill=None, stroke=None, line_width=0.5):
+        operations = []
+        if fill:
+            operations.append(f'{_color(fill)} rg')
+        if stroke:
+            operations.append(f'{_color(stroke)} RG {line_width} w')
+        paint = 'B' if fill and stroke else 'f' if fill else 'S'
+        operations.append(f'{x:.2f} {self.height - y - height:.2f} {width:.2f} {height:.2f} re {paint}')
+        self._operations.append(' '.join(operations).encode())
+
+    def image(self, name, x, y, width, height):
+        self._operations.append(
+            f'q {width:.2f} 0 0 {height:.2f} {x:.2f} {self.height - y - height:.2f} cm /{name} Do Q'.encode()
+        )
+
+    def content(self):
+        return b'\n'.join(self._operations)
+
+
+class PdfDocument:
+    """
+    Minimal PDF 1.4 writer with the standard Helvetica fonts, rectangles
+    and PNG images, enough to lay out an invoice without a browser engine.
+    """
+    def __init__(self):
+        self.pages = []
+        self._images = {}
+
+    def add_page(self, size=A4):
+        page = Page(self, size)
+        self.pages.append(page)
+        return page
+
+    def add_image(self, name, image: PngImage):
+        self._images[name] = image
+
+    def to_bytes(self):
+        objects = [None, None]
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        fonts = {
+            'F1': add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'),
+            'F2': add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>'),
+        }
+        images = {}
+        for name, image in self._images.items():
+            soft_mask = ''
+            if image.alpha is not None:
+                alpha_number = add(self._stream(
+                    f'/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} '
+                    f'/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode',
+                    image.alpha
+                ))
+                soft_mask = f' /SMask {alpha_number} 0 R'
+            images[name] = add(self._stream(
+                f'/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} '
+                f'/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode{soft_mask}',
+                image.rgb
+            ))
+        resources = (
+            '<< /Font << ' + ' '.join(f'/{name} {number} 0 R' for name, number in fonts.items()) + ' >>'
+            + ' /XObject << ' + ' '.join(f'/{name} {number} 0 R' for name, number in images.items()) + ' >> >>'
+        )
+
+        page_numbers = []
+        for page in self.pages:
+            content_number = add(self._stream('/Filter /FlateDecode', zlib.compress(page.content())))
+            page_numbers.append(add(
+                f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page.width} {page.height}] '
+                f'/Resources {resources} /Contents {content_number} 0 R >>'.encode()
+            ))
+        objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+        objects[1] = (
+            '<< /Type /Pages /Kids [' + ' '.join(f'{number} 0 R' for number in page_numbers)
+            + f'] /Count {len(page_numbers)} >>'
+        ).encode()
+
+        output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(len(output))
+            output += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+        xref_offset = len(output)
+        output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+        for offset in offsets:
+            output += f'{offset:010d} 00000 n \n'.encode()
+        output += (
+            f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        ).encode()
+        return bytes(output)
+
+    @staticmethod
+    def _stream(dictionary, data):
+        return f'<< {dictionary} /Length {len(data)} >>\nstream\n'.encode() + data + b'\nendstream'
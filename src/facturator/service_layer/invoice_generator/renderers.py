@@ -0,0 +1,208 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from facturator import config
+from facturator.service_layer.invoice_generator import invoice
+from facturator.service_layer.invoice_generator.pdf_writer import PdfDocument, PngImage, text_width
+
+
+class PdfRenderer(ABC):
+    """Turns the context built by invoice.generate_context into a PDF."""
+    name: str
+
+    @abstractmethod
+    def render(self, context) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def render_merged(self, contexts) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def version(self) -> str:
+        """Changes whenever the same context would render differently."""
+        raise NotImplementedError
+
+
+class WkhtmltopdfRenderer(PdfRenderer):
+    """Renders the HTML template through pdfkit and wkhtmltopdf."""
+    name = 'wkhtmltopdf'
+
+    def render(self, context):
+        return invoice.render_pdf(context)
+
+    def render_merged(self, contexts):
+        return invoice.render_merged_pdf(contexts)
+
+    def version(self):
+        return f'{self.name}-{invoice.template_version()}'
+
+
+GREEN = (0x98, 0xb1, 0xa2)
+GREY = (0xdd, 0xdd, 0xdd)
+WHITE = (0xff, 0xff, 0xff)
+
+LEGAL_NOTICE = (
+    'De acuerdo con lo establecido por la Ley Orgánica 15/1999, de 13 de diciembre, de Protección de '
+    'Datos de Carácter Personal, le informamos que sus datos serán incluidos en un fichero del que es titular '
+    '{professional_name} y podrán ser utilizados para prestarle el servicio solicitado, la gestión fiscal, '
+    'contable y administrativa del mismo. Le informamos además que podrá '
+    'ejercitar sus derechos de acceso, rectificación, cancelación y oposición en el correo electrónico '
+    '{professional_email}'
+)
+
+
+@lru_cache(maxsize=8)
+def _load_logo(logo_path):
+    with open(logo_path, 'rb') as logo_file:
+        return PngImage(logo_file.read())
+
+
+def _wrap(text, width, size):
+    lines, line = [], ''
+    for word in text.split():
+        candidate = f'{line} {word}' if line else word
+        if line and text_width(candidate, size) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line:
+        lines.append(line)
+    return lines
+
+
+class NativePdfRenderer(PdfRenderer):
+    """
+    Lays the invoice out in-process with pdf_writer, following the HTML
+    template and stylesheet, without starting a browser engine.
+    """
+    name = 'native'
+    layout_version = '1'
+    margin = 60
+
+    def render(self, context):
+        return self.render_merged([context])
+
+    def render_merged(self, contexts):
+        document = PdfDocument()
+        for context in contexts:
+            self._draw_invoice(document, context)
+        return document.to_bytes()
+
+    def version(self):
+        return f'{self.name}-{self.layout_version}'
+
+    def _draw_invoice(self, document, context):
+        page = document.add_page()
+        left = self.margin
+        width = page.width - 2 * self.margin
+        right = left + width
+
+        if context.get('logo_path'):
+            logo = _load_logo(context['logo_path'].strip())
+            document.add_image('Logo', logo)
+            page.image('Logo', left, 50, 75 * logo.width / logo.height, 75)
+
+        info_left = left + width * 0.45
+        info_width = width * 0.55
+        page.rect(info_left, 50, info_width, 28, fill=GREEN)
+        page.text(info_left + info_width / 2, 69, 'FACTURA', 14, bold=True, color=WHITE, align='center')
+        for column, value in enumerate([context['invoice_number'], context['invoice_date']]):
+            cell_left = info_left + column * info_width / 2
+            page.rect(cell_left, 86, info_width / 2, 22, stroke=GREY)
+            page.text(cell_left + 8, 101, str(value), 10)
+        page.rect(info_left, 116, info_width, 22, fill=GREEN)
+
+        client_lines = [
+            context['client_address'],
+            f'{context["client_zip_code"]} {context["client_city"]},  {context["client_province"]}',
+            context['client_nif'],
+        ]
+        page.text(left, 180, str(context['client_name']), 10, bold=True)
+        for row, value in enumerate(client_lines, start=1):
+            page.text(left, 180 + row * 16, str(value), 10)
+        professional_lines = [
+            context['professional_name'],
+            context['professional_address'],
+            f'{context["professional_zip_code"]} {context["professional_city"]},  '
+            f'{context["professional_province"]}',
+            context['professional_nif'],
+        ]
+        for row, value in enumerate(professional_lines):
+            page.text(right, 180 + row * 16, str(value), 10, align='right')
+
+        top = 260
+        column_width = width / 4
+        page.rect(left, top, width, 22, fill=GREEN)
+        for column, heading in enumerate(['DESCRIPCION', 'UNIDADES', 'PRECIO UNIDAD', 'SUBTOTAL']):
+            page.text(left + (column + 0.5) * column_width, top + 14, heading, 8, bold=True,
+                      color=WHITE, align='center')
+        for line in context['order_lines']:
+            top += 22
+            values = ['SESIONES', str(line['units']), str(line['price']), f'{line["subtotal"]}€']
+            for column, value in enumerate(values):
+                page.text(left + (column + 0.5) * column_width, top + 15, value, 9, align='center')
+            page.rect(left, top + 22, width, 0.5, fill=GREY)
+
+        top += 50
+        taxes_left = left + width / 2
+        taxes_width = width / 2
+        tax_rows = [
+            ('BASE IMPONIBLE', None, context['total_bi']),
+            ('DESCUENTO (%)', '0,0%', context['discount_qty']),
+            ('* IVA (%)', '0,0%', context['iva_qty']),
+            ('** IRPF (%)', '0,0%', context['irpf_qty']),
+        ]
+        for concept, percentage, total in tax_rows:
+            concept_width = taxes_width * (0.75 if percentage is None else 0.5)
+            page.rect(taxes_left, top, concept_width, 24, stroke=GREY)
+            page.text(taxes_left + concept_width / 2, top + 16, concept, 9, align='center')
+            if percentage is not None:
+                page.rect(taxes_left + taxes_width * 0.5, top, taxes_width * 0.25, 24, stroke=GREY)
+                page.text(taxes_left + taxes_width * 0.625, top + 16, percentage, 9, align='center')
+            page.rect(taxes_left + taxes_width * 0.75, top, taxes_width * 0.25, 24, stroke=GREY)
+            page.text(taxes_left + taxes_width - 8, top + 16, str(total), 9, align='right')
+            top += 24
+
+        top += 20
+        page.rect(taxes_left, top, taxes_width * 0.75, 24, fill=GREEN, stroke=GREY)
+        page.text(taxes_left + 8, top + 16, 'TOTAL', 9, bold=True, color=WHITE)
+        page.rect(taxes_left + taxes_width * 0.75, top, taxes_width * 0.25, 24, stroke=GREY)
+        page.text(taxes_left + taxes_width - 8, top + 16, str(context['Total_a_pagar']), 9, align='right')
+
+        center = left + width / 2
+        page.text(center, 700, '*Artículo 20.Uno de la Ley del Impuesto sobre el Valor Añadido', 8,
+                  bold=True, align='center')
+        notice = LEGAL_NOTICE.format(
+            professional_name=context['professional_name'],
+            professional_email=context['professional_email']
+        )
+        for row, line in enumerate(_wrap(notice, width * 0.8, 8)):
+            page.text(center, 722 + row * 12, line, 8, align='center')
+
+
+RENDERERS = {
+    WkhtmltopdfRenderer.name: WkhtmltopdfRenderer,
+    NativePdfRenderer.name: NativePdfRenderer,
+}
+
+
+@lru_cache(maxsize=None)
+def get_renderer(name=None) -> PdfRenderer:
+    """Returns the renderer called `name`, by default the configured one."""
+    name = name or config.get_pdf_renderer()
+    try:
+        return RENDERERS[name]()
+    except KeyError:
+        raise ValueError(
+            f'Unknown PDF renderer {name}, expected one of {", ".join(RENDERERS)}'
+        ) from None
+
+
+def render_pdf(context):
+    return get_renderer().render(context)
+
+
+def render_merged_pdf(contexts):
+    return get_renderer().render_merged(contexts)
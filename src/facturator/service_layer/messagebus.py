@@ -35,16 +35,19 @@ def handle_command(
     logger.debug("handling command {}".format(command))
     try:
         handler = COMMAND_HANDLERS[type(command)]
-        result = handler(command, uow=uow)
+        result = handler(cmd=command, uow=uow)
         return result
     except Exception:
         logger.exception("Exception happened while handling {}".format(command))
         raise
 
 
-
 COMMAND_HANDLERS = {
     commands.AddPayer: handlers.add_payer,
+    commands.UpdatePayer: handlers.update_payer,
+    commands.DeletePayer: handlers.delete_payer,
     commands.AddOrder: handlers.add_order,
+    commands.UpdateOrder: handlers.update_order,
+    commands.DeleteOrder: handlers.delete_order,
     commands.UploadOrders: handlers.upload_payment_orders_from_file,
 }
@@ -0,0 +1,52 @@
+import base64
+import binascii
+
+from facturator import config
+
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(str(value).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor, altchars=b'-_', validate=True).decode()
+    except (binascii.Error, UnicodeError) as error:
+        raise ValueError(f"Invalid cursor {cursor!r}") from error
+
+
+def resolve_limit(limit=None):
+    """
+    Returns the page size to use for a request, falling back to the
+    configured default when none is given.
+
+    Raises:
+        ValueError: If the limit is not between 1 and the configured maximum.
+    """
+    if limit is None:
+        return config.get_default_page_size()
+    max_page_size = config.get_max_page_size()
+    if not 1 <= limit <= max_page_size:
+        raise ValueError(f"limit must be between 1 and {max_page_size}")
+    return limit
+
+
+def build_page(entities, limit, serialize):
+    """
+    Builds a page from the result of a keyset query that fetched one row
+    more than `limit`, which tells whether a next page exists.
+
+    Args:
+        entities (list): The entities returned by the repository.
+        limit (int): The requested page size.
+        serialize (callable): Turns an entity into its dict representation.
+
+    Returns:
+        tuple: The serialized items and a page info dict with the cursor
+        of the last item and whether more items follow it.
+    """
+    has_next_page = len(entities) > limit
+    entities = entities[:limit]
+    end_cursor = encode_cursor(entities[-1].id) if entities else None
+    items = [serialize(entity) for entity in entities]
+    return items, {'end_cursor': end_cursor, 'has_next_page': has_next_page}
@@ -0,0 +1,104 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+from facturator import config
+
+
+class HashingBusyError(Exception):
+    pass
+
+
+def method_prefix(method):
+    """
+    Returns the method part werkzeug writes before the first '$' of the
+    hashes made with `method`, with its default parameters filled in,
+    e.g. 'scrypt:32768:8:1' for 'scrypt'.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = args or (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = args[1] if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Invalid hash method {method!r}")
+
+
+class PasswordHasher:
+    """
+    Hashes and checks passwords in a bounded pool of worker processes,
+    so that a burst of logins does not keep the web workers busy on
+    key derivation.
+
+    At most `max_workers` hashes are computed at the same time and at
+    most `max_pending` more may wait for a worker; beyond that, calls
+    raise HashingBusyError at once instead of queueing.
+
+    Args:
+        method: Werkzeug hashing method, such as 'scrypt' or
+            'pbkdf2:sha256'. Defaults to the PASSWORD_HASH_METHOD setting.
+        max_workers: Number of worker processes.
+        max_pending: Number of hashes allowed to wait for a worker.
+        executor: Executor to hash in. Defaults to a process pool
+            started with the 'spawn' method.
+    """
+    def __init__(self, method=None, max_workers=None, max_pending=None, executor=None):
+        self.method = method if method is not None else config.get_password_hash_method()
+        self.max_workers = max_workers if max_workers is not None else config.get_password_hash_workers()
+        self.max_pending = max_pending if max_pending is not None else config.get_password_hash_max_pending()
+        self._executor = executor
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._method_prefix = method_prefix(self.method)
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError('Too many password hashes in progress, retry later')
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Tells whether `password_hash` was made with another method or
+        other parameters than the ones `hash` uses now.
+        """
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+
+_password_hasher = None
+
+
+def get_password_hasher():
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
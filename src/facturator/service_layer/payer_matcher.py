@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+
+class PayerMatcher:
+    """
+    Index over a list of payers that answers the same lookups as
+    handlers.get_payer_from_name without scanning every payer.
+
+    Each lowercased payer name is split into its n-grams, and every n-gram
+    points to the positions of the names containing it. A lookup only
+    verifies the names listed under the rarest n-gram of the searched name,
+    in list order, so the first match is the same payer a linear scan
+    would return.
+
+    Example:
+        >>> matcher = PayerMatcher([model.Payer(name='Google'), model.Payer(name='Apple Inc.')])
+        >>> matcher.match('googl')
+        Payer(name='Google')
+    """
+    ngram_size = 3
+
+    def __init__(self, payers):
+        self._payers = list(payers)
+        self._names = [(payer.name or '').lower() for payer in self._payers]
+        self._index = defaultdict(list)
+        for position, payer_name in enumerate(self._names):
+            for ngram in set(self._ngrams(payer_name)):
+                self._index[ngram].append(position)
+
+    def _ngrams(self, text):
+        return (
+            text[start:start + self.ngram_size]
+            for start in range(len(text) - self.ngram_size + 1)
+        )
+
+    def _candidates(self, query):
+        if len(query) < self.ngram_size:
+            return range(len(self._names))
+        postings = [self._index.get(ngram, []) for ngram in set(self._ngrams(query))]
+        return min(postings, key=len)
+
+    def match(self, name):
+        """
+        Returns the first payer whose name contains `name`, ignoring case,
+        or None if there is no such payer.
+        """
+        query = name.lower()
+        for position in self._candidates(query):
+            if query in self._names[position]:
+                return self._payers[position]
+        return None
@@ -0,0 +1,107 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from facturator import config
+
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'mimetype', 'etag', 'tables', 'expires_at'])
+
+
+class ResponseCache:
+    """
+    In-process LRU of serialized read responses, tagged with the tables
+    they were read from.
+
+    The command handlers call `invalidate` with the tables they write
+    to after committing, which drops every response tagged with them.
+    Each table also has a generation counter, bumped on invalidation: a
+    response is only stored if the generations of its tables did not
+    change while it was being built, so a read racing a write never
+    leaves a stale entry behind.
+
+    The cache lives in one process. When the API runs in several, a
+    write only invalidates the process that handled it, so entries also
+    expire after `ttl` seconds.
+
+    Args:
+        max_bytes: Total size of the bodies kept.
+        ttl: Seconds an entry is served for.
+    """
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def etag(body):
+        return hashlib.sha256(body).hexdigest()[:32]
+
+    def generation(self, tables):
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in tables)
+
+    def get(self, key):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if time.monotonic() >= cached.expires_at:
+                self._forget(key)
+                return None
+            self._entries.move_to_end(key)
+            return cached
+
+    def put(self, key, body, mimetype, tables, generation, etag=None):
+        """
+        Stores `body` under `key` unless one of `tables` was invalidated
+        since `generation` was read, and returns it as a CachedResponse
+        whose ETag is `etag`, by default a hash of `body`.
+        """
+        cached = CachedResponse(
+            body, mimetype, etag or self.etag(body), tuple(tables), time.monotonic() + self.ttl
+        )
+        with self._lock:
+            current = tuple(self._generations.get(table, 0) for table in tables)
+            if current != generation or len(body) > self.max_bytes:
+                return cached
+            self._forget(key)
+            self._entries[key] = cached
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._forget(next(iter(self._entries)))
+        return cached
+
+    def _forget(self, key):
+        cached = self._entries.pop(key, None)
+        if cached is not None:
+            self._size -= len(cached.body)
+
+    def invalidate(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [key for key, cached in self._entries.items() if set(tables) & set(cached.tables)]:
+                self._forget(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(config.get_response_cache_max_bytes(), config.get_response_cache_ttl())
+    return _response_cache
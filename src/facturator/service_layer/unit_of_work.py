@@ -1,15 +1,19 @@
 # pylint: disable=attribute-defined-outside-init
 import abc
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.orm.session import Session
 
 from facturator import config
-from facturator.adapters import repository
+from facturator.adapters import engines, repository
 from facturator.adapters.repository_entity_implementation import PayerImplementation, OrderImplementation
+from facturator.domain import model
+from facturator.service_layer.invoice_generator.pdf_cache import PdfCache, get_pdf_cache
+from facturator.service_layer.response_cache import ResponseCache, get_response_cache
 
 
 class AbstractUnitOfWork(abc.ABC):
+    pdf_cache: PdfCache
+    response_cache: ResponseCache
 
     def __enter__(self):
         return self
@@ -26,21 +30,41 @@ class AbstractUnitOfWork(abc.ABC):
         raise NotImplementedError
 
 
-DEFAULT_SESSION_FACTORY = sessionmaker(
-    bind=create_engine(
-        config.get_postgres_uri(),
-    )
-)
+DEFAULT_SESSION_FACTORY = engines.get_session_factory()
 
 
 class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
-    def __init__(self, session_factory=DEFAULT_SESSION_FACTORY):
+    """
+    Unit of work over a SQLAlchemy session. The caches the handlers
+    invalidate after committing default to the process-wide ones.
+    """
+    def __init__(self, session_factory=DEFAULT_SESSION_FACTORY, pdf_cache=None, response_cache=None):
         self.session_factory = session_factory
+        self._pdf_cache = pdf_cache
+        self._response_cache = response_cache
+
+    @property
+    def pdf_cache(self):
+        if self._pdf_cache is None:
+            self._pdf_cache = get_pdf_cache()
+        return self._pdf_cache
+
+    @property
+    def response_cache(self):
+        if self._response_cache is None:
+            self._response_cache = get_response_cache()
+        return self._response_cache
 
     def __enter__(self):
         self.session = self.session_factory()
-        self.payers = repository.SqlAlchemyRepository(self.session, PayerImplementation())
-        self.orders = repository.SqlAlchemyRepository(self.session, OrderImplementation())
+        use_copy = config.get_bulk_insert_use_copy()
+        self.payers = repository.SqlAlchemyRepository(
+            self.session, PayerImplementation(), use_copy=use_copy
+        )
+        self.orders = repository.SqlAlchemyRepository(
+            self.session, OrderImplementation(), use_copy=use_copy
+        )
+        self.changes = repository.SqlAlchemyChangeLog(self.session)
         return super().__enter__()
 
     def __exit__(self, *args):
@@ -48,7 +72,13 @@ class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
         self.session.close()
 
     def commit(self):
-        self.session.commit()
+        try:
+            self.session.commit()
+        except StaleDataError as error:
+            self.session.rollback()
+            raise model.VersionConflict(
+                'The item was modified by someone else, read it again and retry'
+            ) from error
 
     def rollback(self):
         self.session.rollback()
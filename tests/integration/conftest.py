@@ -0,0 +1,45 @@
+from datetime import date
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from flask import Flask
+
+from facturator.domain import model
+from facturator.entrypoints.resources.rest_api.api import create_api_blueprint
+from facturator.service_layer import unit_of_work
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue
+from facturator.service_layer.response_cache import get_response_cache
+
+
+@pytest.fixture
+def uow(session_factory):
+    get_response_cache().clear()
+    yield unit_of_work.SqlAlchemyUnitOfWork(session_factory)
+    get_response_cache().clear()
+
+
+@pytest.fixture
+def client(uow):
+    app = Flask(__name__)
+    app.register_blueprint(create_api_blueprint(uow, pdf_queue=PdfJobQueue()), url_prefix='/api')
+    return app.test_client()
+
+
+@pytest.fixture
+def seeded_items(session_factory):
+    """Commits the payer PAYER_1 and its order N-1, and returns their ids."""
+    session = session_factory()
+    payer = model.Payer(
+        id=str(uuid4()), name='PAYER_1', nif='1', address='Street', zip_code='28001',
+        city='Madrid', province='Madrid'
+    )
+    order = model.InvoiceOrder(
+        payer_name=payer.name, id=str(uuid4()), date=date(2024, 5, 1), quantity=150, number='N-1'
+    )
+    order.allocate_payer(payer)
+    session.add_all([payer, order])
+    session.commit()
+    items = SimpleNamespace(payer_id=payer.id, order_id=order.id)
+    session.close()
+    return items
@@ -0,0 +1,107 @@
+from datetime import date
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from ariadne import graphql_sync
+
+from facturator.adapters import repository
+from facturator.domain import commands, model
+from facturator.entrypoints.resources.graphql.dataloaders import DataLoader
+from facturator.entrypoints.resources.graphql.resolvers import schema
+from facturator.service_layer import handlers, messagebus
+
+
+PAYER = {
+    'name': 'payer_1', 'nif': '1', 'address': 'Street', 'zip_code': '28001',
+    'city': 'Madrid', 'province': 'Madrid'
+}
+
+
+@pytest.fixture(autouse=True)
+def untracked_order(session_factory):
+    """An order written outside the command handlers, so missing from the change log."""
+    session = session_factory()
+    session.add(model.InvoiceOrder(
+        payer_name='UNTRACKED', id=str(uuid4()), date=date(2024, 5, 1), quantity=150, number='N-0'
+    ))
+    session.commit()
+    session.close()
+
+
+def test_feed_lists_only_the_changes_after_the_cursor(client):
+    payer_id = client.post('/api/payers', json=PAYER).json['id']
+    client.patch(f'/api/payers/{payer_id}', json={'city': 'Sevilla'})
+    cursor = client.get('/api/changes').json['page_info']['end_cursor']
+
+    order_id = client.post('/api/orders', json={
+        'number': 'N-1', 'payer_name': 'payer_1', 'date': '2024-05-02', 'quantity': 50
+    }).json['id']
+    client.delete(f'/api/payers/{payer_id}')
+    response = client.get('/api/changes', query_string={'since': cursor})
+
+    assert [(change['entity'], change['id'], change['operation']) for change in response.json['changes']] == [
+        ('order', order_id, 'insert'), ('payer', payer_id, 'delete')
+    ]
+    assert response.json['changes'][0]['data']['number'] == 'N-1'
+    assert response.json['changes'][1]['data'] is None
+    polled = client.get('/api/changes', query_string={'since': response.json['page_info']['end_cursor']})
+    assert polled.json['changes'] == []
+    assert polled.json['page_info']['end_cursor'] == response.json['page_info']['end_cursor']
+
+
+def test_feed_pages_through_bulk_uploads(client):
+    file_path = Path(__file__).resolve().parent.parent / 'data' / 'movs_feb.xls'
+    with open(file_path, 'rb') as file:
+        uploaded = client.post('/api/orders/file', data={'file': (file, 'movs_feb.xls')}).json['orders']
+
+    first = client.get('/api/changes', query_string={'limit': 10}).json
+    second = client.get(
+        '/api/changes', query_string={'limit': 10, 'since': first['page_info']['end_cursor']}
+    ).json
+
+    assert first['page_info']['has_next_page']
+    assert not second['page_info']['has_next_page']
+    changes = first['changes'] + second['changes']
+    assert [change['id'] for change in changes] == [order['id'] for order in uploaded]
+    assert {change['operation'] for change in changes} == {'insert'}
+
+
+def test_invalid_cursors_are_rejected(client):
+    assert client.get('/api/changes', query_string={'since': 'not a cursor'}).status_code == 400
+
+
+def test_command_fails_when_its_change_cannot_be_logged(uow, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('changes table unavailable')
+
+    monkeypatch.setattr(repository.SqlAlchemyChangeLog, 'add', fail)
+    with pytest.raises(RuntimeError):
+        messagebus.handle(commands.AddPayer(id=str(uuid4()), **PAYER), uow)
+
+    assert handlers.get_payers(uow, None) == []
+    assert handlers.get_changes(uow)['changes'] == []
+
+
+def test_graphql_change_feed(uow):
+    payer = messagebus.handle(commands.AddPayer(id=str(uuid4()), **PAYER), uow)[0]
+    messagebus.handle(commands.AddOrder(
+        id=str(uuid4()), payer_name='payer_1', date='2024-05-02', quantity=50, number='N-1'
+    ), uow)
+
+    success, result = graphql_sync(schema, {
+        'query': '{ getChanges(first: 10) { changes { entity operation payer { name } '
+                 'order { number payer { id } } } pageInfo { endCursor hasNextPage } } }'
+    }, context_value={
+        'uow': uow,
+        'payer_loader': DataLoader(lambda payer_ids: handlers.get_payers_by_ids(uow, payer_ids)),
+    })
+
+    assert success, result
+    changes = result['data']['getChanges']['changes']
+    assert changes == [
+        {'entity': 'payer', 'operation': 'insert', 'payer': {'name': 'PAYER_1'}, 'order': None},
+        {'entity': 'order', 'operation': 'insert', 'payer': None,
+         'order': {'number': 'N-1', 'payer': {'id': payer['id']}}},
+    ]
+    assert not result['data']['getChanges']['pageInfo']['hasNextPage']
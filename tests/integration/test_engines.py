@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+from facturator.adapters import engines
+
+
+def test_engines_are_shared_per_uri(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'shared.db'}"
+
+    assert engines.get_engine(uri) is engines.get_engine(uri)
+    assert engines.get_session_factory(uri) is engines.get_session_factory(uri)
+    assert engines.get_session_factory(uri).kw['bind'] is engines.get_engine(uri)
+
+
+def test_pool_options_are_read_from_config(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '20')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+
+    options = engines.pool_options()
+
+    assert options['pool_size'] == 20
+    assert options['max_overflow'] == 0
+    assert options['pool_pre_ping'] is False
+
+
+def test_pool_status_counts_checked_out_connections(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'status.db'}"
+    engine = engines.get_engine(uri)
+
+    def status():
+        return next(pool for pool in engines.pool_status() if pool['url'] == uri)
+
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        assert status()['checked_out'] == 1
+    assert status()['checked_out'] == 0
+    assert status()['checked_in'] == 1
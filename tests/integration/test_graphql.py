@@ -0,0 +1,83 @@
+import json
+from datetime import date
+
+import pytest
+from ariadne import graphql_sync
+from flask import Flask
+from sqlalchemy import event
+
+from facturator.domain import model
+from facturator.entrypoints.resources.graphql.dataloaders import DataLoader
+from facturator.entrypoints.resources.graphql.graphql_api import create_gql_api_blueprint
+from facturator.entrypoints.resources.graphql.persisted_queries import query_hash
+from facturator.entrypoints.resources.graphql.resolvers import schema
+from facturator.service_layer import handlers, unit_of_work
+
+
+@pytest.fixture
+def uow(session_factory):
+    session = session_factory()
+    for number in range(10):
+        payer = model.Payer(id=f'payer-{number}', name=f'PAYER_{number}')
+        order = model.InvoiceOrder(
+            payer_name=payer.name,
+            id=f'order-{number}',
+            date=date(2024, 5, 1),
+            quantity=150,
+            number=f'N-{number}'
+        )
+        order.allocate_payer(payer)
+        session.add_all([payer, order])
+    session.commit()
+    session.close()
+    return unit_of_work.SqlAlchemyUnitOfWork(session_factory)
+
+
+def execute(uow, query):
+    statements = []
+    event.listen(
+        uow.session_factory.kw['bind'], 'before_cursor_execute',
+        lambda *args: statements.append(args[2])
+    )
+    success, result = graphql_sync(schema, {'query': query}, context_value={
+        'uow': uow,
+        'payer_loader': DataLoader(lambda payer_ids: handlers.get_payers_by_ids(uow, payer_ids)),
+    })
+    assert success, result
+    return result['data'], statements
+
+
+def test_orders_without_payer_selection_do_not_touch_payers(uow):
+    data, statements = execute(uow, '{ getOrders { number quantity } }')
+
+    assert len(data['getOrders']) == 10
+    assert len(statements) == 1
+    assert 'payers' not in statements[0]
+
+
+def test_order_payers_are_loaded_in_one_batch(uow):
+    data, statements = execute(uow, '{ getOrders { number payer { name } } }')
+
+    assert {order['payer']['name'] for order in data['getOrders']} == {f'PAYER_{n}' for n in range(10)}
+    assert len(statements) == 2
+    assert 'payers.id IN' in statements[1]
+
+
+def test_persisted_queries_over_get(uow):
+    app = Flask(__name__)
+    app.register_blueprint(create_gql_api_blueprint(uow))
+    client = app.test_client()
+    query = '{ getPayers { name } }'
+    extensions = json.dumps({'persistedQuery': {'version': 1, 'sha256Hash': query_hash(query)}})
+
+    not_found = client.get('/graphql', query_string={'extensions': extensions})
+    registered = client.post('/graphql', json={'query': query, 'extensions': json.loads(extensions)})
+    found = client.get('/graphql', query_string={'extensions': extensions})
+    mutation = client.get('/graphql', query_string={'query': 'mutation { deletePayer(item_id: "x") }'})
+
+    assert not_found.json['errors'][0]['extensions']['code'] == 'PERSISTED_QUERY_NOT_FOUND'
+    assert registered.status_code == 200
+    assert found.status_code == 200
+    assert len(found.json['data']['getPayers']) == 10
+    assert 'cost' in found.json['extensions']
+    assert mutation.status_code == 400
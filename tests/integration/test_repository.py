@@ -1,7 +1,8 @@
 # pylint: disable=protected-access
 from datetime import date
 import uuid
-from sqlalchemy import text
+import pytest
+from sqlalchemy import event, text
 
 from facturator.domain import model
 from facturator.adapters import repository
@@ -117,4 +118,187 @@ def test_save_payer_with_query_retrieve_with_repo(in_memory_session):
     )
     payer_retrieved = payer_repo.get_by_id(payer_id)
 
-    assert payer_retrieved.name == name
\ No newline at end of file
+    assert payer_retrieved.name == name
+
+def test_search_orders_is_case_insensitive_and_literal(in_memory_session):
+    order_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        OrderImplementation()
+    )
+    for payer_name in ['CLIENT_13', 'CLIENT_2', 'CLIENTX13', 'OTHER']:
+        order_repo.add(model.InvoiceOrder(
+            payer_name=payer_name,
+            id=str(uuid.uuid4()),
+            date=date(2024, 5, 1),
+            quantity=200
+        ))
+    in_memory_session.commit()
+
+    found = order_repo.search('payer_name', 'client_1')
+
+    assert [order.payer_name for order in found] == ['CLIENT_13']
+    assert len(order_repo.search('payer_name', 'client')) == 3
+
+
+def test_list_page_uses_id_as_keyset(in_memory_session):
+    payer_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        PayerImplementation()
+    )
+    for payer_id in ['c', 'a', 'd', 'b']:
+        payer_repo.add(model.Payer(id=payer_id, name=f'PAYER_{payer_id}'))
+    in_memory_session.commit()
+
+    first_page = payer_repo.list_page(2)
+    second_page = payer_repo.list_page(2, after=first_page[-1].id)
+
+    assert [payer.id for payer in first_page] == ['a', 'b']
+    assert [payer.id for payer in second_page] == ['c', 'd']
+    assert payer_repo.list_page(10, after='a', field='name', term='payer_d')[0].id == 'd'
+
+
+def test_add_many_inserts_orders_with_their_payers(in_memory_session):
+    payer = model.Payer(id=str(uuid.uuid4()), name='TEST_PAYER')
+    payer_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        PayerImplementation()
+    )
+    payer_repo.add(payer)
+    orders = [
+        model.InvoiceOrder(
+            payer_name='TEST_PAYER',
+            id=str(uuid.uuid4()),
+            date=date(2024, 5, 1),
+            quantity=100 + number,
+            number=f'BULK-{number}'
+        )
+        for number in range(3)
+    ]
+    orders[0].allocate_payer(payer)
+    order_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        OrderImplementation()
+    )
+    order_repo.add_many(orders)
+    in_memory_session.commit()
+
+    rows = in_memory_session.execute(
+        text('SELECT number, payer_id FROM orders ORDER BY number')
+    ).all()
+    assert rows == [('BULK-0', payer.id), ('BULK-1', None), ('BULK-2', None)]
+
+
+def test_add_rows_inserts_plain_dicts(in_memory_session):
+    order_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        OrderImplementation()
+    )
+    order_id = str(uuid.uuid4())
+    order_repo.add_rows([{
+        'id': order_id,
+        'payer_name': 'TEST_PAYER',
+        'date': '2024-05-01',
+        'quantity': 150,
+        'number': 'ROW-1',
+        'payer_id': None
+    }])
+    in_memory_session.commit()
+
+    assert order_repo.get('ROW-1').id == order_id
+
+
+def test_get_many_loads_orders_with_their_payers(in_memory_session):
+    payer = model.Payer(id=str(uuid.uuid4()), name='TEST_PAYER')
+    in_memory_session.add(payer)
+    for number in ['2024-03-002', '2024-03-001', '2024-04-001', '2024_03-9']:
+        order = model.InvoiceOrder(
+            payer_name='TEST_PAYER',
+            id=str(uuid.uuid4()),
+            date=date(2024, 3, 31),
+            quantity=150,
+            number=number
+        )
+        order.allocate_payer(payer)
+        in_memory_session.add(order)
+    in_memory_session.commit()
+    in_memory_session.expunge_all()
+    order_repo = repository.SqlAlchemyRepository(
+        in_memory_session,
+        OrderImplementation()
+    )
+
+    by_prefix = order_repo.get_many(prefix='2024-03')
+    by_number = order_repo.get_many(values=['2024-04-001', 'MISSING'])
+    in_memory_session.close()
+
+    assert [order.number for order in by_prefix] == ['2024-03-001', '2024-03-002']
+    assert by_prefix[0].payer.name == 'TEST_PAYER'
+    assert [order.number for order in by_number] == ['2024-04-001']
+
+
+def add_orders_with_payers(session, count):
+    for number in range(count):
+        payer = model.Payer(id=f'payer-{number:03d}', name=f'PAYER_{number:03d}')
+        order = model.InvoiceOrder(
+            payer_name=payer.name,
+            id=f'order-{number:03d}',
+            date=date(2024, 5, 1),
+            quantity=150,
+            number=f'N-{number:03d}'
+        )
+        order.allocate_payer(payer)
+        session.add_all([payer, order])
+    session.commit()
+    session.expunge_all()
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+
+@pytest.mark.parametrize("loading, expected_statements", [
+    ('selectin', 2),
+    ('joined', 1),
+    ('lazy', 1 + 20),
+])
+def test_list_all_loads_payers_with_the_given_strategy(in_memory_session, loading, expected_statements):
+    add_orders_with_payers(in_memory_session, 20)
+    order_repo = repository.SqlAlchemyRepository(in_memory_session, OrderImplementation())
+    statements = count_statements(in_memory_session.get_bind())
+
+    orders = [order.to_dict_recursive() for order in order_repo.list_all(loading=loading)]
+
+    assert len(statements) == expected_statements
+    assert orders[0]['payer']['name'] == 'PAYER_000'
+
+
+def test_to_dict_uses_the_payer_foreign_key_without_loading_the_payer(in_memory_session):
+    add_orders_with_payers(in_memory_session, 20)
+    order_repo = repository.SqlAlchemyRepository(in_memory_session, OrderImplementation())
+    statements = count_statements(in_memory_session.get_bind())
+
+    orders = [order.to_dict() for order in order_repo.search('payer_name', 'payer')]
+
+    assert len(statements) == 1
+    assert orders[0]['payer_id'] == 'payer-000'
+
+
+def test_unknown_loading_strategy_is_rejected(in_memory_session):
+    order_repo = repository.SqlAlchemyRepository(in_memory_session, OrderImplementation())
+
+    with pytest.raises(ValueError):
+        order_repo.list_all(loading='subquery')
+
+
+def test_estimate_count_counts_the_rows_outside_postgres(in_memory_session):
+    payer_repo = repository.SqlAlchemyRepository(in_memory_session, PayerImplementation())
+    payer_repo.add_many([
+        model.Payer(name=f"PAYER_{number}", nif=str(number), address="a", zip_code="1",
+                    city="c", province="p", id=str(uuid.uuid4()))
+        for number in range(3)
+    ])
+    in_memory_session.commit()
+
+    assert payer_repo.estimate_count() == 3
@@ -0,0 +1,58 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+
+from facturator.domain import commands
+from facturator.service_layer import handlers
+
+
+pytestmark = pytest.mark.usefixtures('seeded_items')
+
+
+@pytest.fixture
+def client(client, uow):
+    client.statements = []
+    event.listen(
+        uow.session_factory.kw['bind'], 'before_cursor_execute',
+        lambda *args: client.statements.append(args[2])
+    )
+    return client
+
+
+def test_repeated_reads_are_served_from_the_cache(client):
+    first = client.get('/api/orders')
+    statements = len(client.statements)
+    second = client.get('/api/orders')
+
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert len(client.statements) == statements
+
+
+def test_conditional_gets_return_304(client, seeded_items):
+    etag = client.get(f'/api/payers/{seeded_items.payer_id}').headers['ETag']
+
+    response = client.get(f'/api/payers/{seeded_items.payer_id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_command_handlers_invalidate_cached_responses(client, uow, seeded_items):
+    etag = client.get('/api/orders').headers['ETag']
+
+    handlers.update_order(uow, commands.UpdateOrder(id=seeded_items.order_id, quantity=160))
+    response = client.get('/api/orders', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.json['orders'][0]['quantity'] == 160
+    assert response.headers['ETag'] != etag
+
+
+def test_errors_are_not_cached(client):
+    assert client.get(f'/api/payers/{uuid4()}').status_code == 404
+    statements = len(client.statements)
+
+    assert client.get(f'/api/payers/{uuid4()}').status_code == 404
+    assert len(client.statements) > statements
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from facturator import config
+from facturator.domain import model
+from facturator.entrypoints import decorators
+from facturator.entrypoints.auth_cache import token_cache, user_cache
+
+
+@pytest.fixture
+def client(session_factory):
+    token_cache.clear()
+    user_cache.clear()
+    session = session_factory()
+    session.add(model.User(
+        username='user', public_id='user-1', nif='1', address='a', zip_code='1',
+        city='c', province='p', email='e@example.com', password='hash'
+    ))
+    session.commit()
+    session.close()
+
+    app = Flask(__name__)
+
+    @app.route('/me')
+    @decorators.token_required(session_factory=session_factory)
+    def me(current_user):
+        return current_user.username
+
+    statements = []
+    event.listen(
+        session_factory.kw['bind'], 'before_cursor_execute',
+        lambda *args: statements.append(args[2])
+    )
+    client = app.test_client()
+    client.statements = statements
+    yield client
+    token_cache.clear()
+    user_cache.clear()
+
+
+def set_token(client, public_id='user-1', minutes=30):
+    token = jwt.encode(
+        {'public_id': public_id, 'exp': datetime.utcnow() + timedelta(minutes=minutes)},
+        config.get_app_secret_key(),
+        'HS256'
+    )
+    client.set_cookie('token', token)
+
+
+def test_user_is_looked_up_once(client):
+    set_token(client)
+
+    responses = [client.get('/me') for _ in range(3)]
+
+    assert [response.text for response in responses] == ['user'] * 3
+    assert len([sql for sql in client.statements if 'FROM users' in sql]) == 1
+
+
+def test_user_changes_invalidate_the_cached_user(client, session_factory):
+    set_token(client)
+    client.get('/me')
+
+    session = session_factory()
+    session.query(model.User).filter_by(public_id='user-1').one().username = 'renamed'
+    session.commit()
+    session.close()
+
+    assert client.get('/me').text == 'renamed'
+
+
+def test_expired_and_unknown_tokens_are_rejected(client):
+    set_token(client, minutes=-1)
+    assert client.get('/me').status_code == 401
+
+    set_token(client, public_id='unknown')
+    assert client.get('/me').status_code == 401
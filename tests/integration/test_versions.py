@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+import pytest
+
+from facturator.domain import commands, model
+from facturator.service_layer import handlers, unit_of_work
+
+
+def test_updates_increment_the_version(uow, seeded_items):
+    assert handlers.get_payer(uow, seeded_items.payer_id)['version'] == 1
+
+    handlers.update_payer(uow, commands.UpdatePayer(id=seeded_items.payer_id, city='Sevilla'))
+
+    assert handlers.get_payer(uow, seeded_items.payer_id)['version'] == 2
+
+
+def test_stale_writes_raise_version_conflict(session_factory, seeded_items):
+    first, second = session_factory(), session_factory()
+    first_payer, second_payer = first.get(model.Payer, seeded_items.payer_id), second.get(model.Payer, seeded_items.payer_id)
+    first_payer.city = 'Sevilla'
+    first.commit()
+    second_payer.city = 'Bilbao'
+    uow = unit_of_work.SqlAlchemyUnitOfWork(lambda: second)
+
+    with uow, pytest.raises(model.VersionConflict):
+        uow.commit()
+
+
+def test_item_responses_carry_the_version_as_etag(client, seeded_items):
+    response = client.get(f'/api/orders/{seeded_items.order_id}')
+
+    assert response.json['version'] == 1
+    assert response.headers['ETag'] == '"1"'
+
+
+def test_updates_with_an_outdated_if_match_are_rejected(client, seeded_items):
+    updated = client.patch(f'/api/payers/{seeded_items.payer_id}', json={'city': 'Sevilla'}, headers={'If-Match': '"1"'})
+    stale = client.patch(f'/api/payers/{seeded_items.payer_id}', json={'city': 'Bilbao'}, headers={'If-Match': '"1"'})
+
+    assert updated.status_code == 200
+    assert updated.headers['ETag'] == '"2"'
+    assert stale.status_code == 412
+    assert client.get(f'/api/payers/{seeded_items.payer_id}').json['city'] == 'Sevilla'
+
+
+def test_versions_follow_the_change_log(client, uow, seeded_items):
+    before = client.get('/api/versions')
+
+    handlers.update_order(uow, commands.UpdateOrder(id=seeded_items.order_id, quantity=160))
+    handlers.add_order(commands.AddOrder(
+        id=str(uuid4()), payer_name='PAYER_1', date='2024-05-02', quantity=50, number='N-2'
+    ), uow)
+    after = client.get('/api/versions', headers={'If-None-Match': before.headers['ETag']})
+
+    assert after.status_code == 200
+    assert after.json['orders'] != before.json['orders']
+    assert after.json['payers'] == before.json['payers'] is None
+    changes = client.get('/api/changes', query_string={'since': after.json['orders']}).json
+    assert changes['changes'] == []
+    assert client.get('/api/versions', headers={'If-None-Match': after.headers['ETag']}).status_code == 304
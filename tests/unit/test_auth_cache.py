@@ -0,0 +1,43 @@
+import time
+
+from facturator.entrypoints.auth_cache import ExpiringCache, LRUCache, TokenCache, user_cache
+
+
+def test_lru_cache_evicts_least_recently_used_keys():
+    cache = LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+def test_token_entries_expire_after_the_ttl():
+    cache = TokenCache(max_size=10, ttl=0)
+    cache.put('token', {'public_id': 'user'})
+
+    assert cache.get('token') is None
+    assert len(cache) == 0
+
+
+def test_token_entries_never_outlive_the_token():
+    cache = TokenCache(max_size=10, ttl=3600)
+    cache.put('valid', {'public_id': 'user', 'exp': time.time() + 60})
+    cache.put('expired', {'public_id': 'user', 'exp': time.time() - 1})
+
+    assert cache.get('valid')['public_id'] == 'user'
+    assert cache.get('expired') is None
+
+
+def test_cached_users_expire_after_the_ttl(monkeypatch):
+    cache = ExpiringCache(max_size=10, ttl=60)
+    cache.put('public-id', 'user')
+    now = time.time()
+
+    monkeypatch.setattr(time, 'time', lambda: now + 61)
+
+    assert cache.get('public-id') is None
+    assert isinstance(user_cache, ExpiringCache)
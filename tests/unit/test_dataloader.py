@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from facturator.entrypoints.resources.graphql.dataloaders import AsyncDataLoader, DataLoader
+
+
+def test_first_load_fetches_every_queued_key_at_once():
+    batches = []
+
+    def batch_load(keys):
+        batches.append(keys)
+        return [key.upper() for key in keys]
+
+    loader = DataLoader(batch_load)
+    loader.enqueue(['a', 'b', None, 'a'])
+
+    assert [loader.load(key) for key in ['a', 'b', 'a']] == ['A', 'B', 'A']
+    assert batches == [['a', 'b']]
+
+
+def test_nothing_is_fetched_until_a_key_is_loaded():
+    batches = []
+    loader = DataLoader(lambda keys: batches.append(keys) or keys)
+
+    loader.enqueue(['a', 'b'])
+
+    assert batches == []
+
+
+def test_cached_keys_are_not_fetched_again():
+    batches = []
+
+    def batch_load(keys):
+        batches.append(keys)
+        return keys
+
+    loader = DataLoader(batch_load)
+    loader.load('a')
+    loader.enqueue(['a', 'b'])
+    loader.load('b')
+
+    assert batches == [['a'], ['b']]
+
+
+def test_async_loads_are_fetched_in_one_batch_off_the_event_loop():
+    batches = []
+
+    def batch_load(keys):
+        batches.append((keys, threading.current_thread()))
+        return [key.upper() for key in keys]
+
+    async def load_all():
+        loader = AsyncDataLoader(batch_load, ThreadPoolExecutor(max_workers=1))
+        first = await asyncio.gather(*(loader.load(key) for key in ['a', 'b', 'a']))
+        return first, await loader.load('b')
+
+    assert asyncio.run(load_all()) == (['A', 'B', 'A'], 'B')
+    assert [keys for keys, _ in batches] == [['a', 'b']]
+    assert batches[0][1] is not threading.main_thread()
+
+
+def test_async_batch_errors_reach_every_load():
+    def batch_load(keys):
+        raise ConnectionError('database unavailable')
+
+    async def load_all():
+        loader = AsyncDataLoader(batch_load, ThreadPoolExecutor(max_workers=1))
+        return await asyncio.gather(loader.load('a'), loader.load('b'), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(load_all())] == [ConnectionError, ConnectionError]
@@ -1,5 +1,7 @@
+import io
 import pytest
 from pathlib import Path
+import pandas as pd
 
 from facturator.service_layer import file_handler
 
@@ -21,6 +23,35 @@ def test_get_name_from_concept(sample_instance, concept, expected_name):
     assert sample_instance.get_name_from_concept(concept) == expected_name
 
 
+def test_extract_names_matches_scalar_search():
+    concepts = pd.Series([
+        "BIZUM DE TEST_PAYER CONCEPTO pepazo",
+        "TRANSFERENCIA DE TEST_PAYER_2, CONCEPTO algo",
+        "Payment via credit card",
+        "",
+        None
+    ])
+    names = file_handler.concept_patterns.extract(concepts)
+    assert names.tolist()[:2] == ["TEST_PAYER", "TEST_PAYER_2"]
+    assert names[2:].isna().all()
+
+
+def test_registered_patterns_are_used_by_handlers():
+    registry = file_handler.ConceptPatternRegistry([r'BIZUM DE (.+?) CONCEPTO'])
+    registry.register(r'RECIBO (\w+)')
+
+    class OtherBankFileHandler(file_handler.ExcelFileHandler):
+        concept_patterns = registry
+
+    assert OtherBankFileHandler.get_name_from_concept("RECIBO ACME 2024") == "ACME"
+    assert file_handler.ExcelFileHandler.get_name_from_concept("RECIBO ACME 2024") is None
+
+
+def test_register_pattern_requires_one_group():
+    with pytest.raises(ValueError):
+        file_handler.ConceptPatternRegistry([r'BIZUM DE .+ CONCEPTO'])
+
+
 def test_get_df_from_excel(sample_instance):
     df = sample_instance._get_df_from_excel()
     assert df['Importe'][0] == -86.66
@@ -31,3 +62,50 @@ def test_get_orders_from_df(sample_instance):
     orders = sample_instance.get_orders_from_file()
     assert len(orders) == 16
     assert orders[4].payer_name == 'CLIENT_13'
+
+
+@pytest.mark.parametrize("chunksize", [1, 7, 10000])
+def test_streaming_handler_matches_excel_handler(sample_instance, chunksize):
+    file_path = Path(__file__).resolve().parent.parent / 'data' / 'movs_feb.xls'
+    with open(file_path, 'rb') as statement:
+        streaming_handler = file_handler.HtmlStatementFileHandler(
+            statement, chunksize=chunksize
+        )
+        streamed_orders = streaming_handler.get_orders_from_file()
+
+    expected_orders = sample_instance.get_orders_from_file()
+    assert [
+        (order.payer_name, order.date) for order in streamed_orders
+    ] == [
+        (order.payer_name, order.date) for order in expected_orders
+    ]
+    assert [order.quantity for order in streamed_orders] == pytest.approx(
+        [order.quantity for order in expected_orders]
+    )
+
+
+def test_get_order_rows_from_file(sample_instance):
+    rows = sample_instance.get_order_rows_from_file()
+    orders = sample_instance.get_orders_from_file()
+
+    assert [
+        (row['payer_name'], row['date'], row['quantity']) for row in rows
+    ] == [
+        (order.payer_name, order.date, order.quantity) for order in orders
+    ]
+    assert len({row['id'] for row in rows}) == len(rows)
+
+
+def test_statement_without_header_row_is_rejected():
+    statement = io.BytesIO(
+        b'<html><body><table><tr><td>01/02/2024</td><td>BIZUM DE A CONCEPTO</td>'
+        b'<td>50,00</td></tr></table></body></html>'
+    )
+
+    with pytest.raises(ValueError, match='header row'):
+        file_handler.HtmlStatementFileHandler(statement).get_order_rows_from_file()
+
+
+def test_empty_statement_is_rejected():
+    with pytest.raises(ValueError, match='cannot be read'):
+        file_handler.HtmlStatementFileHandler(io.BytesIO(b'')).get_order_rows_from_file()
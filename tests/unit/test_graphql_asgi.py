@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from facturator.entrypoints.resources.graphql.asgi_api import create_gql_asgi_app
+from facturator.service_layer import handlers
+
+
+class FakeUnitOfWork:
+    pass
+
+
+def post_graphql(app, query):
+    body = json.dumps({'query': query}).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'POST', 'scheme': 'http', 'path': '/graphql', 'raw_path': b'/graphql',
+        'root_path': '', 'query_string': b'', 'server': ('testserver', 80),
+        'client': ('testclient', 50000),
+        'headers': [(b'content-type', b'application/json'), (b'host', b'testserver')],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = sent[0]['status']
+    return status, json.loads(b''.join(message.get('body', b'') for message in sent[1:]))
+
+
+@pytest.fixture
+def slow_handlers(monkeypatch):
+    uows = []
+
+    def get_payers(uow, name=None):
+        uows.append(uow)
+        time.sleep(0.3)
+        return [{'id': 'payer-1', 'name': 'PAYER_1'}]
+
+    def get_orders(uow, payer_name=None):
+        uows.append(uow)
+        time.sleep(0.3)
+        return [{'id': 'order-1', 'number': 'N-1', 'payer_id': None}]
+
+    monkeypatch.setattr(handlers, 'get_payers', get_payers)
+    monkeypatch.setattr(handlers, 'get_orders', get_orders)
+    monkeypatch.setattr(handlers, 'get_table_sizes', lambda uow: {'orders': 1, 'payers': 1})
+    return uows
+
+
+def test_root_fields_resolve_concurrently(slow_handlers):
+    app = create_gql_asgi_app(FakeUnitOfWork, executor=ThreadPoolExecutor(max_workers=4))
+
+    start = time.perf_counter()
+    status, result = post_graphql(app, '{ getPayers { name } getOrders { number } }')
+    elapsed = time.perf_counter() - start
+
+    assert status == 200
+    assert result['data'] == {
+        'getPayers': [{'name': 'PAYER_1'}],
+        'getOrders': [{'number': 'N-1'}],
+    }
+    assert elapsed < 0.5
+
+
+def test_each_root_field_gets_its_own_unit_of_work(slow_handlers):
+    app = create_gql_asgi_app(FakeUnitOfWork, executor=ThreadPoolExecutor(max_workers=4))
+
+    post_graphql(app, '{ getPayers { name } getOrders { number } }')
+
+    assert len(slow_handlers) == 2
+    assert slow_handlers[0] is not slow_handlers[1]
+
+
+def test_order_payers_are_loaded_in_one_batch_in_the_executor(slow_handlers, monkeypatch):
+    batches = []
+
+    def get_payers_by_ids(uow, payer_ids):
+        batches.append((payer_ids, threading.current_thread()))
+        return [{'id': payer_id, 'name': payer_id.upper()} for payer_id in payer_ids]
+
+    monkeypatch.setattr(handlers, 'get_orders', lambda uow, payer_name=None: [
+        {'id': f'order-{number}', 'number': f'N-{number}', 'payer_id': f'payer-{number % 2}'}
+        for number in range(4)
+    ])
+    monkeypatch.setattr(handlers, 'get_payers_by_ids', get_payers_by_ids)
+    app = create_gql_asgi_app(FakeUnitOfWork, executor=ThreadPoolExecutor(max_workers=4))
+
+    status, result = post_graphql(app, '{ getOrders { payer { name } } }')
+
+    assert status == 200
+    assert [order['payer']['name'] for order in result['data']['getOrders']] == [
+        'PAYER-0', 'PAYER-1', 'PAYER-0', 'PAYER-1'
+    ]
+    assert [sorted(payer_ids) for payer_ids, _ in batches] == [['payer-0', 'payer-1']]
+    assert batches[0][1] is not threading.main_thread()
@@ -1,12 +1,16 @@
 import datetime
+import inspect
 import uuid
+from pathlib import Path
 
 import pytest
+from werkzeug.datastructures import FileStorage
 
 from facturator.adapters import repository
 from facturator.adapters.repository_entity_implementation import OrderImplementation, PayerImplementation
-from facturator.service_layer import handlers, unit_of_work
-from facturator.domain.model import Payer, InvoiceOrder
+from facturator.service_layer import handlers, messagebus, unit_of_work
+from facturator.service_layer.response_cache import ResponseCache
+from facturator.domain.model import Change, Payer, InvoiceOrder, VersionConflict
 from facturator.domain import commands
 
 
@@ -18,21 +22,59 @@ class FakeRepository(repository.AbstractRepository):
     def add(self, element):
         self._entities.add(element)
 
-    def get(self, value):
+    def add_many(self, elements):
+        self._entities.update(elements)
+
+    def add_rows(self, rows):
+        entity_class = self.entity_implementation.get_entity_class()
+        parameters = inspect.signature(entity_class).parameters
+        self.add_many(
+            entity_class(**{key: row[key] for key in row if key in parameters})
+            for row in rows
+        )
+
+    def get(self, value, loading=None):
         try:
             param = self.entity_implementation.get_filter_parameter()
             return next(b for b in self._entities if getattr(b, param) == value)
         except StopIteration:
             return None
     
-    def get_by_id(self, element_id):
+    def get_by_id(self, element_id, loading=None):
         try:
             return next(entity for entity in self._entities if getattr(entity, 'id') == element_id)
         except StopIteration:
             return None
 
-    def list_all(self):
+    def get_many(self, values=None, prefix=None, loading='joined', field=None):
+        param = field or self.entity_implementation.get_filter_parameter()
+        return sorted(
+            (
+                entity for entity in self._entities
+                if (values is None or getattr(entity, param) in values)
+                and (prefix is None or getattr(entity, param).startswith(prefix))
+            ),
+            key=lambda entity: getattr(entity, param)
+        )
+
+    def list_all(self, loading=None):
         return list(self._entities)
+
+    def estimate_count(self):
+        return len(self._entities)
+
+    def search(self, field, term, loading=None):
+        return [
+            entity for entity in self._entities
+            if term.lower() in getattr(entity, field).lower()
+        ]
+
+    def list_page(self, limit, after=None, field=None, term=None, loading=None):
+        entities = self.search(field, term) if field else self.list_all()
+        entities = sorted(entities, key=lambda entity: entity.id)
+        if after is not None:
+            entities = [entity for entity in entities if entity.id > after]
+        return entities[:limit]
     
     def delete_by_id(self, element_id: str):
         entity = self.get_by_id(element_id)
@@ -42,10 +84,44 @@ class FakeRepository(repository.AbstractRepository):
             raise ValueError(f"Entity with id {element_id} does not exist")
 
 
+class FakeChangeLog(repository.AbstractChangeLog):
+    def __init__(self):
+        self._entries = []
+
+    def add(self, entity, entity_ids, operation):
+        self._entries.extend(
+            Change(entity, entity_id, operation, id=len(self._entries) + position)
+            for position, entity_id in enumerate(entity_ids, start=1)
+        )
+
+    def list_after(self, after, limit):
+        return [
+            entry for entry in self._entries if (entry.transaction_id, entry.id) > after
+        ][:limit]
+
+    def latest(self, entity):
+        return next((entry for entry in reversed(self._entries) if entry.entity == entity), None)
+
+
+class FakePdfCache:
+    def __init__(self):
+        self.invalidated_orders = []
+        self.invalidated_payers = []
+
+    def invalidate_order(self, invoice_number):
+        self.invalidated_orders.append(invoice_number)
+
+    def invalidate_payer(self, payer_name):
+        self.invalidated_payers.append(payer_name)
+
+
 class FakeUnitOfWork(unit_of_work.AbstractUnitOfWork):
     def __init__(self):
+        self.pdf_cache = FakePdfCache()
+        self.response_cache = ResponseCache(max_bytes=1024 * 1024, ttl=60)
         self.payers = FakeRepository(PayerImplementation(), [])
         self.orders = FakeRepository(OrderImplementation(), [])
+        self.changes = FakeChangeLog()
         self.committed = False
 
     def commit(self):
@@ -200,6 +276,41 @@ def test_add_orders_then_retrieve_a_list():
     assert len(filtered_orders) == 2
 
 
+def test_get_orders_page_walks_all_orders_with_cursors():
+    uow = FakeUnitOfWork()
+    for number in range(5):
+        handlers.add_order(commands.AddOrder(
+            id=str(uuid.uuid4()),
+            payer_name="regular_name",
+            date="2024-04-30",
+            quantity=150,
+            number=f"TEST_PAGE_{number}"
+        ), uow)
+
+    first_page = handlers.get_orders_page(uow=uow, payer_name='reg', limit=2)
+    assert len(first_page['orders']) == 2
+    assert first_page['page_info']['has_next_page']
+
+    seen_ids = [order['id'] for order in first_page['orders']]
+    page = first_page
+    while page['page_info']['has_next_page']:
+        page = handlers.get_orders_page(
+            uow=uow,
+            payer_name='reg',
+            limit=2,
+            after=page['page_info']['end_cursor']
+        )
+        seen_ids.extend(order['id'] for order in page['orders'])
+
+    assert seen_ids == sorted(order.id for order in uow.orders.list_all())
+
+
+@pytest.mark.parametrize("limit", [0, -1, 100000])
+def test_get_payers_page_rejects_invalid_limits(limit):
+    with pytest.raises(ValueError):
+        handlers.get_payers_page(uow=FakeUnitOfWork(), name=None, limit=limit)
+
+
 def test_add_payer():
     uow = FakeUnitOfWork()
     cmd = commands.AddPayer(
@@ -354,4 +465,107 @@ def test_associate_payer():
     assert orders[0].payer == sample_payers[3]
     assert orders[1].payer == sample_payers[0]
 
-    
\ No newline at end of file
+
+def test_upload_payment_orders_from_file():
+    uow = FakeUnitOfWork()
+    handlers.add_payer(commands.AddPayer(
+        id=str(uuid.uuid4()),
+        name='client_13',
+        nif='1111',
+        address='test_addr',
+        zip_code='test_zip',
+        city='test_city',
+        province='test_prov'
+    ), uow)
+    file_path = Path(__file__).resolve().parent.parent / 'data' / 'movs_feb.xls'
+    with open(file_path, 'rb') as file:
+        cmd = commands.UploadOrders(
+            file=FileStorage(file), code_fixed_part='TEST', code_starting_number=0
+        )
+        orders = handlers.upload_payment_orders_from_file(cmd, uow)
+
+    assert len(orders) == 16
+    assert len(uow.orders.list_all()) == 16
+    assert [order['number'] for order in orders][:2] == ['TEST-0001', 'TEST-0002']
+    client_13 = next(order for order in orders if order['payer_name'] == 'CLIENT_13')
+    assert client_13['payer_id'] == uow.payers.get('CLIENT_13').id
+    assert uow.committed
+
+
+def test_get_orders_contexts_by_prefix_reports_orders_without_payer():
+    uow = FakeUnitOfWork()
+    uow.payers.add(sample_payers[0])
+    for number in ['2024-03-002', '2024-03-001', '2024-04-001']:
+        order = InvoiceOrder('Luis Sarmiento', datetime.date(2024, 3, 31), 150, number=number)
+        order.allocate_payer(sample_payers[0])
+        uow.orders.add(order)
+    uow.orders.add(InvoiceOrder('Nobody', datetime.date(2024, 3, 31), 150, number='2024-03-003'))
+
+    contexts, errors = handlers.get_orders_contexts(uow, prefix='2024-03')
+
+    assert [context['invoice_number'] for context in contexts] == ['2024-03-001', '2024-03-002']
+    assert contexts[0]['client_name'] == 'Luis Sarmiento'
+    assert errors == {'2024-03-003': "order has no payer matching 'Nobody'"}
+
+
+def test_get_orders_contexts_reports_orders_that_cannot_be_priced():
+    uow = FakeUnitOfWork()
+    uow.payers.add(sample_payers[0])
+    for number, quantity in [('2024-03-001', 150), ('2024-03-002', 75), ('2024-03-003', 120)]:
+        order = InvoiceOrder('Luis Sarmiento', datetime.date(2024, 3, 31), quantity, number=number)
+        order.allocate_payer(sample_payers[0])
+        uow.orders.add(order)
+
+    contexts, errors = handlers.get_orders_contexts(uow, prefix='2024-03')
+
+    assert [context['invoice_number'] for context in contexts] == ['2024-03-001', '2024-03-003']
+    assert list(errors) == ['2024-03-002']
+    assert 'cannot be split' in errors['2024-03-002']
+
+
+def test_update_payer_invalidates_its_cached_pdfs():
+    uow = FakeUnitOfWork()
+    payer_id = str(uuid.uuid4())
+    handlers.add_payer(commands.AddPayer(
+        id=payer_id, name='old_name', nif='1', address='a', zip_code='1', city='c', province='p'
+    ), uow)
+
+    handlers.update_payer(uow, commands.UpdatePayer(id=payer_id, name='new_name'))
+
+    assert uow.pdf_cache.invalidated_payers == ['OLD_NAME']
+
+
+def test_update_payer_based_on_an_outdated_version_is_rejected():
+    uow = FakeUnitOfWork()
+    payer_id = str(uuid.uuid4())
+    handlers.add_payer(commands.AddPayer(
+        id=payer_id, name='name', nif='1', address='a', zip_code='1', city='c', province='p'
+    ), uow)
+    uow.payers.get_by_id(payer_id).version = 2
+    uow.committed = False
+
+    with pytest.raises(VersionConflict):
+        handlers.update_payer(uow, commands.UpdatePayer(id=payer_id, city='new', expected_version=1))
+
+    assert uow.payers.get_by_id(payer_id).city == 'c'
+    assert not uow.committed
+
+
+def test_commands_through_the_message_bus_are_recorded_in_the_change_log():
+    uow = FakeUnitOfWork()
+    payer_id = str(uuid.uuid4())
+    messagebus.handle(commands.AddPayer(
+        id=payer_id, name='name', nif='1', address='a', zip_code='1', city='c', province='p'
+    ), uow)
+    messagebus.handle(commands.UpdatePayer(id=payer_id, city='new'), uow)
+    first_page = handlers.get_changes(uow, limit=2)
+    messagebus.handle(commands.DeletePayer(id=payer_id), uow)
+
+    assert [(change['operation'], change['data']['city']) for change in first_page['changes']] == [
+        ('insert', 'new'), ('update', 'new')
+    ]
+    next_page = handlers.get_changes(uow, since=first_page['page_info']['end_cursor'])
+    assert [(change['id'], change['operation'], change['data']) for change in next_page['changes']] == [
+        (payer_id, 'delete', None)
+    ]
+    assert handlers.get_changes(uow, since=next_page['page_info']['end_cursor'])['changes'] == []
@@ -49,3 +49,20 @@ def test_generate_context():
 
     context = invoice.generate_context(order, logo_path='')
     assert context == expected_dict
+
+
+def test_render_html_inlines_assets_and_renders_a_page_per_invoice():
+    payer = model.Payer(name="test_name", nif="12A", address="test ad", zip_code="123", city="test_cty", province="TS")
+    contexts = []
+    for number in ['TEST-001', 'TEST-002']:
+        order = model.InvoiceOrder("test_name", date=datetime.date(2024, 4, 30), quantity=50, number=number)
+        order._payer = payer
+        contexts.append(invoice.generate_context(order))
+
+    html = invoice.render_html(contexts)
+
+    assert html.count('<div class="invoice-container">') == 2
+    assert html.count('page-break-after') == 1
+    assert html.count('src="data:image/png;base64,') == 2
+    assert '.invoice-container {' in html
+    assert invoice.static_dir not in html
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 import pytest
 
 from facturator.domain.model import InvoiceOrder
@@ -19,4 +21,16 @@ def test_calculate_lines_happy_path(quantity, expected_result):
 @pytest.mark.parametrize("quantity", [0, 20, -150])
 def test_calculate_lines_exceptions(quantity):
     with pytest.raises(ValueError):
-        InvoiceOrder.calculate_lines(quantity)
\ No newline at end of file
+        InvoiceOrder.calculate_lines(quantity)
+
+@pytest.mark.parametrize("quantity", [90, 75, '150.5'])
+def test_calculate_lines_rejects_quantities_without_exact_split(quantity):
+    with pytest.raises(ValueError):
+        InvoiceOrder.calculate_lines(quantity)
+
+
+def test_calculate_lines_is_exact():
+    lines = InvoiceOrder.calculate_lines(Decimal('330.00'))
+
+    assert all(isinstance(line['subtotal'], Decimal) for line in lines)
+    assert sum(line['subtotal'] for line in lines) == Decimal('330')
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from facturator.service_layer.passwords import HashingBusyError, PasswordHasher, method_prefix
+
+
+FAST_METHOD = 'pbkdf2:sha256:1000'
+
+
+def test_hashes_and_verifies_in_the_executor():
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=1, max_pending=1,
+                            executor=ThreadPoolExecutor(max_workers=1))
+
+    password_hash = hasher.hash('secret')
+
+    assert password_hash.startswith(FAST_METHOD + '$')
+    assert hasher.verify(password_hash, 'secret')
+    assert not hasher.verify(password_hash, 'wrong')
+
+
+def test_hashes_made_with_other_settings_need_rehash():
+    hasher = PasswordHasher(method=FAST_METHOD, executor=ThreadPoolExecutor(max_workers=1))
+
+    assert not hasher.needs_rehash(generate_password_hash('secret', FAST_METHOD))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:2000'))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'scrypt'))
+
+
+@pytest.mark.parametrize('method', ['scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', FAST_METHOD])
+def test_method_prefix_matches_the_hashes_werkzeug_makes(method):
+    assert method_prefix(method) == generate_password_hash('secret', method).split('$', 1)[0]
+
+
+class StalledExecutor:
+    def __init__(self, expected_submits):
+        self.futures = []
+        self.expected_submits = expected_submits
+        self.all_submitted = threading.Event()
+
+    def submit(self, function, *args):
+        future = Future()
+        self.futures.append((future, function, args))
+        if len(self.futures) >= self.expected_submits:
+            self.all_submitted.set()
+        return future
+
+
+def test_rejects_hashes_beyond_the_pending_limit():
+    executor = StalledExecutor(expected_submits=2)
+    hasher = PasswordHasher(method=FAST_METHOD, max_workers=1, max_pending=1, executor=executor)
+    threads = [threading.Thread(target=hasher.hash, args=('secret',), daemon=True) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    assert executor.all_submitted.wait(timeout=5)
+
+    with pytest.raises(HashingBusyError):
+        hasher.hash('secret')
+
+    for future, function, args in executor.futures:
+        future.set_result(function(*args))
+    for thread in threads:
+        thread.join(timeout=5)
+    assert hasher._slots.acquire(blocking=False)
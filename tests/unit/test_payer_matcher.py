@@ -0,0 +1,43 @@
+import random
+import string
+
+import pytest
+
+from facturator.domain.model import Payer
+from facturator.service_layer import handlers
+from facturator.service_layer.payer_matcher import PayerMatcher
+
+
+payers = [
+    Payer(name="Luis Sarmiento"),
+    Payer(name="Luis Serrano"),
+    Payer(name="Luis Moreno"),
+    Payer(name="Luis Moron"),
+    Payer(name="CLIENT_13"),
+]
+
+
+@pytest.mark.parametrize("name, expected_payer", [
+    ("Luis Sarmiento", payers[0]),
+    ("luis", payers[0]),
+    ("Luis More", payers[2]),
+    ("MORON", payers[3]),
+    ("t_1", payers[4]),
+    ("", payers[0]),
+    ("Not a name", None)
+])
+def test_match(name, expected_payer):
+    assert PayerMatcher(payers).match(name) == expected_payer
+
+
+def test_match_agrees_with_linear_scan():
+    rng = random.Random(0)
+    alphabet = "abc "
+    random_payers = [
+        Payer(name=''.join(rng.choices(alphabet, k=rng.randint(0, 12))))
+        for _ in range(200)
+    ]
+    matcher = PayerMatcher(random_payers)
+    for _ in range(500):
+        name = ''.join(rng.choices(alphabet + string.ascii_uppercase[:3], k=rng.randint(0, 5)))
+        assert matcher.match(name) is handlers.get_payer_from_name(name, random_payers)
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from facturator.service_layer.invoice_generator.pdf_cache import PdfCache
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue
+
+
+def make_context(name='TEST_NAME', number='TEST-001', quantity='50€'):
+    return {
+        'client_name': name,
+        'invoice_number': number,
+        'invoice_date': '2024-04-30',
+        'Total_a_pagar': quantity
+    }
+
+
+def test_cached_pdf_is_returned_for_the_same_context(tmp_path):
+    cache = PdfCache(str(tmp_path), 1000, template_version='v1')
+
+    cache.put(make_context(), b'%PDF-1')
+
+    assert cache.get(make_context()) == b'%PDF-1'
+    assert cache.get(make_context(quantity='60€')) is None
+    assert PdfCache(str(tmp_path), 1000, template_version='v2').get(make_context()) is None
+
+
+def test_least_recently_used_pdfs_are_evicted(tmp_path):
+    cache = PdfCache(str(tmp_path), 20, template_version='v1')
+    cache.put(make_context(number='A'), b'0123456789')
+    cache.put(make_context(number='B'), b'0123456789')
+    cache.get(make_context(number='A'))
+
+    cache.put(make_context(number='C'), b'0123456789')
+
+    assert cache.get(make_context(number='A')) == b'0123456789'
+    assert cache.get(make_context(number='B')) is None
+    assert cache.get(make_context(number='C')) == b'0123456789'
+
+
+def test_cache_size_survives_a_restart(tmp_path):
+    PdfCache(str(tmp_path), 20, template_version='v1').put(make_context(number='A'), b'0123456789')
+    cache = PdfCache(str(tmp_path), 20, template_version='v1')
+
+    cache.put(make_context(number='B'), b'0123456789')
+    cache.put(make_context(number='C'), b'0123456789')
+
+    assert cache.get(make_context(number='A')) is None
+
+
+def test_invalidate_order_and_payer(tmp_path):
+    cache = PdfCache(str(tmp_path), 1000, template_version='v1')
+    cache.put(make_context(number='A'), b'%PDF-A')
+    cache.put(make_context(number='B'), b'%PDF-B')
+    cache.put(make_context(name='OTHER', number='C'), b'%PDF-C')
+
+    cache.invalidate_order('A')
+    assert cache.get(make_context(number='A')) is None
+    assert cache.get(make_context(number='B')) == b'%PDF-B'
+
+    cache.invalidate_payer('TEST_NAME')
+    assert cache.get(make_context(number='B')) is None
+    assert cache.get(make_context(name='OTHER', number='C')) == b'%PDF-C'
+
+
+def test_queue_renders_each_context_once(tmp_path):
+    renders = []
+
+    def render(context):
+        renders.append(context['invoice_number'])
+        return b'%PDF'
+
+    queue = PdfJobQueue(
+        1, 5, 5, render=render,
+        executor=ThreadPoolExecutor(max_workers=1),
+        cache=PdfCache(str(tmp_path), 1000, template_version='v1')
+    )
+
+    assert queue.submit(make_context()).result(timeout=5) == b'%PDF'
+    job = queue.submit(make_context())
+
+    assert job.status == 'done'
+    assert job.result() == b'%PDF'
+    assert renders == ['TEST-001']
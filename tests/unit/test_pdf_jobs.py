@@ -0,0 +1,123 @@
+import io
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import pytest
+
+from facturator.service_layer.invoice_generator import pdf_batch
+from facturator.service_layer.invoice_generator.pdf_jobs import PdfJobQueue, QueueFullError
+
+
+def make_context(name='test_name', number='TEST-001'):
+    return {'client_name': name, 'invoice_date': '2024-04-30', 'invoice_number': number}
+
+
+def test_submitted_job_returns_rendered_pdf():
+    queue = PdfJobQueue(
+        max_workers=1, max_pending=5, finished_jobs_kept=5,
+        render=lambda context: context['client_name'].encode(),
+        executor=ThreadPoolExecutor(max_workers=1)
+    )
+
+    job = queue.submit(make_context())
+
+    assert job.result(timeout=5) == b'test_name'
+    assert queue.get(job.id).to_dict() == {
+        'id': job.id, 'status': 'done', 'filename': 'test_name_2024-04-30.pdf'
+    }
+
+
+def test_failed_render_is_reported():
+    def render(context):
+        raise OSError('wkhtmltopdf not found')
+
+    queue = PdfJobQueue(1, 5, 5, render=render, executor=ThreadPoolExecutor(max_workers=1))
+
+    job = queue.submit(make_context())
+    with pytest.raises(OSError):
+        job.result(timeout=5)
+
+    assert job.status == 'failed'
+    assert job.to_dict()['error'] == 'wkhtmltopdf not found'
+
+
+def test_submit_raises_when_too_many_jobs_are_pending():
+    release = threading.Event()
+    queue = PdfJobQueue(
+        1, 2, 5,
+        render=lambda context: release.wait(5) and b'',
+        executor=ThreadPoolExecutor(max_workers=1)
+    )
+
+    queue.submit(make_context())
+    queue.submit(make_context())
+    with pytest.raises(QueueFullError):
+        queue.submit(make_context())
+    release.set()
+
+
+def test_oldest_finished_jobs_are_discarded():
+    queue = PdfJobQueue(1, 5, 1, render=lambda context: b'', executor=ThreadPoolExecutor(max_workers=1))
+
+    jobs = []
+    for _ in range(3):
+        jobs.append(queue.submit(make_context()))
+        jobs[-1].result(timeout=5)
+
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[1].id) is not None
+    assert queue.get(jobs[2].id) is not None
+
+
+def test_jobs_are_shared_through_the_jobs_dir(tmp_path):
+    release = threading.Event()
+    accepting = PdfJobQueue(
+        1, 5, 5, render=lambda context: release.wait(5) and b'%PDF',
+        executor=ThreadPoolExecutor(max_workers=1), jobs_dir=str(tmp_path)
+    )
+    other_worker = PdfJobQueue(1, 5, 5, render=None, jobs_dir=str(tmp_path))
+
+    job = accepting.submit(make_context())
+    shared = other_worker.get(job.id)
+    assert shared.status in ('pending', 'running')
+    with pytest.raises(FutureTimeoutError):
+        shared.result(timeout=0.2)
+
+    release.set()
+    job.result(timeout=5)
+    assert shared.result(timeout=5) == b'%PDF'
+    assert other_worker.get(job.id).to_dict() == {
+        'id': job.id, 'status': 'done', 'filename': 'test_name_2024-04-30.pdf'
+    }
+    assert other_worker.get('../etc/passwd') is None
+
+
+def test_render_many_streams_a_zip_with_every_invoice():
+    def render(context):
+        if context['client_name'] == 'broken':
+            raise OSError('wkhtmltopdf crashed')
+        return context['invoice_number'].encode()
+
+    queue = PdfJobQueue(2, 1, 1, render=render, executor=ThreadPoolExecutor(max_workers=2))
+    contexts = [make_context(number=f'TEST-{number:03d}') for number in range(10)]
+    contexts.append(make_context('broken', 'TEST-999'))
+
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(pdf_batch.stream_zip(queue.render_many(contexts)))))
+
+    assert sorted(archive.namelist()) == sorted(
+        [f'TEST-{number:03d}_test_name.pdf' for number in range(10)] + ['errors.txt']
+    )
+    assert archive.read('TEST-004_test_name.pdf') == b'TEST-004'
+    assert archive.read('errors.txt') == b'TEST-999: wkhtmltopdf crashed\n'
+
+
+def test_stream_zip_lists_invoices_left_out_before_rendering():
+    queue = PdfJobQueue(1, 1, 1, render=lambda context: b'pdf', executor=ThreadPoolExecutor(max_workers=1))
+    contexts = [make_context(number='TEST-001')]
+
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(pdf_batch.stream_zip(
+        queue.render_many(contexts), errors={'TEST-002': 'quantity 75 cannot be split'}
+    ))))
+
+    assert archive.read('errors.txt') == b'TEST-002: quantity 75 cannot be split\n'
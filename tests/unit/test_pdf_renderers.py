@@ -0,0 +1,96 @@
+import datetime
+import re
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from facturator.domain import model
+from facturator.service_layer.invoice_generator import invoice, renderers
+from facturator.service_layer.invoice_generator.pdf_writer import PngImage
+
+
+def make_context(number='TEST-001'):
+    payer = model.Payer(
+        name='ÑANDÚ (TEST) S.L.', nif='12A', address='test ad', zip_code='123', city='test_cty', province='TS'
+    )
+    order = model.InvoiceOrder(payer.name, date=datetime.date(2024, 4, 30), quantity=170, number=number)
+    order.allocate_payer(payer)
+    return invoice.generate_context(order)
+
+
+def xref_offsets(pdf):
+    start = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+    entries = pdf[start:].split(b'\n')[3:]
+    return [int(entry[:10]) for entry in entries if entry.endswith(b' n ')]
+
+
+def test_native_renderer_writes_a_well_formed_pdf():
+    pdf = renderers.get_renderer('native').render(make_context())
+
+    assert pdf.startswith(b'%PDF-1.4')
+    assert pdf.rstrip().endswith(b'%%EOF')
+    for number, offset in enumerate(xref_offsets(pdf), start=1):
+        assert pdf[offset:].startswith(f'{number} 0 obj'.encode())
+    assert b'/Type /XObject /Subtype /Image /Width 490 /Height 483' in pdf
+
+
+def test_native_renderer_merges_one_page_per_invoice():
+    pdf = renderers.get_renderer('native').render_merged(
+        [make_context('TEST-001'), make_context('TEST-002'), make_context('TEST-003')]
+    )
+
+    assert b'/Count 3' in pdf
+
+
+def test_unknown_renderer_is_rejected():
+    with pytest.raises(ValueError):
+        renderers.get_renderer('reportlab')
+
+
+def encode_png(pixels):
+    """Encodes RGBA `pixels` cycling through the five PNG row filters."""
+    height, width, _ = pixels.shape
+    rows = pixels.reshape(height, width * 4).astype(np.int32)
+    previous = np.zeros(width * 4, dtype=np.int32)
+    raw = b''
+    for row_number, row in enumerate(rows):
+        filter_type = row_number % 5
+        left = np.concatenate([np.zeros(4, dtype=np.int32), row[:-4]])
+        upper_left = np.concatenate([np.zeros(4, dtype=np.int32), previous[:-4]])
+        if filter_type == 0:
+            filtered = row
+        elif filter_type == 1:
+            filtered = row - left
+        elif filter_type == 2:
+            filtered = row - previous
+        elif filter_type == 3:
+            filtered = row - (left + previous) // 2
+        else:
+            estimate = left + previous - upper_left
+            distances = [np.abs(estimate - value) for value in (left, previous, upper_left)]
+            predictor = np.where(
+                (distances[0] <= distances[1]) & (distances[0] <= distances[2]), left,
+                np.where(distances[1] <= distances[2], previous, upper_left)
+            )
+            filtered = row - predictor
+        raw += bytes([filter_type]) + (filtered % 256).astype(np.uint8).tobytes()
+        previous = row
+
+    def chunk(chunk_type, data):
+        return struct.pack('>I', len(data)) + chunk_type + data + b'\0\0\0\0'
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+
+def test_png_image_undoes_every_row_filter():
+    pixels = np.random.default_rng(0).integers(0, 256, (10, 7, 4), dtype=np.uint8)
+
+    image = PngImage(encode_png(pixels))
+
+    rgb = np.frombuffer(zlib.decompress(image.rgb), dtype=np.uint8).reshape(10, 7, 3)
+    alpha = np.frombuffer(zlib.decompress(image.alpha), dtype=np.uint8).reshape(10, 7)
+    assert (rgb == pixels[:, :, :3]).all()
+    assert (alpha == pixels[:, :, 3]).all()
@@ -0,0 +1,98 @@
+import pytest
+from graphql import GraphQLError, parse, specified_rules
+from graphql.validation import ValidationRule
+
+from facturator.entrypoints.resources.graphql.persisted_queries import (
+    PersistedQueryCache,
+    PersistedQueryNotFound,
+    data_from_query_params,
+    query_hash,
+)
+from facturator.entrypoints.resources.graphql.resolvers import schema
+
+
+QUERY = '{ getPayers { name } }'
+
+
+def persisted(query_text=QUERY):
+    return {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': query_hash(query_text)}}}
+
+
+def test_unknown_hash_is_not_found_until_the_query_is_sent():
+    cache = PersistedQueryCache(schema)
+
+    with pytest.raises(PersistedQueryNotFound):
+        cache.resolve(persisted())
+
+    _, document = cache.resolve({'query': QUERY, **persisted()})
+    data, cached_document = cache.resolve(persisted())
+
+    assert data['query'] == QUERY
+    assert cached_document is document
+
+
+def test_plain_queries_are_parsed_once():
+    cache = PersistedQueryCache(schema)
+
+    _, first = cache.resolve({'query': QUERY})
+    _, second = cache.resolve({'query': QUERY})
+
+    assert first is second
+    assert len(cache) == 1
+
+
+def test_hash_must_match_the_query():
+    cache = PersistedQueryCache(schema)
+
+    with pytest.raises(GraphQLError, match='provided sha does not match query'):
+        cache.resolve({'query': '{ getOrders { number } }', **persisted()})
+
+
+def test_invalid_queries_are_not_cached():
+    cache = PersistedQueryCache(schema)
+
+    _, document = cache.resolve({'query': '{ getPayers { unknown } }'})
+    _, unparsable = cache.resolve({'query': '{ getPayers '})
+
+    assert document is not None
+    assert unparsable is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_documents_are_evicted():
+    cache = PersistedQueryCache(schema, max_size=2)
+    queries = ['{ getPayers { name } }', '{ getOrders { number } }', '{ getPayers { id } }']
+
+    cache.resolve({'query': queries[0]})
+    cache.resolve({'query': queries[1]})
+    cache.resolve({'query': queries[0]})
+    cache.resolve({'query': queries[2]})
+
+    cache.resolve(persisted(queries[0]))
+    with pytest.raises(PersistedQueryNotFound):
+        cache.resolve(persisted(queries[1]))
+
+
+def test_cached_documents_only_run_custom_rules():
+    cache = PersistedQueryCache(schema)
+    visited = []
+
+    class CustomRule(ValidationRule):
+        def enter_document(self, *_args):
+            visited.append(True)
+
+    _, document = cache.resolve({'query': QUERY})
+    invalid_document = parse('{ getPayers { unknown } }')
+    rules = list(specified_rules) + [CustomRule]
+
+    assert cache.validate(schema, document, rules) == []
+    assert visited == [True]
+    assert len(cache.validate(schema, invalid_document, rules)) == 1
+
+
+def test_get_params_are_decoded():
+    data = data_from_query_params({'query': QUERY, 'variables': '{"name": "A"}', 'extensions': ''})
+
+    assert data == {'query': QUERY, 'operationName': None, 'variables': {'name': 'A'}, 'extensions': None}
+    with pytest.raises(GraphQLError):
+        data_from_query_params({'variables': '{'})
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+import pytest
+
+from facturator.domain.pricing import PriceTierEngine, LineCalculationError
+
+
+def test_fewest_units_of_the_most_expensive_tiers_are_used():
+    engine = PriceTierEngine([65, 40, '12.5'])
+
+    assert engine.calculate_lines(205) == [
+        {'units': 10, 'price': Decimal('12.5'), 'subtotal': Decimal('125.0')},
+        {'units': 2, 'price': Decimal('40'), 'subtotal': Decimal('80')},
+    ]
+    assert engine.calculate_lines('117.5') == [
+        {'units': 3, 'price': Decimal('12.5'), 'subtotal': Decimal('37.5')},
+        {'units': 2, 'price': Decimal('40'), 'subtotal': Decimal('80')},
+    ]
+
+
+def test_large_quantities_reuse_the_reachable_amounts():
+    engine = PriceTierEngine([50, 60])
+
+    assert engine.calculate_lines(1_000_010) == [
+        {'units': 19999, 'price': Decimal('50'), 'subtotal': Decimal('999950')},
+        {'units': 1, 'price': Decimal('60'), 'subtotal': Decimal('60')},
+    ]
+    assert engine.calculate_lines(170) == [
+        {'units': 1, 'price': Decimal('50'), 'subtotal': Decimal('50')},
+        {'units': 2, 'price': Decimal('60'), 'subtotal': Decimal('120')},
+    ]
+
+
+def test_breakdowns_are_cached_per_quantity():
+    engine = PriceTierEngine([50, 60])
+
+    engine.calculate_lines(330)
+    engine.calculate_lines(330)
+
+    assert engine.breakdown.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("prices", [[], [0, 50], [50, 50]])
+def test_invalid_tiers_are_rejected(prices):
+    with pytest.raises(ValueError):
+        PriceTierEngine(prices)
+
+
+@pytest.mark.parametrize("quantity", [Decimal('NaN'), Decimal('sNaN'), Decimal('Infinity'), 'nan'])
+def test_non_finite_quantities_are_rejected(quantity):
+    with pytest.raises(ValueError, match='not a finite number'):
+        PriceTierEngine([50, 60]).calculate_lines(quantity)
+
+
+def test_batch_matches_the_scalar_breakdown():
+    engine = PriceTierEngine([50, 60])
+    quantities = [150, 120, 330, 170, 1_000_010]
+
+    batch = engine.calculate_lines_batch(quantities)
+
+    assert batch.prices.tolist() == [50, 60]
+    assert batch.units.tolist() == [[3, 0], [0, 2], [3, 3], [1, 2], [19999, 1]]
+    assert batch.subtotals.sum(axis=1).tolist() == quantities
+
+
+def test_batch_with_more_tiers_and_decimal_prices():
+    engine = PriceTierEngine([65, 40, '12.5'])
+
+    batch = engine.calculate_lines_batch([205, 117.5, 205])
+
+    assert batch.units.tolist() == [[10, 2, 0], [3, 2, 0], [10, 2, 0]]
+    assert batch.subtotals.tolist() == [[125.0, 80.0, 0.0], [37.5, 80.0, 0.0], [125.0, 80.0, 0.0]]
+
+
+def test_batch_reports_every_invalid_row():
+    engine = PriceTierEngine([50, 60])
+
+    with pytest.raises(LineCalculationError) as error:
+        engine.calculate_lines_batch([150, 90, 20, 150.5, 330])
+
+    assert error.value.errors == {
+        1: 'quantity 90 cannot be split into units of 50, 60',
+        2: 'quantity must be at least the lowest price',
+        3: 'quantity 150.5 cannot be split into units of 50, 60',
+    }
+
+
+def test_two_tier_closed_form_uses_the_fewest_expensive_units():
+    engine = PriceTierEngine([50, '60.5'])
+
+    for quantity in range(50, 3000, 5):
+        splits = [
+            (expensive, (Decimal(quantity) - expensive * Decimal('60.5')) / 50)
+            for expensive in range(quantity // 60 + 1)
+        ]
+        exact = [(expensive, cheap) for expensive, cheap in splits if cheap >= 0 and cheap == int(cheap)]
+        if not exact:
+            with pytest.raises(ValueError):
+                engine.breakdown(quantity)
+            continue
+        expensive, cheap = exact[0]
+        units = {price: units for units, price, _ in engine.breakdown(quantity)}
+        assert (units.get(Decimal('60.5'), 0), units.get(Decimal('50'), 0)) == (expensive, cheap)
+
+
+def test_quantities_above_the_maximum_are_rejected_with_more_tiers():
+    engine = PriceTierEngine([65, 40, '12.5'], max_quantity=1000)
+
+    with pytest.raises(ValueError, match='above the maximum'):
+        engine.calculate_lines(1_000_000_000)
+    assert PriceTierEngine([50, 60], max_quantity=1000).calculate_lines(10 ** 12)[0]['units'] == 2 * 10 ** 10
@@ -0,0 +1,104 @@
+import pytest
+from ariadne import graphql_sync
+from graphql import parse, validate
+
+from facturator.entrypoints.resources.graphql.query_cost import (
+    QueryCostExtension,
+    TableSizes,
+    query_cost_rule,
+    query_cost_validation_rules,
+)
+from facturator.entrypoints.resources.graphql.resolvers import schema
+
+
+@pytest.fixture(autouse=True)
+def page_sizes(monkeypatch):
+    monkeypatch.setenv('DEFAULT_PAGE_SIZE', '100')
+    monkeypatch.setenv('MAX_PAGE_SIZE', '1000')
+
+
+def estimate(query, variables=None, max_cost=10 ** 9, max_depth=100, table_sizes=None):
+    context = {}
+    errors = validate(schema, parse(query), [
+        query_cost_rule(context, variables, max_cost, max_depth, table_sizes)
+    ])
+    return context.get('query_cost'), [error.message for error in errors]
+
+
+def test_paginated_lists_cost_their_page_size():
+    cost, errors = estimate('{ getOrdersPage(first: 10) { edges { node { number payer { name } } } } }')
+
+    assert cost == 1 + 10 + 10 + 10
+    assert errors == []
+
+
+def test_page_size_is_read_from_variables_and_defaults_to_the_default_page_size():
+    query = 'query ($first: Int) { getPayersPage(first: $first) { edges { node { name } } } }'
+
+    assert estimate(query, {'first': 20})[0] == 1 + 20 + 20
+    assert estimate(query)[0] == 1 + 100 + 100
+
+
+def test_unpaginated_lists_cost_the_max_page_size():
+    cost, _ = estimate('{ getOrders { number payer { name } } getPayer(item_id: "1") { name } }')
+
+    assert cost == 1000 + 1000 + 1
+
+
+def test_unpaginated_lists_cost_the_rows_of_their_table():
+    query = '{ getOrders { payer { name } } getPayers { name } }'
+
+    assert estimate(query, table_sizes={'orders': 30, 'payers': 4})[0] == 30 + 30 + 4
+    assert estimate(query, table_sizes={'orders': 0, 'payers': 0})[0] == 1 + 1 + 1
+
+
+def test_full_table_queries_over_large_tables_are_refused():
+    _, errors = estimate(
+        '{ getOrders { payer { name } } }', max_cost=5000, table_sizes={'orders': 2_000_000}
+    )
+
+    assert errors == [
+        'The query cost is 4000000, above the maximum of 5000. '
+        'Request fewer items per page or fewer nested lists.'
+    ]
+
+
+@pytest.mark.parametrize('ttl, expected', [(60, {'orders': 1}), (0, {'orders': 2})])
+def test_table_sizes_are_counted_again_once_expired(ttl, expected):
+    counts = []
+    table_sizes = TableSizes(lambda: counts.append(1) or {'orders': len(counts)}, ttl=ttl)
+
+    table_sizes.get()
+    assert table_sizes.get() == expected
+
+
+def test_fragments_are_counted_where_they_are_spread():
+    cost, _ = estimate("""
+        { getOrdersPage(first: 5) { edges { node { ...OrderFields } } } }
+        fragment OrderFields on Order { payer { ...PayerFields } }
+        fragment PayerFields on Payer { name }
+    """)
+
+    assert cost == 1 + 5 + 5 + 5
+
+
+def test_queries_over_the_budget_or_too_deep_are_rejected():
+    _, errors = estimate('{ getOrders { payer { name } } }', max_cost=1500, max_depth=2)
+
+    assert errors == [
+        'The query cost is 2000, above the maximum of 1500. '
+        'Request fewer items per page or fewer nested lists.',
+        'The query depth is 3, above the maximum of 2.',
+    ]
+
+
+def test_cost_is_reported_in_extensions(monkeypatch):
+    monkeypatch.setenv('GRAPHQL_MAX_COST', '500')
+
+    success, result = graphql_sync(
+        schema, {'query': '{ getOrders { number } }'}, context_value={},
+        validation_rules=query_cost_validation_rules, extensions=[QueryCostExtension]
+    )
+
+    assert not success
+    assert result['extensions'] == {'cost': {'requested': 1000, 'maximum': 500}}
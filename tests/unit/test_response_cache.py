@@ -0,0 +1,41 @@
+from facturator.service_layer.response_cache import ResponseCache
+
+
+def test_invalidation_drops_responses_tagged_with_the_table():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    cache.put('/payers', b'payers', 'application/json', ['payers'], cache.generation(['payers']))
+    orders_generation = cache.generation(['orders', 'payers'])
+    cache.put('/orders', b'orders', 'application/json', ['orders', 'payers'], orders_generation)
+
+    cache.invalidate('orders')
+
+    assert cache.get('/payers').body == b'payers'
+    assert cache.get('/orders') is None
+
+
+def test_responses_read_before_an_invalidation_are_not_stored():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    generation = cache.generation(['orders'])
+    cache.invalidate('orders')
+
+    cached = cache.put('/orders', b'stale', 'application/json', ['orders'], generation)
+
+    assert cached.etag == ResponseCache.etag(b'stale')
+    assert cache.get('/orders') is None
+
+
+def test_least_recently_used_responses_are_evicted_beyond_max_bytes():
+    cache = ResponseCache(max_bytes=10, ttl=60)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, b'12345', 'application/json', ['orders'], cache.generation(['orders']))
+
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    assert cache.get('c') is not None
+
+
+def test_responses_expire_after_the_ttl():
+    cache = ResponseCache(max_bytes=1000, ttl=0)
+    cache.put('/orders', b'orders', 'application/json', ['orders'], cache.generation(['orders']))
+
+    assert cache.get('/orders') is None